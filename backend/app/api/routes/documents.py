@@ -1,10 +1,16 @@
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Header, BackgroundTasks
+import jwt
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 
-from app.core.supabase import supabase_admin
+from app.core.auth import get_token_expiry, token_cache, verify_token_locally
+from app.core.concurrency import run_sync
+from app.core.supabase import async_supabase_admin
 from app.models.documents import DocumentResponse, DocumentListResponse, SearchRequest, SearchResponse, ChunkResult
-from app.services.ingestion import process_document
+from app.services.job_queue import job_queue, PROCESS_DOCUMENT
+from app.services.upload_spool import (
+    check_content_length, InvalidUploadError, remove_spool, spool_upload, UploadTooLargeError
+)
 from app.services.retrieval import retrieve_relevant_chunks
 
 router = APIRouter()
@@ -24,6 +30,10 @@ async def get_user_id_from_token(authorization: str = Header(...)) -> UUID:
     """
     Extract and verify Bearer token from authorization header.
     
+    Verified tokens are cached until they expire. Other tokens are verified
+    locally against the cached JWT secret or JWKS, with a remote Supabase
+    check for tokens that cannot be verified locally.
+    
     Args:
         authorization: The Authorization header value.
         
@@ -41,14 +51,44 @@ async def get_user_id_from_token(authorization: str = Header(...)) -> UUID:
     
     token = authorization.replace("Bearer ", "")
     
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
+    
+    # Verify in-process first; only fall back to the auth server when the
+    # token cannot be checked locally
+    try:
+        claims = await run_sync(verify_token_locally, token)
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token"
+        )
+    
+    if claims is not None:
+        # A validly signed token can still lack a user ID we can use
+        try:
+            user_id = UUID(claims["sub"])
+        except (KeyError, ValueError):
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid token subject"
+            )
+        token_cache.put(token, user_id, float(claims["exp"]))
+        return user_id
+    
     try:
-        user_response = supabase_admin.auth.get_user(token)
+        user_response = await async_supabase_admin.auth.get_user(token)
         if not user_response or not user_response.user:
             raise HTTPException(
                 status_code=401,
                 detail="Invalid or expired token"
             )
-        return UUID(user_response.user.id)
+        user_id = UUID(user_response.user.id)
+        expires_at = get_token_expiry(token)
+        if expires_at is not None:
+            token_cache.put(token, user_id, expires_at)
+        return user_id
     except HTTPException:
         raise
     except Exception as e:
@@ -58,59 +98,98 @@ async def get_user_id_from_token(authorization: str = Header(...)) -> UUID:
         )
 
 
-@router.post("/upload", response_model=DocumentResponse)
+# The body is parsed by hand (see upload_document), so describe it for the docs
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"]
+            }
+        }
+    }
+}
+
+
+@router.post("/upload", response_model=DocumentResponse, openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
 async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+    request: Request,
     user_id: UUID = Depends(get_user_id_from_token)
 ):
     """
     Upload a document to the server.
     
+    The multipart body is streamed straight to the local spool rather than
+    through UploadFile, which would only be handed over once the whole body
+    had been received and buffered to a temporary file.
+    
     Args:
-        file: The file to upload (PDF or PPTX).
+        request: The request; its body is a multipart form with a `file` field (PDF or PPTX).
         user_id: The authenticated user's ID (from token).
         
     Returns:
         DocumentResponse with the uploaded document's details.
         
     Raises:
-        HTTPException: 400 if file type or size is invalid.
+        HTTPException: 400 if the form, file type or size is invalid.
         HTTPException: 500 if upload fails.
     """
-    # Validate file extension
-    file_ext = get_file_extension(file.filename or "")
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Only {', '.join(ALLOWED_EXTENSIONS)} files are allowed."
-        )
+    size_error = HTTPException(
+        status_code=400,
+        detail=f"File size exceeds {MAX_FILE_SIZE_MB}MB limit."
+    )
     
-    # Read file bytes
-    file_bytes = await file.read()
-    file_size = len(file_bytes)
+    # Reject oversized bodies before reading any of them
+    try:
+        check_content_length(request.headers.get("content-length"), MAX_FILE_SIZE_BYTES)
+    except UploadTooLargeError:
+        raise size_error
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def validate_filename(filename: str) -> None:
+        if get_file_extension(filename) not in ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type. Only {', '.join(ALLOWED_EXTENSIONS)} files are allowed."
+            )
     
-    # Validate file size
-    if file_size > MAX_FILE_SIZE_BYTES:
+    # Stream the upload to the local spool, enforcing the size limit as it arrives
+    document_id = uuid4()
+    try:
+        upload = await spool_upload(
+            str(document_id),
+            request.headers.get("content-type"),
+            request.stream(),
+            MAX_FILE_SIZE_BYTES,
+            validate_filename=validate_filename
+        )
+    except HTTPException:
+        raise
+    except UploadTooLargeError:
+        raise size_error
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
         raise HTTPException(
-            status_code=400,
-            detail=f"File size exceeds {MAX_FILE_SIZE_MB}MB limit."
+            status_code=500,
+            detail=f"Failed to receive file: {str(e)}"
         )
     
-    # Determine file type
-    file_type = "pdf" if file_ext == ".pdf" else "pptx"
-    
-    # Generate unique file path
-    document_id = uuid4()
-    file_path = f"{user_id}/{document_id}/{file.filename}"
+    spool_path = upload.spool_path
+    file_type = "pdf" if get_file_extension(upload.filename) == ".pdf" else "pptx"
+    file_path = f"{user_id}/{document_id}/{upload.filename}"
     
     try:
-        # Upload to Supabase Storage
-        storage_response = supabase_admin.storage.from_("documents").upload(
-            path=file_path,
-            file=file_bytes,
-            file_options={"content-type": file.content_type or "application/octet-stream"}
-        )
+        # Upload to Supabase Storage, streaming from the spool
+        with open(spool_path, "rb") as spooled_file:
+            storage_response = await async_supabase_admin.storage.from_("documents").upload(
+                path=file_path,
+                file=spooled_file,
+                file_options={"content-type": upload.content_type or "application/octet-stream"}
+            )
         
         if hasattr(storage_response, 'error') and storage_response.error:
             raise HTTPException(
@@ -118,8 +197,10 @@ async def upload_document(
                 detail=f"Storage upload failed: {storage_response.error}"
             )
     except HTTPException:
+        await run_sync(remove_spool, spool_path)
         raise
     except Exception as e:
+        await run_sync(remove_spool, spool_path)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to upload file to storage: {str(e)}"
@@ -130,14 +211,15 @@ async def upload_document(
         document_data = {
             "id": str(document_id),
             "user_id": str(user_id),
-            "filename": file.filename,
+            "filename": upload.filename,
             "file_path": file_path,
             "file_type": file_type,
-            "file_size": file_size,
+            "file_size": upload.size,
+            "content_hash": upload.sha256,
             "status": "pending"
         }
         
-        db_response = supabase_admin.table("documents").insert(document_data).execute()
+        db_response = await async_supabase_admin.table("documents").insert(document_data).execute()
         
         if not db_response.data:
             raise HTTPException(
@@ -147,8 +229,12 @@ async def upload_document(
         
         created_document = db_response.data[0]
         
-        # Trigger async document processing
-        background_tasks.add_task(process_document, str(document_id))
+        # Queue document processing for the ingestion worker, which reads the spool
+        await run_sync(
+            job_queue.enqueue,
+            PROCESS_DOCUMENT,
+            {"document_id": str(document_id), "spool_path": spool_path}
+        )
         
         return DocumentResponse(
             id=UUID(created_document["id"]),
@@ -159,8 +245,10 @@ async def upload_document(
             created_at=created_document["created_at"]
         )
     except HTTPException:
+        await run_sync(remove_spool, spool_path)
         raise
     except Exception as e:
+        await run_sync(remove_spool, spool_path)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create document record: {str(e)}"
@@ -185,7 +273,7 @@ async def list_documents(
     """
     try:
         response = (
-            supabase_admin.table("documents")
+            await async_supabase_admin.table("documents")
             .select("*")
             .eq("user_id", str(user_id))
             .order("created_at", desc=True)
@@ -238,7 +326,7 @@ async def get_document(
     """
     try:
         response = (
-            supabase_admin.table("documents")
+            await async_supabase_admin.table("documents")
             .select("*")
             .eq("id", str(document_id))
             .eq("user_id", str(user_id))
@@ -270,6 +358,79 @@ async def get_document(
         )
 
 
+@router.post("/{document_id}/reprocess", response_model=DocumentResponse)
+async def reprocess_document(
+    document_id: UUID,
+    user_id: UUID = Depends(get_user_id_from_token)
+):
+    """
+    Queue a failed document for processing again.
+    
+    Processing resumes from the last checkpointed stage, so completed
+    extraction and embedding work is not repeated.
+    
+    Args:
+        document_id: The ID of the document to reprocess.
+        user_id: The authenticated user's ID (from token).
+        
+    Returns:
+        DocumentResponse with the document's details.
+        
+    Raises:
+        HTTPException: 404 if document not found or doesn't belong to user.
+        HTTPException: 400 if document has not failed.
+        HTTPException: 500 if queueing fails.
+    """
+    try:
+        response = (
+            await async_supabase_admin.table("documents")
+            .select("*")
+            .eq("id", str(document_id))
+            .eq("user_id", str(user_id))
+            .execute()
+        )
+        
+        if not response.data or len(response.data) == 0:
+            raise HTTPException(
+                status_code=404,
+                detail="Document not found"
+            )
+        
+        doc = response.data[0]
+        
+        if doc["status"] != "failed":
+            raise HTTPException(
+                status_code=400,
+                detail=f"Only failed documents can be reprocessed. Current status: {doc['status']}"
+            )
+        
+        await async_supabase_admin.table("documents").update({
+            "status": "pending",
+            "error_message": None
+        }).eq("id", str(document_id)).execute()
+        # A failed attempt may still have a retry waiting out its backoff; run that
+        # one now rather than queueing a second job for the same document
+        await run_sync(
+            job_queue.enqueue_unique, PROCESS_DOCUMENT, {"document_id": str(document_id)}, "document_id"
+        )
+        
+        return DocumentResponse(
+            id=UUID(doc["id"]),
+            filename=doc["filename"],
+            file_type=doc["file_type"],
+            file_size=doc["file_size"],
+            status="pending",
+            created_at=doc["created_at"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to reprocess document: {str(e)}"
+        )
+
+
 @router.post("/{document_id}/search", response_model=SearchResponse)
 async def search_document(
     document_id: UUID,
@@ -295,7 +456,7 @@ async def search_document(
     try:
         # Verify document exists and belongs to user
         response = (
-            supabase_admin.table("documents")
+            await async_supabase_admin.table("documents")
             .select("*")
             .eq("id", str(document_id))
             .eq("user_id", str(user_id))
@@ -318,10 +479,13 @@ async def search_document(
             )
         
         # Retrieve relevant chunks
-        results = retrieve_relevant_chunks(
+        results = await retrieve_relevant_chunks(
             query=search_request.query,
             document_id=str(document_id),
-            top_k=search_request.top_k
+            top_k=search_request.top_k,
+            page_start=search_request.page_start,
+            page_end=search_request.page_end,
+            user_id=str(user_id)
         )
         
         # Convert to ChunkResult models
@@ -329,7 +493,9 @@ async def search_document(
             ChunkResult(
                 content=result["content"],
                 chunk_index=result["chunk_index"],
-                score=result["score"]
+                score=result["score"],
+                page_start=result.get("page_start"),
+                page_end=result.get("page_end")
             )
             for result in results
         ]
@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.resources import resources
 
 router = APIRouter()
 
@@ -7,3 +10,14 @@ router = APIRouter()
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "autocoach-api"}
+
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until all startup checks have passed."""
+    if not resources.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "pending": resources.pending_checks}
+        )
+    return {"status": "ready", "service": "autocoach-api"}
@@ -7,7 +7,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from app.models.quiz import QuizGenerateRequest, QuizGenerateResponse, QuestionSchema
 from app.services.quiz_generator import generate_quiz_questions
 from app.api.routes.documents import get_user_id_from_token
-from app.core.supabase import supabase_admin
+from app.core.supabase import async_supabase_admin
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +38,7 @@ async def generate_quiz(
     try:
         # Verify document exists and belongs to user
         response = (
-            supabase_admin.table("documents")
+            await async_supabase_admin.table("documents")
             .select("*")
             .eq("id", request.document_id)
             .eq("user_id", str(user_id))
@@ -64,11 +64,14 @@ async def generate_quiz(
                    f"({request.num_questions} questions, {request.difficulty} difficulty)")
 
         # Generate quiz questions
-        questions_data = generate_quiz_questions(
+        questions_data = await generate_quiz_questions(
             document_id=request.document_id,
             num_questions=request.num_questions,
             difficulty=request.difficulty,
-            question_types=request.question_types
+            question_types=request.question_types,
+            page_start=request.page_start,
+            page_end=request.page_end,
+            user_id=str(user_id)
         )
 
         if not questions_data:
@@ -20,7 +20,7 @@ from app.services.session_manager import (
     get_current_question
 )
 from app.api.routes.documents import get_user_id_from_token
-from app.core.supabase import supabase_admin
+from app.core.supabase import async_supabase_admin
 
 logger = logging.getLogger(__name__)
 
@@ -48,7 +48,7 @@ async def create_quiz_session(
     try:
         # Verify document exists and belongs to user
         doc_response = (
-            supabase_admin.table("documents")
+            await async_supabase_admin.table("documents")
             .select("*")
             .eq("id", request.document_id)
             .eq("user_id", str(user_id))
@@ -71,12 +71,14 @@ async def create_quiz_session(
             )
 
         # Create session
-        session_data = create_session(
+        session_data = await create_session(
             user_id=str(user_id),
             document_id=request.document_id,
             num_questions=request.num_questions,
             difficulty=request.difficulty,
-            question_types=request.question_types
+            question_types=request.question_types,
+            page_start=request.page_start,
+            page_end=request.page_end
         )
 
         return session_data
@@ -110,7 +112,7 @@ async def get_session_status(
         HTTPException: 404 if session not found.
     """
     try:
-        session = get_session(session_id, str(user_id))
+        session = await get_session(session_id, str(user_id))
 
         if not session:
             raise HTTPException(
@@ -165,7 +167,7 @@ async def get_current_quiz_question(
     try:
         # Verify session exists and belongs to user
         session_response = (
-            supabase_admin.table("quiz_sessions")
+            await async_supabase_admin.table("quiz_sessions")
             .select("*")
             .eq("id", session_id)
             .eq("user_id", str(user_id))
@@ -186,7 +188,7 @@ async def get_current_quiz_question(
                 detail=f"Session is not active (status: {session['status']})"
             )
 
-        question = get_current_question(session_id, str(user_id))
+        question = await get_current_question(session_id, str(user_id))
 
         if not question:
             raise HTTPException(
@@ -237,7 +239,7 @@ async def submit_quiz_answer(
         HTTPException: 404 if session/question not found, 400 if already answered.
     """
     try:
-        result = submit_answer(
+        result = await submit_answer(
             session_id=session_id,
             user_id=str(user_id),
             question_id=question_id,
@@ -10,15 +10,76 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_publishable_key: str
     supabase_secret_key: str
+    # Legacy HS256 JWT secret; leave empty to verify with the project's JWKS
+    supabase_jwt_secret: str = ""
+    supabase_jwks_cache_seconds: int = 600
+    # Minimum seconds between JWKS fetches triggered by unknown key ids or fetch failures
+    supabase_jwks_refetch_seconds: int = 30
+    token_cache_size: int = 10000
+    token_cache_seconds: int = 300
 
     # Qdrant
     qdrant_url: str
     qdrant_api_key: str
+    # Collection (or alias) that documents are stored in and searched
+    qdrant_collection: str = "documents"
+    # Vector quantization: "" (none), "scalar" (int8) or "binary". When enabled,
+    # quantized vectors stay in RAM and the originals move to disk
+    qdrant_quantization: str = ""
+    # Re-rank quantized candidates with the original vectors, fetching
+    # top_k * oversampling candidates first
+    qdrant_search_rescore: bool = True
+    qdrant_search_oversampling: float = 2.0
+    # HNSW links per point within each user's graph; the collection-wide graph is disabled (m=0)
+    qdrant_tenant_payload_m: int = 16
+    # Talk to Qdrant over gRPC (binary-encoded vectors) instead of REST/JSON
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    # Points per upsert request, and upsert requests in flight per process
+    qdrant_upsert_batch_size: int = 256
+    qdrant_upsert_parallelism: int = 4
 
     # AI APIs
     kimi_api_key: str
     openai_api_key: str = ""
 
+    # Concurrency
+    sync_offload_threads: int = 16
+
+    # Extraction: max sandboxed children per node, and max page ranges per PDF in flight
+    pdf_extraction_processes: int = 4
+    pdf_extraction_parallelism: int = 4
+    # Limits for extracting one document: wall clock, per page, and memory per child
+    extraction_timeout_seconds: int = 300
+    extraction_page_seconds: float = 10.0
+    extraction_memory_limit_mb: int = 1024
+
+    # Memory budget for the in-flight data of one document's ingestion pipeline
+    ingestion_memory_budget_mb: int = 16
+
+    # Embedding size; text-embedding-3 models can be shortened (e.g. 256 or 512)
+    embedding_dimensions: int = 1536
+    # Embedding requests: in flight per process, approximate tokens per request, attempts per batch
+    embedding_concurrency: int = 4
+    embedding_batch_tokens: int = 50000
+    embedding_max_attempts: int = 6
+
+    # Persistent embedding cache
+    embedding_cache_path: str = "embeddings.sqlite3"
+    embedding_cache_max_mb: int = 512
+
+    # Ingestion job queue and worker
+    job_queue_path: str = "jobs.sqlite3"
+    job_lease_seconds: int = 300
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: int = 30
+    worker_concurrency: int = 2
+    worker_poll_seconds: float = 1.0
+    # Where uploads are spooled for the worker; empty uses the system temp dir
+    upload_spool_dir: str = ""
+    # Where ingestion stage checkpoints are kept; empty uses the system temp dir
+    ingestion_checkpoint_dir: str = ""
+
     # URLs
     backend_url: str = "http://localhost:8000"
     frontend_url: str = "http://localhost:3000"
@@ -0,0 +1,211 @@
+"""Local verification of Supabase access tokens."""
+
+import hashlib
+import logging
+import threading
+import time
+from uuid import UUID
+
+import jwt
+from cachetools import TLRUCache
+from jwt import PyJWK, PyJWKClient
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Supabase issues user access tokens with this audience
+JWT_AUDIENCE = "authenticated"
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+# Fetches the project's JWKS; caching and refetch limits are handled by SigningKeyCache
+jwks_client = PyJWKClient(
+    f"{settings.supabase_url}/auth/v1/.well-known/jwks.json",
+    cache_jwk_set=False,
+)
+
+
+class SigningKeyCache:
+    """
+    Signing keys from the project's JWKS, keyed by key id.
+
+    The key set is refetched when it is older than `ttl_seconds` or a token
+    references an unknown key id, so key rotation is picked up automatically.
+    Fetches (including failed ones) happen at most once per
+    `refetch_interval_seconds`, so tokens with made-up key ids or an
+    unreachable auth server can't trigger a fetch on every request.
+    Fetching blocks; call `get` from a worker thread.
+    """
+
+    def __init__(self, client: PyJWKClient, ttl_seconds: int, refetch_interval_seconds: int):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.refetch_interval_seconds = refetch_interval_seconds
+        self.fetches = 0
+        self._keys: dict[str, PyJWK] = {}
+        self._fetched_at = float("-inf")
+        self._attempted_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self, kid: str) -> PyJWK | None:
+        """Return the signing key for a key id, or None if it is unknown or unavailable."""
+        with self._lock:
+            now = time.monotonic()
+            key = self._keys.get(kid)
+            if key is not None and now - self._fetched_at < self.ttl_seconds:
+                return key
+            if now - self._attempted_at < self.refetch_interval_seconds:
+                # Fetched too recently; a stale key is still better than a remote check
+                return key
+
+            self._attempted_at = now
+            self.fetches += 1
+            try:
+                signing_keys = self.client.get_signing_keys(refresh=True)
+            except jwt.PyJWKClientError as e:
+                logger.warning(f"Failed to fetch JWKS: {e}")
+                return key
+            self._keys = {signing_key.key_id: signing_key for signing_key in signing_keys}
+            self._fetched_at = now
+            return self._keys.get(kid)
+
+
+signing_key_cache = SigningKeyCache(
+    jwks_client,
+    ttl_seconds=settings.supabase_jwks_cache_seconds,
+    refetch_interval_seconds=settings.supabase_jwks_refetch_seconds,
+)
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified tokens to user IDs.
+
+    Entries are keyed by the SHA-256 of the token and expire after the
+    configured TTL or at the token's own `exp`, whichever comes first.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Values are (user_id, ttl) so each entry carries its own lifetime
+        self._cache = TLRUCache(maxsize=maxsize, ttu=lambda _key, value, now: now + value[1])
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> UUID | None:
+        """Return the cached user ID for a token, or None on a miss."""
+        with self._lock:
+            entry = self._cache.get(self._key(token))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user_id: UUID, expires_at: float) -> None:
+        """Cache a verified token until min(now + TTL, expires_at)."""
+        ttl = min(self.ttl_seconds, expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._cache[self._key(token)] = (user_id, ttl)
+
+    def evict(self, token: str) -> None:
+        """Remove a token from the cache, e.g. after sign-out."""
+        with self._lock:
+            self._cache.pop(self._key(token), None)
+
+    def clear(self) -> None:
+        """Remove all cached tokens and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return cache size and hit/miss counters."""
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_cache = TokenCache(
+    maxsize=settings.token_cache_size,
+    ttl_seconds=settings.token_cache_seconds,
+)
+
+
+def get_token_expiry(token: str) -> float | None:
+    """
+    Read the `exp` claim of a token without verifying it.
+
+    Only use this for tokens that were already verified by other means.
+
+    Args:
+        token: The raw bearer token.
+
+    Returns:
+        The expiry as a Unix timestamp, or None if it cannot be read.
+    """
+    try:
+        claims = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    exp = claims.get("exp")
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def verify_token_locally(token: str) -> dict | None:
+    """
+    Verify a Supabase access token without calling the auth server.
+
+    HS256 tokens are checked against the configured JWT secret and
+    asymmetric tokens against the project's cached JWKS. Looking up a key
+    may fetch the JWKS, so call this from a worker thread (run_sync).
+
+    Args:
+        token: The raw bearer token.
+
+    Returns:
+        The verified token claims, or None if the token cannot be verified
+        locally (no secret configured, signing key unavailable) and should be
+        checked remotely instead.
+
+    Raises:
+        jwt.InvalidTokenError: If the token is malformed, expired or has an
+            invalid signature.
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+
+    if algorithm == "HS256":
+        if not settings.supabase_jwt_secret:
+            return None
+        key = settings.supabase_jwt_secret
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        signing_key = signing_key_cache.get(header.get("kid"))
+        if signing_key is None:
+            logger.warning(f"Signing key {header.get('kid')} unavailable for local token verification")
+            return None
+        key = signing_key.key
+    else:
+        return None
+
+    return jwt.decode(
+        token,
+        key=key,
+        algorithms=[algorithm],
+        audience=JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]},
+    )
@@ -0,0 +1,31 @@
+"""Bounded thread-pool offload for blocking work called from async code."""
+
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from anyio import CapacityLimiter, to_thread
+
+from app.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+# Caps how many blocking calls (CPU-bound parsing, sync SDK calls) run at once
+# so they can't exhaust the worker's default thread pool
+sync_limiter = CapacityLimiter(settings.sync_offload_threads)
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking function in the bounded thread pool.
+
+    Args:
+        func: The blocking function to call.
+        *args: Positional arguments for the function.
+        **kwargs: Keyword arguments for the function.
+
+    Returns:
+        The function's return value.
+    """
+    return await to_thread.run_sync(partial(func, *args, **kwargs), limiter=sync_limiter)
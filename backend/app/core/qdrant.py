@@ -1,74 +1,285 @@
 """Qdrant vector database client and utilities."""
 
 import logging
-from uuid import uuid4
+import math
+import time
+from uuid import NAMESPACE_URL, uuid5
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+import anyio
+import numpy as np
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Batch, Distance, VectorParams, VectorParamsDiff, PointStruct, Filter, FieldCondition, MatchValue, FilterSelector,
+    Range, ScalarQuantization, ScalarQuantizationConfig, ScalarType, BinaryQuantization,
+    BinaryQuantizationConfig, SearchParams, QuantizationSearchParams, HnswConfigDiff, KeywordIndexParams,
+    SetPayload, SetPayloadOperation
+)
 
 from app.config import get_settings
+from app.core.resources import resources
 
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-# Initialize Qdrant client
-qdrant_client = QdrantClient(
-    url=settings.qdrant_url,
-    api_key=settings.qdrant_api_key,
+# Qdrant client (used for collection management, from worker threads), created
+# on first use. Its version check is a blocking request to Qdrant
+qdrant_client: QdrantClient = resources.register(
+    "qdrant",
+    lambda: QdrantClient(
+        url=settings.qdrant_url,
+        api_key=settings.qdrant_api_key,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        grpc_port=settings.qdrant_grpc_port,
+    ),
+    close=lambda client: client.close(),
+    blocking=True
+)
+
+# Async Qdrant client (used for upserts and searches from async code). Its
+# version check is a blocking request, so it is left to the sync client
+async_qdrant_client: AsyncQdrantClient = resources.register(
+    "async_qdrant",
+    lambda: AsyncQdrantClient(
+        url=settings.qdrant_url,
+        api_key=settings.qdrant_api_key,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        grpc_port=settings.qdrant_grpc_port,
+        check_compatibility=False,
+    ),
+    close=lambda client: client.close()
 )
 
+# Upsert requests in flight across this process
+_upsert_slots = anyio.Semaphore(settings.qdrant_upsert_parallelism)
+
+# Vector size, whether it is partitioned by tenant, and lookup time of each
+# collection (or alias) used from async code
+_collection_configs: dict[str, tuple[int, bool, float]] = {}
+
 # Default collection settings
-DEFAULT_COLLECTION_NAME = "documents"
-VECTOR_SIZE = 1536  # OpenAI text-embedding-3-small dimensions
+DEFAULT_COLLECTION_NAME = settings.qdrant_collection
+VECTOR_SIZE = settings.embedding_dimensions
+# Seconds a collection's vector size and partitioning are trusted before they are looked up again
+VECTOR_SIZE_TTL_SECONDS = 30
+# Pages of the duplicate chunks dropped in favour of a chunk (see dedup.py)
+DUPLICATE_PAGES_FIELD = "metadata.duplicate_pages"
+# Integer payload fields indexed for page-scoped search
+PAGE_RANGE_FIELDS = ("metadata.page_start", "metadata.page_end", DUPLICATE_PAGES_FIELD)
+# Payload field that partitions the collection by tenant
+TENANT_FIELD = "user_id"
+
+
+def get_point_id(document_id: str, chunk_index: int) -> str:
+    """
+    Derive a deterministic point ID for a document chunk.
+
+    Re-upserting the same chunk overwrites its point instead of creating a
+    duplicate, so partially completed writes can be replayed safely.
+    """
+    return str(uuid5(NAMESPACE_URL, f"autocoach:{document_id}:{chunk_index}"))
 
 
-def ensure_collection_exists(collection_name: str = DEFAULT_COLLECTION_NAME) -> None:
+def get_quantization_config() -> ScalarQuantization | BinaryQuantization | None:
+    """
+    Build the configured quantization, keeping quantized vectors in RAM.
+
+    Raises:
+        ValueError: If QDRANT_QUANTIZATION is not "", "scalar" or "binary".
+    """
+    if not settings.qdrant_quantization:
+        return None
+    if settings.qdrant_quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if settings.qdrant_quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"Unknown quantization: {settings.qdrant_quantization}")
+
+
+def apply_quantization(collection_name: str = DEFAULT_COLLECTION_NAME) -> None:
+    """
+    Bring an existing collection in line with the configured quantization.
+
+    Qdrant quantizes the stored vectors in the background; searches keep
+    working meanwhile. Turning quantization off is left to an operator, since
+    it needs the originals back in RAM.
+
+    Args:
+        collection_name: Name of the collection to update.
+    """
+    quantization_config = get_quantization_config()
+    if quantization_config is None:
+        return
+
+    current = qdrant_client.get_collection(collection_name).config.quantization_config
+    if type(current) is type(quantization_config):
+        return
+
+    qdrant_client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": VectorParamsDiff(on_disk=True)},
+        quantization_config=quantization_config
+    )
+    logger.info(f"Enabled {settings.qdrant_quantization} quantization on '{collection_name}'")
+
+
+def get_tenant_hnsw_config() -> HnswConfigDiff:
+    """
+    Build the HNSW config for a collection partitioned by TENANT_FIELD.
+
+    With m=0 Qdrant builds no global graph, only one graph per tenant (with
+    payload_m links), so a search filtered by user_id walks just that user's
+    points instead of skipping over everyone else's.
+    """
+    return HnswConfigDiff(m=0, payload_m=settings.qdrant_tenant_payload_m)
+
+
+def ensure_collection_exists(
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    vector_size: int = VECTOR_SIZE
+) -> None:
     """
     Check if a collection exists in Qdrant, create it if not.
 
+    An existing collection (or alias) whose vector size differs from
+    `vector_size` is left untouched: queries and new documents are embedded
+    at the size of the collection they go to (see get_vector_size), which
+    the reindex command changes.
+
     Args:
         collection_name: Name of the collection to check/create.
+        vector_size: Dimensions of the vectors stored in the collection.
     """
     try:
-        # Get list of existing collections
-        collections = qdrant_client.get_collections()
-        collection_names = [c.name for c in collections.collections]
-        
-        if collection_name in collection_names:
-            logger.info(f"Collection '{collection_name}' already exists")
+        if qdrant_client.collection_exists(collection_name):
+            collection_info = qdrant_client.get_collection(collection_name)
+            existing_size = collection_info.config.params.vectors.size
+            if existing_size != vector_size:
+                logger.warning(
+                    f"Collection '{collection_name}' has vector size {existing_size} but {vector_size} is "
+                    f"configured; using {existing_size}. Run `python -m app.reindex --dimensions {vector_size}` "
+                    f"to move it to {vector_size}"
+                )
+            else:
+                logger.info(f"Collection '{collection_name}' already exists")
+            if collection_info.config.hnsw_config.m != 0:
+                logger.warning(
+                    f"Collection '{collection_name}' is not partitioned by {TENANT_FIELD}; searches "
+                    f"filter by document only until `python -m app.migrate_tenants` is run"
+                )
+            # Collections created before an index was introduced get it here
+            ensure_payload_indexes(collection_name, set(collection_info.payload_schema))
+            apply_quantization(collection_name)
             return
         
-        # Create collection
+        # Create collection; with quantization, originals live on disk and quantized vectors in RAM.
+        # HNSW graphs are built per tenant rather than across the whole collection
+        quantization_config = get_quantization_config()
         qdrant_client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(
-                size=VECTOR_SIZE,
-                distance=Distance.COSINE
-            )
+                size=vector_size,
+                distance=Distance.COSINE,
+                on_disk=quantization_config is not None
+            ),
+            hnsw_config=get_tenant_hnsw_config(),
+            quantization_config=quantization_config
         )
-        logger.info(f"Created collection '{collection_name}' with vector size {VECTOR_SIZE}")
+        logger.info(f"Created collection '{collection_name}' with vector size {vector_size}")
         
-        # Create payload index for document_id to enable filtering
-        try:
-            qdrant_client.create_payload_index(
-                collection_name=collection_name,
-                field_name="document_id",
-                field_schema="keyword"
-            )
-            logger.info(f"Created payload index for document_id in '{collection_name}'")
-        except Exception as e:
-            # Index might already exist, which is fine
-            logger.info(f"Payload index creation note: {e}")
+        create_tenant_index(collection_name)
+        ensure_payload_indexes(collection_name)
     except Exception as e:
         logger.error(f"Failed to ensure collection exists: {e}")
         raise
 
 
+def ensure_payload_indexes(
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    indexed_fields: set[str] = frozenset()
+) -> None:
+    """
+    Create the document_id and page range payload indexes a collection is missing.
+
+    Args:
+        collection_name: Name of the collection to create indexes on.
+        indexed_fields: Fields the collection already has indexes for.
+    """
+    if "document_id" not in indexed_fields:
+        create_document_id_index(collection_name)
+    if not indexed_fields.issuperset(PAGE_RANGE_FIELDS):
+        create_page_range_index(collection_name)
+
+
+async def _get_collection_config(collection_name: str, refresh: bool = False) -> tuple[int, bool]:
+    """
+    Return a collection's vector size and whether it is partitioned by tenant.
+
+    Read from Qdrant rather than from settings, so that running processes
+    follow a reindex or tenant migration. Cached for VECTOR_SIZE_TTL_SECONDS
+    unless `refresh` is set; if Qdrant cannot be reached, the last known
+    values (else the configured size, unpartitioned) are returned.
+    """
+    cached = _collection_configs.get(collection_name)
+    now = time.monotonic()
+    if cached is not None and not refresh and now - cached[2] < VECTOR_SIZE_TTL_SECONDS:
+        return cached[0], cached[1]
+    try:
+        collection_info = await async_qdrant_client.get_collection(collection_name)
+    except Exception as e:
+        logger.warning(f"Failed to read the config of '{collection_name}': {e}")
+        return (cached[0], cached[1]) if cached is not None else (VECTOR_SIZE, False)
+    size = collection_info.config.params.vectors.size
+    # migrate_tenants switches to per-tenant graphs only once every point has a user_id
+    # (unless told to leave orphaned points behind)
+    partitioned = collection_info.config.hnsw_config.m == 0
+    if cached is not None and cached[0] != size:
+        logger.info(f"Collection '{collection_name}' now has vector size {size}")
+    if cached is not None and partitioned and not cached[1]:
+        logger.info(f"Collection '{collection_name}' is now partitioned by {TENANT_FIELD}")
+    _collection_configs[collection_name] = (size, partitioned, now)
+    return size, partitioned
+
+
+async def get_vector_size(collection_name: str = DEFAULT_COLLECTION_NAME, refresh: bool = False) -> int:
+    """
+    Return the vector size of a collection (or alias) as it is now.
+
+    Read from Qdrant rather than from settings, so that running processes
+    follow a reindex that switches the alias to a new size. The size is
+    cached for VECTOR_SIZE_TTL_SECONDS; pass `refresh` after a request was
+    rejected to look it up again.
+
+    Args:
+        collection_name: Name of the collection or alias.
+        refresh: Whether to bypass the cache.
+
+    Returns:
+        The vector size, or the last known (else the configured) size if
+        Qdrant cannot be reached.
+    """
+    size, _ = await _get_collection_config(collection_name, refresh)
+    return size
+
+
+async def is_tenant_partitioned(collection_name: str = DEFAULT_COLLECTION_NAME) -> bool:
+    """
+    Return whether a collection (or alias) has been partitioned by user.
+
+    Points stored before `python -m app.migrate_tenants` lack user_id, so
+    filtering on it would hide them until the migration has run.
+    """
+    _, partitioned = await _get_collection_config(collection_name)
+    return partitioned
+
+
 def create_document_id_index(collection_name: str = DEFAULT_COLLECTION_NAME) -> None:
     """
     Create payload index for document_id field.
-    Call this once for existing collections.
+    Existing collections get it from ensure_collection_exists at startup.
 
     Args:
         collection_name: Name of the collection to create index on.
@@ -84,70 +295,331 @@ def create_document_id_index(collection_name: str = DEFAULT_COLLECTION_NAME) ->
         logger.info(f"Index creation note: {e}")
 
 
-def store_vectors(
+def create_tenant_index(collection_name: str = DEFAULT_COLLECTION_NAME) -> None:
+    """
+    Create the tenant keyword index for the user_id field.
+    Call this once for existing collections.
+
+    Marking the index as the tenant lets Qdrant store each user's points
+    together and build a separate HNSW graph for them.
+
+    Args:
+        collection_name: Name of the collection to create index on.
+    """
+    try:
+        qdrant_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=TENANT_FIELD,
+            field_schema=KeywordIndexParams(type="keyword", is_tenant=True)
+        )
+        logger.info(f"Created {TENANT_FIELD} tenant index on '{collection_name}'")
+    except Exception as e:
+        logger.info(f"Index creation note: {e}")
+
+
+def create_page_range_index(collection_name: str = DEFAULT_COLLECTION_NAME) -> None:
+    """
+    Create integer payload indexes for the chunk page range and the pages
+    of its dropped duplicates.
+    Existing collections get them from ensure_collection_exists at startup.
+
+    Args:
+        collection_name: Name of the collection to create indexes on.
+    """
+    for field_name in PAGE_RANGE_FIELDS:
+        try:
+            qdrant_client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema="integer"
+            )
+            logger.info(f"Created {field_name} index on '{collection_name}'")
+        except Exception as e:
+            logger.info(f"Index creation note: {e}")
+
+
+async def store_vectors(
     document_id: str,
+    user_id: str,
     chunks: list[dict],
-    embeddings: list[list[float]],
-    collection_name: str = DEFAULT_COLLECTION_NAME
+    embeddings: np.ndarray,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    wait: bool = True
 ) -> list[str]:
     """
     Store vector embeddings in Qdrant.
 
+    Points are sent in requests of at most `qdrant_upsert_batch_size`, up to
+    `qdrant_upsert_parallelism` requests in flight per process. Each request
+    is a columnar Batch whose vectors are converted from the matrix in one
+    call, rather than a PointStruct per point.
+
     Args:
         document_id: The ID of the document these chunks belong to.
+        user_id: The ID of the user who owns the document (the tenant).
         chunks: List of chunk dictionaries with 'content', 'chunk_index', and 'metadata'.
-        embeddings: List of embedding vectors corresponding to chunks.
+        embeddings: float32 matrix with one row per chunk. Rows are only
+            converted to lists of floats as each request is built.
         collection_name: Name of the Qdrant collection to store in.
+        wait: Whether to return only once the points are searchable. With
+            False, Qdrant acknowledges each request as soon as it is in its
+            write-ahead log and applies it in the background; use
+            wait_for_document_vectors before relying on the points.
 
     Returns:
-        List of point IDs (UUIDs) that were stored.
+        List of point IDs (deterministic UUIDs) that were stored.
+
+    Raises:
+        ValueError: If chunks and embeddings differ in length, since pairing
+            them by position would attach vectors to the wrong chunks.
     """
-    if not chunks or not embeddings:
+    if len(chunks) != len(embeddings):
+        raise ValueError(f"Got {len(chunks)} chunks but {len(embeddings)} embeddings")
+    if not chunks:
         logger.warning("No chunks or embeddings to store")
         return []
     
-    if len(chunks) != len(embeddings):
-        logger.error(f"Mismatch between chunks ({len(chunks)}) and embeddings ({len(embeddings)})")
-        raise ValueError("Chunks and embeddings must have the same length")
-    
     try:
-        point_ids = []
-        points = []
+        point_ids = [get_point_id(document_id, chunk["chunk_index"]) for chunk in chunks]
+        payloads = [
+            {
+                "user_id": user_id,
+                "document_id": document_id,
+                "content": chunk["content"],
+                "chunk_index": chunk["chunk_index"],
+                "metadata": chunk.get("metadata", {})
+            }
+            for chunk in chunks
+        ]
         
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            point_id = str(uuid4())
-            point_ids.append(point_id)
-            
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    "document_id": document_id,
-                    "content": chunk["content"],
-                    "chunk_index": chunk["chunk_index"],
-                    "metadata": chunk.get("metadata", {})
-                }
-            )
-            points.append(point)
+        async def upsert(start: int, end: int) -> None:
+            async with _upsert_slots:
+                await async_qdrant_client.upsert(
+                    collection_name=collection_name,
+                    points=Batch(
+                        ids=point_ids[start:end],
+                        vectors=np.asarray(embeddings[start:end], dtype=np.float32).tolist(),
+                        payloads=payloads[start:end]
+                    ),
+                    wait=wait
+                )
         
-        # Upload points to Qdrant
-        qdrant_client.upsert(
-            collection_name=collection_name,
-            points=points
-        )
+        # Upload points to Qdrant, in requests of equal size
+        batch_size = math.ceil(len(chunks) / math.ceil(len(chunks) / settings.qdrant_upsert_batch_size))
+        async with anyio.create_task_group() as task_group:
+            for i in range(0, len(chunks), batch_size):
+                task_group.start_soon(upsert, i, i + batch_size)
         
-        logger.info(f"Stored {len(points)} vectors in collection '{collection_name}'")
+        logger.info(f"Stored {len(chunks)} vectors in collection '{collection_name}'")
         return point_ids
     except Exception as e:
         logger.error(f"Failed to store vectors: {e}")
         raise
 
 
-def search_vectors(
-    query_embedding: list[float],
+def _document_filter(
     document_id: str,
-    top_k: int = 5,
+    page_start: int | None = None,
+    page_end: int | None = None,
+    user_id: str | None = None
+) -> Filter:
+    """
+    Build a filter matching the points of a document.
+
+    If a page range is given, only chunks that overlap it, or that stand in
+    for a dropped duplicate on one of its pages, match. If a user_id is
+    given, the search is confined to that tenant's HNSW graph.
+    """
+    conditions = [
+        FieldCondition(
+            key="document_id",
+            match=MatchValue(value=document_id)
+        )
+    ]
+    if user_id is not None:
+        conditions.insert(0, FieldCondition(key=TENANT_FIELD, match=MatchValue(value=user_id)))
+    page_conditions = []
+    if page_start is not None:
+        page_conditions.append(FieldCondition(key="metadata.page_end", range=Range(gte=page_start)))
+    if page_end is not None:
+        page_conditions.append(FieldCondition(key="metadata.page_start", range=Range(lte=page_end)))
+    if page_conditions:
+        conditions.append(Filter(should=[
+            Filter(must=page_conditions),
+            FieldCondition(key=DUPLICATE_PAGES_FIELD, range=Range(gte=page_start, lte=page_end))
+        ]))
+    return Filter(must=conditions)
+
+
+async def set_duplicate_pages(
+    document_id: str,
+    pages_by_chunk: dict[int, list[int]],
     collection_name: str = DEFAULT_COLLECTION_NAME
+) -> None:
+    """
+    Record on kept chunks the pages of the duplicates dropped in their favour.
+
+    Sets metadata.duplicate_pages on each chunk's point, in requests of
+    `qdrant_upsert_batch_size` operations, and waits until they are applied.
+
+    Args:
+        document_id: The document the chunks belong to.
+        pages_by_chunk: Sorted page numbers keyed by the kept chunk's chunk_index.
+        collection_name: Name of the Qdrant collection.
+    """
+    operations = [
+        SetPayloadOperation(set_payload=SetPayload(
+            payload={"duplicate_pages": pages},
+            points=[get_point_id(document_id, chunk_index)],
+            key="metadata"
+        ))
+        for chunk_index, pages in pages_by_chunk.items()
+    ]
+    batch_size = settings.qdrant_upsert_batch_size
+    for i in range(0, len(operations), batch_size):
+        await async_qdrant_client.batch_update_points(
+            collection_name=collection_name,
+            update_operations=operations[i:i + batch_size],
+            wait=True
+        )
+
+
+async def wait_for_document_vectors(
+    document_id: str,
+    user_id: str,
+    expected: int,
+    timeout: float = 60,
+    collection_name: str = DEFAULT_COLLECTION_NAME
+) -> int:
+    """
+    Wait until a document's vectors written with wait=False have been applied.
+
+    Args:
+        document_id: The document whose points are counted.
+        user_id: The owner of the document.
+        expected: Number of points the document should have.
+        timeout: Seconds to wait before giving up.
+        collection_name: Name of the Qdrant collection.
+
+    Returns:
+        The number of the document's points found; less than `expected` if
+        the timeout ran out first.
+    """
+    count = 0
+    with anyio.move_on_after(timeout):
+        while True:
+            count = (await async_qdrant_client.count(
+                collection_name=collection_name,
+                count_filter=_document_filter(document_id, user_id=user_id),
+                exact=True
+            )).count
+            if count >= expected:
+                return count
+            await anyio.sleep(0.2)
+    logger.warning(f"Only {count} of {expected} vectors of document {document_id} were applied after {timeout}s")
+    return count
+
+
+async def copy_document_vectors(
+    source_document_id: str,
+    target_document_id: str,
+    target_user_id: str,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    batch_size: int = 256
+) -> dict[str, str]:
+    """
+    Copy all vectors of one document to another document ID.
+
+    Used to reuse the embeddings of an identical upload without calling the
+    embedding API again.
+
+    Args:
+        source_document_id: The document whose points are copied.
+        target_document_id: The document ID to store on the copies.
+        target_user_id: The owner of the target document, stored on the copies.
+        collection_name: Name of the Qdrant collection.
+        batch_size: Number of points to read and write per request.
+
+    Returns:
+        Mapping of source point ID to the new point ID.
+    """
+    try:
+        id_map = {}
+        offset = None
+        
+        while True:
+            points, offset = await async_qdrant_client.scroll(
+                collection_name=collection_name,
+                scroll_filter=_document_filter(source_document_id),
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            
+            if points:
+                copies = []
+                for point in points:
+                    new_id = get_point_id(target_document_id, point.payload["chunk_index"])
+                    id_map[str(point.id)] = new_id
+                    copies.append(PointStruct(
+                        id=new_id,
+                        vector=point.vector,
+                        payload={**point.payload, "user_id": target_user_id, "document_id": target_document_id}
+                    ))
+                await async_qdrant_client.upsert(
+                    collection_name=collection_name,
+                    points=copies
+                )
+            
+            if offset is None:
+                break
+        
+        logger.info(f"Copied {len(id_map)} vectors from document {source_document_id} to {target_document_id}")
+        return id_map
+    except Exception as e:
+        logger.error(f"Failed to copy vectors: {e}")
+        raise
+
+
+async def delete_document_vectors(
+    document_id: str,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    from_chunk_index: int | None = None
+) -> None:
+    """
+    Delete all vectors belonging to a document.
+
+    Args:
+        document_id: The document whose points are deleted.
+        collection_name: Name of the Qdrant collection.
+        from_chunk_index: Only delete chunks at or past this index, e.g.
+            points left over from an attempt that produced more chunks.
+    """
+    points_filter = _document_filter(document_id)
+    if from_chunk_index is not None:
+        points_filter.must.append(FieldCondition(key="chunk_index", range=Range(gte=from_chunk_index)))
+    try:
+        await async_qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=FilterSelector(filter=points_filter)
+        )
+        logger.info(f"Deleted vectors for document {document_id}")
+    except Exception as e:
+        logger.error(f"Failed to delete vectors: {e}")
+        raise
+
+
+async def search_vectors(
+    query_embedding: np.ndarray | list[float],
+    document_id: str,
+    top_k: int = 5,
+    page_start: int | None = None,
+    page_end: int | None = None,
+    user_id: str | None = None,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    rescore: bool | None = None,
+    oversampling: float | None = None
 ) -> list[dict]:
     """
     Search for similar vectors in Qdrant filtered by document_id.
@@ -156,26 +628,45 @@ def search_vectors(
         query_embedding: The embedding vector to search for.
         document_id: The document ID to filter by.
         top_k: Number of top results to return.
+        page_start: Only return chunks ending on or after this page/slide.
+        page_end: Only return chunks starting on or before this page/slide.
+        user_id: The owner of the document. Routes the search to that
+            tenant's HNSW graph; without it, or while the collection is not
+            partitioned by user yet, the document filter is applied to the
+            collection as a whole.
         collection_name: Name of the Qdrant collection to search.
+        rescore: Re-rank quantized candidates using the original vectors.
+            Defaults to QDRANT_SEARCH_RESCORE. Ignored without quantization.
+        oversampling: Fetch top_k * oversampling quantized candidates before
+            rescoring. Defaults to QDRANT_SEARCH_OVERSAMPLING.
 
     Returns:
         List of dictionaries containing chunk information:
-        [{"content": str, "chunk_index": int, "score": float}]
+        [{"content": str, "chunk_index": int, "score": float,
+          "page_start": int | None, "page_end": int | None}]
+
+    Raises:
+        ValueError: If the query embedding does not have the collection's vector size.
     """
+    vector_size = await get_vector_size(collection_name)
+    if len(query_embedding) != vector_size:
+        raise ValueError(f"Query embedding has {len(query_embedding)} dimensions, expected {vector_size}")
+    if user_id is not None and not await is_tenant_partitioned(collection_name):
+        user_id = None
+
     try:
         # Search in Qdrant using query_points (new API)
-        results_wrapper = qdrant_client.query_points(
+        results_wrapper = await async_qdrant_client.query_points(
             collection_name=collection_name,
             query=query_embedding,
-            query_filter=Filter(
-                must=[
-                    FieldCondition(
-                        key="document_id",
-                        match=MatchValue(value=document_id)
-                    )
-                ]
-            ),
-            limit=top_k
+            query_filter=_document_filter(document_id, page_start, page_end, user_id),
+            limit=top_k,
+            search_params=SearchParams(
+                quantization=QuantizationSearchParams(
+                    rescore=settings.qdrant_search_rescore if rescore is None else rescore,
+                    oversampling=settings.qdrant_search_oversampling if oversampling is None else oversampling
+                )
+            )
         )
         
         # Format results - access via results_wrapper.points
@@ -183,7 +674,9 @@ def search_vectors(
             {
                 "content": point.payload.get("content", ""),
                 "chunk_index": point.payload.get("chunk_index", 0),
-                "score": point.score
+                "score": point.score,
+                "page_start": (point.payload.get("metadata") or {}).get("page_start"),
+                "page_end": (point.payload.get("metadata") or {}).get("page_end")
             }
             for point in results_wrapper.points
         ]
@@ -195,8 +688,5 @@ def search_vectors(
         raise
 
 
-# Ensure collection exists on module load
-try:
-    ensure_collection_exists()
-except Exception as e:
-    logger.error(f"Failed to initialize Qdrant collection: {e}")
+# Create the collection at startup (API lifespan or worker) rather than on import
+resources.add_startup_check("qdrant_collection", ensure_collection_exists)
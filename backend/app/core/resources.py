@@ -0,0 +1,197 @@
+"""Process-wide shared clients, created at startup or on first use, and startup readiness."""
+
+import inspect
+import logging
+import threading
+from typing import Any, Callable
+
+import anyio
+
+from app.core.concurrency import run_sync
+
+logger = logging.getLogger(__name__)
+
+# Backoff between attempts of a failing startup check
+STARTUP_RETRY_INITIAL_SECONDS = 1
+STARTUP_RETRY_MAX_SECONDS = 30
+
+
+class LazyClient:
+    """
+    Stand-in for a shared client that creates it on first attribute access.
+
+    Modules expose these at import time in place of the client itself, so
+    importing a module never builds a client or touches the network.
+    """
+
+    def __init__(self, container: "Resources", name: str):
+        self._container = container
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._container.get(self._name), attr)
+
+    def __repr__(self) -> str:
+        return f"<LazyClient {self._name}>"
+
+
+class Resources:
+    """
+    Container for the clients shared across a process.
+
+    Each client is registered with a factory and created once, then reused
+    (with its connection pool) by every caller. The API lifespan and the
+    worker create them all off the event loop with `create_all`: clients
+    used from async code before serving, so coroutines only ever read the
+    created instance and never wait on the creation lock, and clients whose
+    factory makes network requests in the background. Anything else
+    (scripts, tests) creates them on first use.
+    Startup checks, such as making sure the Qdrant collection exists, are
+    run by `run_startup_checks` alongside it and retried until they pass;
+    `ready` reports whether they all have.
+    """
+
+    def __init__(self):
+        self._factories: dict[str, Callable[[], Any]] = {}
+        self._closers: dict[str, Callable[[Any], Any]] = {}
+        self._blocking: set[str] = set()
+        self._instances: dict[str, Any] = {}
+        # One lock per client, so a slow factory doesn't hold up the others
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._startup_checks: dict[str, Callable[[], Any]] = {}
+        self._pending_checks: set[str] = set()
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        close: Callable[[Any], Any] | None = None,
+        blocking: bool = False
+    ) -> Any:
+        """
+        Register a shared client.
+
+        Args:
+            name: Unique name of the client.
+            factory: Builds the client; called once, on first use.
+            close: Releases the client on shutdown; may be async.
+            blocking: Whether the factory makes network requests (and may
+                hang on an unreachable dependency). Such clients must only be
+                used from worker threads; they aren't waited for before serving.
+
+        Returns:
+            A LazyClient that forwards attribute access to the client.
+        """
+        self._factories[name] = factory
+        self._locks[name] = threading.Lock()
+        if close is not None:
+            self._closers[name] = close
+        if blocking:
+            self._blocking.add(name)
+        return LazyClient(self, name)
+
+    def get(self, name: str) -> Any:
+        """
+        Return the client registered as `name`, creating it if needed.
+
+        Creation blocks the calling thread (and others creating the same
+        client), so on the event loop only use clients that `create_all`
+        has already built.
+        """
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._locks[name]:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._factories[name]()
+                    self._instances[name] = instance
+                    logger.info(f"Created client {name}")
+        return instance
+
+    async def create_all(self, include_blocking: bool = True) -> None:
+        """
+        Create registered clients, concurrently, in the bounded thread pool.
+
+        Building a client (SDK imports, TLS contexts, connection pools) takes
+        a few hundred milliseconds; doing it here keeps it off the event loop
+        of the first request that needs the client. A factory that fails is
+        logged and tried again on first use.
+
+        Args:
+            include_blocking: Whether to also create the clients registered
+                as blocking, whose factories make network requests.
+        """
+        async def create(name: str) -> None:
+            try:
+                await run_sync(self.get, name)
+            except Exception as e:
+                logger.warning(f"Failed to create client {name}, will retry on first use: {e}")
+
+        async with anyio.create_task_group() as task_group:
+            for name in list(self._factories):
+                if include_blocking or name not in self._blocking:
+                    task_group.start_soon(create, name)
+
+    def add_startup_check(self, name: str, check: Callable[[], Any]) -> None:
+        """
+        Register a check that must pass before the process is ready.
+
+        Args:
+            name: Name reported while the check is pending.
+            check: Callable (sync or async) that raises on failure. Sync
+                checks run in the bounded thread pool.
+        """
+        self._startup_checks[name] = check
+        self._pending_checks.add(name)
+
+    @property
+    def ready(self) -> bool:
+        """Whether every startup check has passed."""
+        return not self._pending_checks
+
+    @property
+    def pending_checks(self) -> list[str]:
+        """Names of the startup checks that have not passed yet."""
+        return sorted(self._pending_checks)
+
+    async def _run_check(self, name: str, check: Callable[[], Any]) -> None:
+        delay = STARTUP_RETRY_INITIAL_SECONDS
+        while True:
+            try:
+                if inspect.iscoroutinefunction(check):
+                    await check()
+                else:
+                    await run_sync(check)
+                self._pending_checks.discard(name)
+                logger.info(f"Startup check {name} passed")
+                return
+            except Exception as e:
+                logger.warning(f"Startup check {name} failed, retrying in {delay}s: {e}")
+                await anyio.sleep(delay)
+                delay = min(delay * 2, STARTUP_RETRY_MAX_SECONDS)
+
+    async def run_startup_checks(self) -> None:
+        """Run all pending startup checks concurrently, retrying each until it passes."""
+        async with anyio.create_task_group() as task_group:
+            for name in self.pending_checks:
+                task_group.start_soon(self._run_check, name, self._startup_checks[name])
+
+    async def aclose(self) -> None:
+        """Close every client that was created; they are recreated if used again."""
+        with self._lock:
+            instances = list(self._instances.items())
+            self._instances.clear()
+        for name, instance in instances:
+            close = self._closers.get(name)
+            if close is None:
+                continue
+            try:
+                result = close(instance)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Failed to close client {name}: {e}")
+
+
+resources = Resources()
@@ -1,21 +1,39 @@
-from supabase import create_client, Client
+import httpx
+from supabase import AsyncClient, AsyncClientOptions
 
 from app.config import get_settings
+from app.core.resources import resources
 
 settings = get_settings()
 
-# Admin client: Uses the secret key, bypasses RLS (Row Level Security)
+# Timeout of Supabase requests (the PostgREST client's default)
+SUPABASE_TIMEOUT_SECONDS = 120
+
+# Clients are created at startup (or on first use) and shared by the whole process (see app.core.resources)
+
+
+def _create_client(url: str, key: str) -> AsyncClient:
+    """
+    Create an async Supabase client whose auth, PostgREST, storage and
+    functions clients share one connection pool that we own, since the
+    Supabase client has no close method of its own.
+    """
+    http_client = httpx.AsyncClient(timeout=SUPABASE_TIMEOUT_SECONDS, follow_redirects=True, http2=True)
+    return AsyncClient(url, key, options=AsyncClientOptions(httpx_client=http_client))
+
+
+async def _aclose_client(client: AsyncClient) -> None:
+    """Close the connection pool of a client created by _create_client."""
+    await client.options.httpx_client.aclose()
+
+
+# Async admin client: Uses the secret key, bypasses RLS (Row Level Security)
 # Use this for backend operations that need full database access
-# e.g., creating users, admin operations, background jobs
-supabase_admin: Client = create_client(
-    settings.supabase_url,
-    settings.supabase_secret_key
+# e.g., creating users, admin operations, background jobs. Non-blocking, so
+# database and storage calls don't stall the event loop
+async_supabase_admin: AsyncClient = resources.register(
+    "async_supabase_admin",
+    lambda: _create_client(settings.supabase_url, settings.supabase_secret_key),
+    close=_aclose_client
 )
 
-# Public client: Uses the publishable (anon) key, respects RLS policies
-# Use this when you want to respect the database's Row Level Security
-# e.g., operations on behalf of authenticated users, respecting their permissions
-supabase_public: Client = create_client(
-    settings.supabase_url,
-    settings.supabase_publishable_key
-)
@@ -1,15 +1,43 @@
+import asyncio
+import contextlib
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import health, documents, quiz, sessions
 from app.config import get_settings
+from app.core.resources import resources
 
 settings = get_settings()
 
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create shared clients and run startup checks in the background, and close
+    the clients on shutdown.
+
+    Clients used by requests are built off the event loop before serving, so
+    no request waits on one being created; they make no network requests.
+    The rest (the sync Qdrant client's version check waits on Qdrant) and the
+    startup checks run in the background, and /ready reports 503 until the
+    checks (e.g. the Qdrant collection) have passed, so an unreachable
+    dependency delays readiness instead of failing startup.
+    """
+    await resources.create_all(include_blocking=False)
+    startup = asyncio.gather(resources.create_all(), resources.run_startup_checks())
+    yield
+    startup.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await startup
+    await resources.aclose()
+
+
 app = FastAPI(
     title="AutoCoach API",
     description="AI-powered tutoring from your documents",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
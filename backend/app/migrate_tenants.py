@@ -0,0 +1,155 @@
+"""
+Partition an existing Qdrant collection by user.
+
+Collections created before tenant partitioning have one HNSW graph over all
+documents and no user_id on their points. This command:
+
+1. creates the user_id tenant index,
+2. backfills user_id on every point from the owner of its document in Supabase,
+3. deletes points whose document no longer exists (with --delete-orphans),
+4. switches the collection's HNSW config to per-tenant graphs (m=0, payload_m).
+
+Orphaned points have no user_id and can't be found by any user's search
+once the collection is partitioned, so the command stops before step 4 if
+any remain, unless --delete-orphans or --allow-orphans is given.
+
+Qdrant rebuilds the index in the background after the last step; searches
+keep working meanwhile. Only points that still lack user_id are updated, so
+the command can be re-run cheaply, e.g. to pick up documents ingested by
+workers that were deployed before the migration.
+
+Usage:
+    python -m app.migrate_tenants [--collection documents] [--delete-orphans | --allow-orphans]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from qdrant_client.models import FieldCondition, Filter, FilterSelector, IsEmptyCondition, MatchValue, PayloadField
+
+from app.config import get_settings
+from app.core.concurrency import run_sync
+from app.core.qdrant import (
+    DEFAULT_COLLECTION_NAME, TENANT_FIELD, async_qdrant_client, qdrant_client, create_tenant_index,
+    get_tenant_hnsw_config
+)
+from app.core.supabase import async_supabase_admin
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Rows read from Supabase per request
+PAGE_SIZE = 1000
+
+_MISSING_TENANT = IsEmptyCondition(is_empty=PayloadField(key=TENANT_FIELD))
+
+
+async def _list_document_owners() -> dict[str, str]:
+    """Return the owner's user ID of every document, keyed by document ID."""
+    owners = {}
+    start = 0
+    while True:
+        response = (
+            await async_supabase_admin.table("documents")
+            .select("id, user_id")
+            .order("created_at")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        owners.update((row["id"], row["user_id"]) for row in response.data)
+        if len(response.data) < PAGE_SIZE:
+            return owners
+        start += PAGE_SIZE
+
+
+async def _backfill_document(collection_name: str, document_id: str, user_id: str) -> None:
+    """Set user_id on the points of a document that don't have it yet."""
+    await async_qdrant_client.set_payload(
+        collection_name=collection_name,
+        payload={TENANT_FIELD: user_id},
+        points=Filter(must=[
+            FieldCondition(key="document_id", match=MatchValue(value=document_id)),
+            _MISSING_TENANT
+        ]),
+        wait=True
+    )
+
+
+async def migrate_tenants(collection_name: str, delete_orphans: bool, allow_orphans: bool = False) -> int:
+    """
+    Backfill user_id and switch a collection to per-tenant HNSW graphs.
+
+    Args:
+        collection_name: The collection (or alias) to migrate.
+        delete_orphans: Whether to delete points whose document no longer exists.
+        allow_orphans: Whether to switch the collection even though such
+            points remain, leaving them unsearchable.
+
+    Returns:
+        The number of points still without a user_id.
+
+    Raises:
+        RuntimeError: If points without a user_id remain and neither
+            delete_orphans nor allow_orphans is set. The collection is left
+            unpartitioned; the backfill is kept.
+    """
+    await run_sync(create_tenant_index, collection_name)
+
+    owners = await _list_document_owners()
+    logger.info(f"Backfilling {TENANT_FIELD} for {len(owners)} documents in '{collection_name}'")
+    for count, (document_id, user_id) in enumerate(owners.items(), 1):
+        await _backfill_document(collection_name, document_id, user_id)
+        if count % 100 == 0:
+            logger.info(f"Backfilled {count}/{len(owners)} documents")
+
+    missing_filter = Filter(must=[_MISSING_TENANT])
+    orphans = (await async_qdrant_client.count(
+        collection_name=collection_name,
+        count_filter=missing_filter,
+        exact=True
+    )).count
+    if orphans and delete_orphans:
+        await async_qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=FilterSelector(filter=missing_filter)
+        )
+        logger.info(f"Deleted {orphans} points without a matching document")
+        orphans = 0
+    elif orphans and not allow_orphans:
+        raise RuntimeError(
+            f"{orphans} points have no matching document and would not be searchable by any user; "
+            f"re-run with --delete-orphans to remove them, or --allow-orphans to keep them"
+        )
+    elif orphans:
+        logger.warning(f"Keeping {orphans} points without a matching document; no user can search them")
+
+    await run_sync(
+        qdrant_client.update_collection,
+        collection_name=collection_name,
+        hnsw_config=get_tenant_hnsw_config()
+    )
+    logger.info(
+        f"'{collection_name}' now builds HNSW graphs per {TENANT_FIELD} "
+        f"(payload_m={settings.qdrant_tenant_payload_m}); Qdrant is re-indexing in the background"
+    )
+    return orphans
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Partition a Qdrant collection by user")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION_NAME, help="Collection (or alias) to migrate")
+    orphans = parser.add_mutually_exclusive_group()
+    orphans.add_argument("--delete-orphans", action="store_true",
+                         help="Delete points whose document no longer exists")
+    orphans.add_argument("--allow-orphans", action="store_true",
+                         help="Partition the collection even if such points remain (they become unsearchable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate_tenants(args.collection, args.delete_orphans, args.allow_orphans))
+
+
+if __name__ == "__main__":
+    main()
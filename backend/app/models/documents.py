@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class DocumentResponse(BaseModel):
@@ -26,6 +26,8 @@ class SearchRequest(BaseModel):
 
     query: str
     top_k: int = 5
+    page_start: int | None = Field(default=None, ge=1)
+    page_end: int | None = Field(default=None, ge=1)
 
 
 class ChunkResult(BaseModel):
@@ -34,6 +36,8 @@ class ChunkResult(BaseModel):
     content: str
     chunk_index: int
     score: float
+    page_start: int | None = None
+    page_end: int | None = None
 
 
 class SearchResponse(BaseModel):
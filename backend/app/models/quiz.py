@@ -10,6 +10,8 @@ class QuizGenerateRequest(BaseModel):
     num_questions: int = Field(default=5, ge=1, le=20)
     difficulty: str = Field(default="medium", pattern="^(easy|medium|hard)$")
     question_types: list[str] = Field(default=["mcq", "true_false", "free_text"])
+    page_start: int | None = Field(default=None, ge=1)
+    page_end: int | None = Field(default=None, ge=1)
 
 
 class QuestionSchema(BaseModel):
@@ -39,6 +41,8 @@ class QuizSessionCreate(BaseModel):
     num_questions: int = Field(default=5, ge=1, le=20)
     difficulty: str = Field(default="medium", pattern="^(easy|medium|hard)$")
     question_types: list[str] = Field(default=["mcq", "true_false", "free_text"])
+    page_start: int | None = Field(default=None, ge=1)
+    page_end: int | None = Field(default=None, ge=1)
 
 
 class QuestionResponse(BaseModel):
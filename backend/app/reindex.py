@@ -0,0 +1,279 @@
+"""
+Re-embed all documents into a new Qdrant collection and switch over to it.
+
+Builds `<collection>_d<dimensions>_<timestamp>` from the chunk texts stored
+in Supabase, optionally compares its search results with the current
+collection, then points the configured collection name (QDRANT_COLLECTION)
+at it as a Qdrant alias. Searches keep using the old vectors until the
+switch, which is a single atomic alias update; documents that become ready
+around the switch are picked up by a final catch-up pass after it. The very
+first reindex has to delete the original collection of that name before the
+alias can take it over, so it only switches with --drop-old (searches fail
+for that moment and the old vectors are not kept).
+
+Running API processes and workers read the vector size from the aliased
+collection (cached for VECTOR_SIZE_TTL_SECONDS), so a switch to a new size
+needs no restart. Set EMBEDDING_DIMENSIONS to it afterwards so new
+deployments agree.
+
+Usage:
+    python -m app.reindex --dimensions 512 [--evaluate-sample 200] [--top-k 5] [--no-switch] [--drop-old]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from qdrant_client.models import (
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation, Filter, FieldCondition, MatchValue
+)
+
+from app.config import get_settings
+from app.core.concurrency import run_sync
+from app.core.qdrant import (
+    DEFAULT_COLLECTION_NAME, async_qdrant_client, qdrant_client, ensure_collection_exists, store_vectors,
+    get_point_id
+)
+from app.core.supabase import async_supabase_admin
+from app.services.embeddings import embed_texts
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Rows read from Supabase per request
+PAGE_SIZE = 1000
+
+
+async def _list_ready_documents() -> dict[str, str]:
+    """Return the owner's user ID of every ready document, keyed by document ID."""
+    owners = {}
+    start = 0
+    while True:
+        response = (
+            await async_supabase_admin.table("documents")
+            .select("id, user_id")
+            .eq("status", "ready")
+            .order("created_at")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        owners.update((row["id"], row["user_id"]) for row in response.data)
+        if len(response.data) < PAGE_SIZE:
+            return owners
+        start += PAGE_SIZE
+
+
+async def _reindex_document(document_id: str, user_id: str, collection_name: str, dimensions: int) -> int:
+    """
+    Re-embed one document's chunks into `collection_name`.
+
+    Returns:
+        The number of chunks stored.
+
+    Raises:
+        RuntimeError: If some chunks could not be embedded.
+    """
+    stored = 0
+    start = 0
+    while True:
+        response = (
+            await async_supabase_admin.table("chunks")
+            .select("content, chunk_index, metadata")
+            .eq("document_id", document_id)
+            .order("chunk_index")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        chunks = response.data
+        if chunks:
+            result = await embed_texts([chunk["content"] for chunk in chunks], dimensions)
+            if not result.complete:
+                raise RuntimeError(
+                    f"{len(result.failed_indices)} chunks could not be embedded: {result.failures[0]['error']}"
+                )
+            embeddings = result.as_matrix(len(chunks))
+            await store_vectors(document_id, user_id, chunks, embeddings, collection_name=collection_name)
+            stored += len(chunks)
+        if len(chunks) < PAGE_SIZE:
+            return stored
+        start += PAGE_SIZE
+
+
+async def _evaluate_recall(
+    old_collection: str,
+    new_collection: str,
+    document_ids: list[str],
+    sample_size: int,
+    top_k: int
+) -> float | None:
+    """
+    Estimate recall@k of the new collection against the old one.
+
+    One random chunk of each sampled document is used as the query, searched
+    within its document using its own stored vector in each collection. The
+    old collection's top-k (which excludes the query chunk itself) is the
+    reference. Points are matched across collections by their chunk_index,
+    since points stored before IDs were derived from (document_id,
+    chunk_index) have random IDs in the old collection.
+
+    Returns:
+        Mean recall@k over the sampled queries, or None if nothing was sampled.
+    """
+    recalls = []
+    for document_id in random.sample(document_ids, min(len(document_ids), sample_size)):
+        document_filter = Filter(must=[FieldCondition(key="document_id", match=MatchValue(value=document_id))])
+        points, _ = await async_qdrant_client.scroll(
+            collection_name=old_collection,
+            scroll_filter=document_filter,
+            limit=256,
+            with_payload=["chunk_index"]
+        )
+        if len(points) <= top_k:
+            continue
+        query_point = random.choice(points)
+        query_ids = {
+            old_collection: query_point.id,
+            new_collection: get_point_id(document_id, query_point.payload["chunk_index"]),
+        }
+
+        found = []
+        for collection_name, point_id in query_ids.items():
+            response = await async_qdrant_client.query_points(
+                collection_name=collection_name,
+                query=point_id,
+                query_filter=document_filter,
+                limit=top_k,
+                with_payload=["chunk_index"]
+            )
+            found.append({point.payload["chunk_index"] for point in response.points})
+        recalls.append(len(found[0] & found[1]) / len(found[0]))
+
+    return sum(recalls) / len(recalls) if recalls else None
+
+
+def _switch_alias(alias: str, new_collection: str, drop_old: bool) -> bool:
+    """
+    Point `alias` at `new_collection`, replacing a collection or alias of that name.
+
+    Returns:
+        Whether the alias was switched. The first switch replaces a real
+        collection, which has to be deleted first; without `drop_old` it is
+        kept and nothing is switched.
+    """
+    aliases = {a.alias_name: a.collection_name for a in qdrant_client.get_aliases().aliases}
+    old_collection = aliases.get(alias)
+
+    if old_collection is None and qdrant_client.collection_exists(alias):
+        if not drop_old:
+            logger.error(
+                f"'{alias}' is still a collection, not an alias; it has to be deleted before it can point "
+                f"to '{new_collection}'. Rerun with --drop-old to delete it and switch"
+            )
+            return False
+        logger.warning(f"Deleting collection '{alias}' to replace it with an alias")
+        qdrant_client.delete_collection(alias)
+
+    operations = []
+    if alias in aliases:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=new_collection, alias_name=alias)))
+    qdrant_client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info(f"'{alias}' now points to '{new_collection}'")
+
+    if drop_old and old_collection:
+        qdrant_client.delete_collection(old_collection)
+        logger.info(f"Deleted previous collection '{old_collection}'")
+    return True
+
+
+async def _reindex_pass(
+    pass_name: str,
+    collection_name: str,
+    dimensions: int,
+    done: dict[str, str],
+    failed: dict[str, str]
+) -> None:
+    """Reindex the ready documents not yet in `done`, recording each in `done` or `failed`."""
+    owners = await _list_ready_documents()
+    pending = [document_id for document_id in owners if document_id not in done]
+    logger.info(f"{pass_name} pass: reindexing {len(pending)} documents into '{collection_name}'")
+    for document_id in pending:
+        try:
+            count = await _reindex_document(document_id, owners[document_id], collection_name, dimensions)
+            done[document_id] = owners[document_id]
+            failed.pop(document_id, None)
+            logger.info(f"Reindexed document {document_id} ({count} chunks)")
+        except Exception as e:
+            failed[document_id] = str(e)
+            logger.error(f"Failed to reindex document {document_id}: {e}")
+
+
+async def reindex(dimensions: int, evaluate_sample: int, top_k: int, switch: bool, drop_old: bool) -> str:
+    """
+    Build a new collection with `dimensions`-sized vectors for all ready documents.
+
+    Documents that become ready while the build runs are picked up by a
+    catch-up pass before switching, and those that become ready around the
+    switch by a final pass after it.
+
+    Args:
+        dimensions: Embedding dimensions of the new collection.
+        evaluate_sample: Number of documents to sample for the recall@k check (0 to skip).
+        top_k: k for the recall check.
+        switch: Whether to point the configured collection name at the new collection.
+        drop_old: Whether to delete the previous collection after switching.
+            Required for the first switch, which replaces a real collection.
+
+    Returns:
+        The name of the new collection.
+    """
+    alias = DEFAULT_COLLECTION_NAME
+    new_collection = f"{alias}_d{dimensions}_{int(time.time())}"
+    await run_sync(ensure_collection_exists, new_collection, dimensions)
+
+    done: dict[str, str] = {}
+    failed: dict[str, str] = {}
+    for pass_name in ("initial", "catch-up"):
+        await _reindex_pass(pass_name, new_collection, dimensions, done, failed)
+
+    if failed:
+        logger.error(f"{len(failed)} documents failed to reindex; not switching to '{new_collection}'")
+        return new_collection
+
+    if evaluate_sample and await run_sync(qdrant_client.collection_exists, alias):
+        recall = await _evaluate_recall(alias, new_collection, sorted(done), evaluate_sample, top_k)
+        if recall is not None:
+            logger.info(f"recall@{top_k} of '{new_collection}' against '{alias}': {recall:.3f}")
+
+    if switch and await run_sync(_switch_alias, alias, new_collection, drop_old):
+        # Documents that became ready after the catch-up pass were stored in the previous collection
+        await _reindex_pass("final catch-up", new_collection, dimensions, done, failed)
+        if failed:
+            logger.error(
+                f"{len(failed)} documents failed to reindex after the switch; reprocess them: {', '.join(failed)}"
+            )
+        if dimensions != settings.embedding_dimensions:
+            logger.warning(f"Set EMBEDDING_DIMENSIONS={dimensions} so new deployments use the new size")
+    return new_collection
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-embed all documents into a new Qdrant collection")
+    parser.add_argument("--dimensions", type=int, default=settings.embedding_dimensions,
+                        help="Embedding dimensions of the new collection")
+    parser.add_argument("--evaluate-sample", type=int, default=100,
+                        help="Documents sampled to compare recall@k with the current collection (0 to skip)")
+    parser.add_argument("--top-k", type=int, default=5, help="k for the recall@k comparison")
+    parser.add_argument("--no-switch", action="store_true", help="Build the collection without switching to it")
+    parser.add_argument("--drop-old", action="store_true", help="Delete the previous collection after switching (required the first time)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(reindex(args.dimensions, args.evaluate_sample, args.top_k, not args.no_switch, args.drop_old))
+
+
+if __name__ == "__main__":
+    main()
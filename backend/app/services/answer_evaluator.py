@@ -115,7 +115,7 @@ Rules:
 """
 
 
-def evaluate_free_text(
+async def evaluate_free_text(
     user_answer: str, correct_answer: str, question_text: str
 ) -> tuple[bool, str, str]:
     """
@@ -138,14 +138,14 @@ def evaluate_free_text(
         )
 
         # Call LLM for evaluation
-        response = call_kimi(
+        response = await call_kimi(
             system_prompt="You are an expert tutor providing constructive feedback on student answers.",
             user_prompt=prompt
         )
 
         if not response:
             logger.warning("Kimi evaluation failed, trying OpenAI fallback")
-            response = call_openai(
+            response = await call_openai(
                 system_prompt="You are an expert tutor providing constructive feedback on student answers.",
                 user_prompt=prompt,
                 temperature=0.3
@@ -186,7 +186,7 @@ def evaluate_free_text(
         return False, "Could not evaluate answer. Please try again.", correct_answer
 
 
-def evaluate_answer(
+async def evaluate_answer(
     question_type: str,
     user_answer: str,
     correct_answer: str,
@@ -215,7 +215,7 @@ def evaluate_answer(
         return {"is_correct": is_correct, "feedback": feedback}
 
     elif question_type in ["free_text", "freetext", "free", "text"]:
-        is_correct, feedback, explanation = evaluate_free_text(
+        is_correct, feedback, explanation = await evaluate_free_text(
             user_answer, correct_answer, question_text
         )
         return {
@@ -1,15 +1,151 @@
-"""Text chunking service using LangChain text splitters."""
+"""Text chunking service: a recursive character splitter that tracks offsets."""
 
 import logging
-
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from bisect import bisect_right
+from typing import Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
+# Separators tried in order, from paragraphs down to single characters
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+# The incremental chunker splits once this many chunk lengths of text are buffered
+CHUNK_WINDOW_MULTIPLIER = 20
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """Narrow [start, end) to exclude leading and trailing whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split_on_separator(text: str, start: int, end: int, separator: str) -> Iterator[tuple[int, int]]:
+    """
+    Split [start, end) on `separator`, keeping each separator at the start of
+    the piece that follows it. Empty pieces are dropped.
+    """
+    if not separator:
+        yield from ((i, i + 1) for i in range(start, end))
+        return
+    piece_start = start
+    position = text.find(separator, start, end)
+    while position != -1:
+        if position > piece_start:
+            yield piece_start, position
+        piece_start = position
+        position = text.find(separator, position + len(separator), end)
+    if end > piece_start:
+        yield piece_start, end
+
+
+def _merge_spans(
+    text: str,
+    spans: list[tuple[int, int]],
+    chunk_size: int,
+    chunk_overlap: int
+) -> Iterator[tuple[int, int]]:
+    """
+    Greedily merge adjacent pieces into chunks of at most `chunk_size`
+    characters, carrying up to `chunk_overlap` characters of trailing pieces
+    into the next chunk.
+    """
+    current: list[tuple[int, int]] = []
+    current_start = 0
+    total = 0
+    for span_start, span_end in spans:
+        length = span_end - span_start
+        if total + length > chunk_size and current:
+            chunk = _strip_span(text, current[current_start][0], current[-1][1])
+            if chunk[1] > chunk[0]:
+                yield chunk
+            while current_start < len(current) and (
+                total > chunk_overlap or (total + length > chunk_size and total > 0)
+            ):
+                total -= current[current_start][1] - current[current_start][0]
+                current_start += 1
+        current.append((span_start, span_end))
+        total += length
+    if current_start < len(current):
+        chunk = _strip_span(text, current[current_start][0], current[-1][1])
+        if chunk[1] > chunk[0]:
+            yield chunk
+
+
+def _split_spans(
+    text: str,
+    start: int,
+    end: int,
+    separators: tuple[str, ...],
+    chunk_size: int,
+    chunk_overlap: int
+) -> Iterator[tuple[int, int]]:
+    """Recursively split [start, end) using the first separator it contains."""
+    separator = separators[-1]
+    remaining: tuple[str, ...] = ()
+    for i, candidate in enumerate(separators):
+        if not candidate:
+            separator = candidate
+            break
+        if text.find(candidate, start, end) != -1:
+            separator = candidate
+            remaining = separators[i + 1:]
+            break
+
+    small: list[tuple[int, int]] = []
+    for piece_start, piece_end in _split_on_separator(text, start, end, separator):
+        if piece_end - piece_start < chunk_size:
+            small.append((piece_start, piece_end))
+            continue
+        if small:
+            yield from _merge_spans(text, small, chunk_size, chunk_overlap)
+            small = []
+        if remaining:
+            yield from _split_spans(text, piece_start, piece_end, remaining, chunk_size, chunk_overlap)
+        else:
+            chunk = _strip_span(text, piece_start, piece_end)
+            if chunk[1] > chunk[0]:
+                yield chunk
+    if small:
+        yield from _merge_spans(text, small, chunk_size, chunk_overlap)
+
+
+def iter_chunk_spans(
+    text: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    separators: tuple[str, ...] = DEFAULT_SEPARATORS
+) -> Iterator[tuple[int, int]]:
+    """
+    Lazily split text into overlapping chunks, as offsets into the text.
+
+    Follows the separator semantics of LangChain's
+    RecursiveCharacterTextSplitter (keeping separators, stripping
+    whitespace): text is split on the first separator it contains, pieces
+    still longer than chunk_size are split again on the next separator, and
+    small pieces are merged back up to chunk_size with chunk_overlap
+    characters carried over. Only offsets are produced, so no intermediate
+    strings are built.
+
+    Args:
+        text: The text to split.
+        chunk_size: The target size of each chunk in characters.
+        chunk_overlap: The number of characters to overlap between chunks.
+        separators: Separators to try, from coarsest to finest.
+
+    Yields:
+        (start, end) offsets of each non-empty, whitespace-stripped chunk.
+    """
+    if chunk_overlap > chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})")
+    yield from _split_spans(text, 0, len(text), separators, chunk_size, chunk_overlap)
+
 
 def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> list[dict]:
     """
-    Split text into chunks using RecursiveCharacterTextSplitter.
+    Split text into chunks.
 
     Args:
         text: The text to split into chunks.
@@ -18,35 +154,103 @@ def chunk_text(text: str, chunk_size: int = 1000, chunk_overlap: int = 200) -> l
 
     Returns:
         A list of dictionaries containing chunk information:
-        [{"content": str, "chunk_index": int, "metadata": {}}]
+        [{"content": str, "chunk_index": int, "metadata": {"char_start": int, "char_end": int}}]
     """
     if not text or not text.strip():
         logger.warning("Empty text provided for chunking")
         return []
-    
-    try:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            is_separator_regex=False,
-        )
-        
-        chunks = text_splitter.split_text(text)
-        
-        # Filter out empty or whitespace-only chunks
-        valid_chunks = [
-            {
-                "content": chunk.strip(),
-                "chunk_index": i,
-                "metadata": {}
+
+    chunks = [
+        {
+            "content": text[start:end],
+            "chunk_index": i,
+            "metadata": {"char_start": start, "char_end": end}
+        }
+        for i, (start, end) in enumerate(iter_chunk_spans(text, chunk_size, chunk_overlap))
+    ]
+
+    logger.info(f"Split text into {len(chunks)} chunks")
+    return chunks
+
+
+def iter_chunks(
+    segments: Iterable[str],
+    separator: str = "\n",
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200
+) -> Iterator[dict]:
+    """
+    Incrementally chunk a stream of text segments (e.g. pages).
+
+    Segments are joined with `separator` into a rolling buffer. Whenever the
+    buffer holds enough text it is split, every chunk but the last is
+    emitted, and the buffer restarts at the last chunk so it can still grow
+    and overlap with the next segment. Chunks are therefore available while
+    later pages are still being extracted.
+
+    Each chunk's metadata records the 1-based range of segments (pages or
+    slides) it spans and its character offsets in the joined text.
+
+    Args:
+        segments: Text segments in document order. Empty segments are skipped
+            but still count towards page numbering.
+        separator: String placed between consecutive segments.
+        chunk_size: The target size of each chunk in characters.
+        chunk_overlap: The number of characters to overlap between chunks.
+
+    Yields:
+        Chunk dictionaries:
+        {"content": str, "chunk_index": int,
+         "metadata": {"page_start": int, "page_end": int, "char_start": int, "char_end": int}}
+    """
+    window = chunk_size * CHUNK_WINDOW_MULTIPLIER
+    chunk_index = 0
+    buffer = ""
+    # Offset of buffer[0] in the joined text
+    buffer_offset = 0
+    # Buffer offsets where each buffered page starts, and those pages' numbers
+    page_offsets: list[int] = []
+    page_numbers: list[int] = []
+
+    def make_chunk(start: int, end: int) -> dict:
+        return {
+            "content": buffer[start:end],
+            "chunk_index": chunk_index,
+            "metadata": {
+                "page_start": page_numbers[bisect_right(page_offsets, start) - 1],
+                "page_end": page_numbers[bisect_right(page_offsets, end - 1) - 1],
+                "char_start": buffer_offset + start,
+                "char_end": buffer_offset + end,
             }
-            for i, chunk in enumerate(chunks)
-            if chunk and chunk.strip()
-        ]
-        
-        logger.info(f"Split text into {len(valid_chunks)} chunks")
-        return valid_chunks
-    except Exception as e:
-        logger.error(f"Failed to chunk text: {e}")
-        return []
+        }
+
+    for page_number, segment in enumerate(segments, 1):
+        if not segment:
+            continue
+        if buffer:
+            buffer += separator
+        page_offsets.append(len(buffer))
+        page_numbers.append(page_number)
+        buffer += segment
+        if len(buffer) < window:
+            continue
+
+        spans = list(iter_chunk_spans(buffer, chunk_size, chunk_overlap))
+        if len(spans) < 2:
+            continue
+
+        for start, end in spans[:-1]:
+            yield make_chunk(start, end)
+            chunk_index += 1
+
+        # Keep the unfinished tail, starting at the last chunk
+        tail_start = spans[-1][0]
+        first_page = bisect_right(page_offsets, tail_start) - 1
+        page_offsets = [0] + [offset - tail_start for offset in page_offsets[first_page + 1:]]
+        page_numbers = page_numbers[first_page:]
+        buffer = buffer[tail_start:]
+        buffer_offset += tail_start
+
+    for start, end in iter_chunk_spans(buffer, chunk_size, chunk_overlap):
+        yield make_chunk(start, end)
+        chunk_index += 1
@@ -0,0 +1,220 @@
+"""Boilerplate removal and near-duplicate chunk elimination before embedding."""
+
+import hashlib
+import logging
+import re
+from collections import Counter, defaultdict
+from typing import Iterable, Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Non-empty lines at the top and bottom of a page checked for headers/footers
+EDGE_LINES = 2
+# Pages buffered up front to learn the recurring lines before the first page is emitted
+HEADER_SAMPLE_PAGES = 10
+# A line is boilerplate once it has been an edge line on this many pages
+MIN_RECURRING_PAGES = 3
+
+# Words per shingle for SimHash
+SHINGLE_WORDS = 3
+# Chunks whose SimHashes differ in at most this many bits are near-duplicates
+SIMHASH_MAX_DISTANCE = 6
+# Chunks shorter than this many words are only deduplicated exactly
+MIN_SIMHASH_WORDS = 8
+# SimHash is split into this many bands for lookup; must exceed SIMHASH_MAX_DISTANCE
+SIMHASH_BANDS = 8
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize_line(line: str) -> str:
+    """
+    Normalize a line so spacing and case don't hide repetition.
+
+    Digits are kept: lines that differ only in their numbers (table rows,
+    numbered steps, "Page 3 of 40") are different lines, since treating them
+    as one strips real content from number-heavy documents.
+    """
+    return _WHITESPACE_RE.sub(" ", line).strip().lower()
+
+
+def _edge_indices(lines: list[str]) -> list[int]:
+    """
+    Return the indices of the first and last EDGE_LINES non-empty lines.
+
+    Pages with no more than 2 * EDGE_LINES non-empty lines (a slide, a
+    title page) have no body to frame, so none of their lines are edges.
+    """
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    if len(non_empty) <= 2 * EDGE_LINES:
+        return []
+    return non_empty[:EDGE_LINES] + non_empty[-EDGE_LINES:]
+
+
+def strip_recurring_lines(pages: Iterable[str]) -> Iterator[str]:
+    """
+    Remove header and footer lines that recur across pages.
+
+    A line at the top or bottom of a page is dropped once the same line has
+    appeared at the edge of MIN_RECURRING_PAGES pages. The first
+    HEADER_SAMPLE_PAGES pages are read ahead so their headers are recognized
+    too. Short pages are left whole.
+
+    Args:
+        pages: Page texts in document order.
+
+    Yields:
+        The page texts with recurring edge lines removed, one per input page.
+    """
+    counts: Counter[str] = Counter()
+    sample: list[str] | None = []
+
+    def strip(page: str) -> str:
+        lines = page.splitlines()
+        edges = set(_edge_indices(lines))
+        return "\n".join(
+            line for i, line in enumerate(lines)
+            if i not in edges or counts[_normalize_line(line)] < MIN_RECURRING_PAGES
+        )
+
+    for page in pages:
+        lines = page.splitlines()
+        counts.update({_normalize_line(lines[i]) for i in _edge_indices(lines)})
+        if sample is not None:
+            sample.append(page)
+            if len(sample) < HEADER_SAMPLE_PAGES:
+                continue
+            yield from (strip(sampled) for sampled in sample)
+            sample = None
+            continue
+        yield strip(page)
+
+    if sample is not None:
+        yield from (strip(sampled) for sampled in sample)
+
+
+def duplicate_pages(dropped: list[dict]) -> dict[int, list[int]]:
+    """
+    Collect the pages of dropped duplicate chunks by the chunk they duplicate.
+
+    Args:
+        dropped: Dropped chunks as recorded by ChunkDeduplicator.
+
+    Returns:
+        The sorted page numbers covered by each kept chunk's duplicates,
+        keyed by the kept chunk's chunk_index.
+    """
+    pages: dict[int, set[int]] = defaultdict(set)
+    for duplicate in dropped:
+        if duplicate["page_start"] is None:
+            continue
+        page_end = duplicate["page_end"] or duplicate["page_start"]
+        pages[duplicate["duplicate_of"]].update(range(duplicate["page_start"], page_end + 1))
+    return {chunk_index: sorted(chunk_pages) for chunk_index, chunk_pages in pages.items()}
+
+
+def _shingle_hashes(words: list[str]) -> np.ndarray:
+    """Return 64-bit hashes of the overlapping word shingles of a text."""
+    count = max(len(words) - SHINGLE_WORDS + 1, 1)
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(" ".join(words[i:i + SHINGLE_WORDS]).encode(), digest_size=8).digest(),
+                "little"
+            )
+            for i in range(count)
+        ],
+        dtype=np.uint64
+    )
+
+
+def simhash(words: list[str]) -> int:
+    """
+    Compute the 64-bit SimHash of a word sequence.
+
+    Each bit is set when most shingles have that bit set, so similar texts
+    produce hashes that differ in only a few bits.
+    """
+    hashes = _shingle_hashes(words)
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0, dtype=np.int64) * 2 > len(hashes)
+    return int.from_bytes(np.packbits(majority, bitorder="little").tobytes(), "little")
+
+
+class ChunkDeduplicator:
+    """
+    Drops chunks that exactly or nearly repeat an earlier chunk.
+
+    Exact duplicates are found by hashing the whitespace- and case-normalized
+    content. Near-duplicates are chunks whose SimHash is within
+    SIMHASH_MAX_DISTANCE bits of a kept chunk; candidates are looked up by
+    SimHash band, since two hashes that close must agree on at least one of
+    SIMHASH_BANDS bands.
+    """
+
+    def __init__(self):
+        self._exact: dict[bytes, int] = {}
+        self._bands: list[dict[int, list[tuple[int, int]]]] = [
+            defaultdict(list) for _ in range(SIMHASH_BANDS)
+        ]
+        self._band_bits = 64 // SIMHASH_BANDS
+        self.dropped: list[dict] = []
+
+    def _band_keys(self, fingerprint: int) -> list[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (band * self._band_bits)) & mask for band in range(SIMHASH_BANDS)]
+
+    def find_duplicate(self, content: str, chunk_index: int) -> int | None:
+        """
+        Check a chunk against the chunks kept so far, and remember it if new.
+
+        Args:
+            content: The chunk text.
+            chunk_index: Index the chunk will have if it is kept.
+
+        Returns:
+            The chunk_index of the kept chunk it duplicates, or None if it is new.
+        """
+        words = _WHITESPACE_RE.sub(" ", content).strip().lower().split(" ")
+        digest = hashlib.blake2b(" ".join(words).encode(), digest_size=16).digest()
+        if digest in self._exact:
+            return self._exact[digest]
+
+        fingerprint = None
+        if len(words) >= MIN_SIMHASH_WORDS:
+            fingerprint = simhash(words)
+            band_keys = self._band_keys(fingerprint)
+            for band, key in enumerate(band_keys):
+                for candidate, candidate_index in self._bands[band].get(key, ()):
+                    if (candidate ^ fingerprint).bit_count() <= SIMHASH_MAX_DISTANCE:
+                        return candidate_index
+
+        self._exact[digest] = chunk_index
+        if fingerprint is not None:
+            for band, key in enumerate(band_keys):
+                self._bands[band][key].append((fingerprint, chunk_index))
+        return None
+
+    def filter(self, chunks: Iterable[dict]) -> Iterator[dict]:
+        """
+        Yield the chunks that are not duplicates, renumbered consecutively.
+
+        Each dropped chunk is recorded in `dropped` with its page range and
+        the chunk_index of the kept chunk it duplicates.
+        """
+        chunk_index = 0
+        for chunk in chunks:
+            duplicate_of = self.find_duplicate(chunk["content"], chunk_index)
+            if duplicate_of is not None:
+                metadata = chunk.get("metadata", {})
+                self.dropped.append({
+                    "duplicate_of": duplicate_of,
+                    "page_start": metadata.get("page_start"),
+                    "page_end": metadata.get("page_end"),
+                })
+                continue
+            chunk["chunk_index"] = chunk_index
+            chunk_index += 1
+            yield chunk
@@ -0,0 +1,226 @@
+"""Persistent embedding cache backed by a local SQLite file."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# When the cache outgrows its limit, evict down to this fraction of it
+EVICTION_TARGET_RATIO = 0.9
+# SQLite caps the number of bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    text_hash BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used_at REAL NOT NULL,
+    PRIMARY KEY (model, dimensions, text_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used_at, size);
+
+-- Running total of the stored vector bytes, kept by triggers so checking
+-- the size limit doesn't scan the table; seeded once for existing caches
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total_bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size (id, total_bytes) SELECT 0, COALESCE(SUM(size), 0) FROM embeddings;
+CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings BEGIN
+    UPDATE cache_size SET total_bytes = total_bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF size ON embeddings BEGIN
+    UPDATE cache_size SET total_bytes = total_bytes + NEW.size - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings BEGIN
+    UPDATE cache_size SET total_bytes = total_bytes - OLD.size WHERE id = 0;
+END;
+COMMIT;
+"""
+
+
+class EmbeddingCache:
+    """
+    Size-bounded cache of embeddings keyed by (model, dimensions, sha256(text)).
+
+    Vectors are stored as raw float32 bytes. Every lookup refreshes the
+    entries it hits, and once the stored vectors exceed `max_bytes` the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode, creating the schema on first use."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _hash(text: str) -> bytes:
+        return hashlib.sha256(text.encode()).digest()
+
+    def get_many(self, model: str, dimensions: int, texts: list[str]) -> list[np.ndarray | None]:
+        """
+        Look up embeddings for several texts.
+
+        Args:
+            model: The embedding model.
+            dimensions: The embedding dimensions.
+            texts: The texts to look up.
+
+        Returns:
+            One float32 vector per text, in input order, or None for a miss.
+        """
+        hashes = [self._hash(text) for text in texts]
+        found: dict[bytes, np.ndarray] = {}
+        now = time.time()
+
+        conn = self._connect()
+        try:
+            unique = list(dict.fromkeys(hashes))
+            for i in range(0, len(unique), LOOKUP_BATCH_SIZE):
+                batch = unique[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"""
+                    SELECT text_hash, vector FROM embeddings
+                    WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})
+                    """,
+                    (model, dimensions, *batch)
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32)
+            if found:
+                conn.executemany(
+                    "UPDATE embeddings SET last_used_at = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(now, model, dimensions, text_hash) for text_hash in found]
+                )
+        finally:
+            conn.close()
+
+        results = [found.get(text_hash) for text_hash in hashes]
+        hit_count = sum(result is not None for result in results)
+        with self._lock:
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model: str, dimensions: int, texts: list[str], vectors) -> None:
+        """
+        Store embeddings for several texts, then evict if over the size limit.
+
+        Args:
+            model: The embedding model.
+            dimensions: The embedding dimensions.
+            texts: The embedded texts.
+            vectors: One vector per text.
+        """
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            data = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((model, dimensions, self._hash(text), data, len(data), now))
+        conn = self._connect()
+        try:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size trigger
+            conn.executemany(
+                """
+                INSERT INTO embeddings (model, dimensions, text_hash, vector, size, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (model, dimensions, text_hash) DO UPDATE SET
+                    vector = excluded.vector, size = excluded.size, last_used_at = excluded.last_used_at
+                """,
+                rows
+            )
+            self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Delete least recently used entries until the cache fits its limit."""
+        total_bytes = self._total_bytes(conn)
+        if total_bytes <= self.max_bytes:
+            return
+
+        excess = total_bytes - int(self.max_bytes * EVICTION_TARGET_RATIO)
+        cutoff = conn.execute(
+            """
+            SELECT last_used_at FROM (
+                SELECT last_used_at, SUM(size) OVER (ORDER BY last_used_at) AS freed
+                FROM embeddings
+            )
+            WHERE freed >= ? ORDER BY last_used_at LIMIT 1
+            """,
+            (excess,)
+        ).fetchone()
+        if cutoff is None:
+            return
+        deleted = conn.execute("DELETE FROM embeddings WHERE last_used_at <= ?", (cutoff[0],)).rowcount
+        logger.info(f"Evicted {deleted} cached embeddings")
+
+    @staticmethod
+    def _total_bytes(conn: sqlite3.Connection) -> int:
+        """Return the size of the stored vectors from the running total."""
+        return conn.execute("SELECT total_bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove all cached embeddings and reset the counters."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM embeddings")
+        finally:
+            conn.close()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return cache size and hit/miss counters."""
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            size_bytes = self._total_bytes(conn)
+        finally:
+            conn.close()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "size_bytes": size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+embedding_cache = EmbeddingCache(
+    path=settings.embedding_cache_path,
+    max_bytes=settings.embedding_cache_max_mb * 1024 * 1024,
+)
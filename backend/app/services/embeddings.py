@@ -1,65 +1,259 @@
 """Embedding generation service using OpenAI API."""
 
+import base64
 import logging
 
-from openai import OpenAI
+import anyio
+import numpy as np
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError, InternalServerError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 from app.config import get_settings
+from app.core.concurrency import run_sync
+from app.core.resources import resources
+from app.services.embedding_cache import embedding_cache
 
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.openai_api_key)
+# OpenAI client, created on first use; retries are handled here so they can honor retry-after
+client: AsyncOpenAI = resources.register(
+    "openai_embeddings",
+    lambda: AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0),
+    close=lambda client: client.close()
+)
 
 # OpenAI embedding model
 EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_DIMENSIONS = 1536
-# OpenAI has a limit of 100 texts per request
-MAX_BATCH_SIZE = 100
+EMBEDDING_DIMENSIONS = settings.embedding_dimensions
+# OpenAI accepts at most this many inputs per request
+MAX_BATCH_SIZE = 2048
+# Rough characters per token, used to size batches without a tokenizer
+CHARS_PER_TOKEN = 4
+# Upper bound on one retry wait, whatever retry-after asks for
+MAX_RETRY_WAIT_SECONDS = 60
 
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
 
-def get_embeddings(texts: list[str]) -> list[list[float]]:
+# Embedding requests in flight across this process
+_request_slots = anyio.Semaphore(settings.embedding_concurrency)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Approximate the token count of a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _plan_batches(texts: list[str]) -> list[list[str]]:
     """
-    Generate embeddings for a list of texts using OpenAI API.
+    Group texts into request batches by approximate token budget.
+
+    A batch is closed when adding the next text would exceed
+    `embedding_batch_tokens`, or when it reaches MAX_BATCH_SIZE inputs.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = _estimate_tokens(text)
+        if batch and (batch_tokens + tokens > settings.embedding_batch_tokens or len(batch) == MAX_BATCH_SIZE):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class _wait_retry_after(wait_random_exponential):
+    """Jittered exponential backoff that waits at least as long as retry-after asks."""
+
+    def __call__(self, retry_state) -> float:
+        backoff = super().__call__(retry_state)
+        error = retry_state.outcome.exception()
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                return min(max(float(retry_after), backoff), MAX_RETRY_WAIT_SECONDS)
+            except (TypeError, ValueError):
+                pass
+        return backoff
+
+
+async def _embed_batch(batch: list[str], dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Embed one batch, retrying rate limits and transient errors.
+
+    Vectors are requested base64-encoded and decoded straight into one
+    float32 matrix, so no Python float objects are created.
+
+    Returns:
+        A (len(batch), dimensions) float32 matrix in input order.
+    """
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception_type(RETRYABLE_ERRORS),
+        wait=_wait_retry_after(multiplier=1, max=MAX_RETRY_WAIT_SECONDS),
+        stop=stop_after_attempt(settings.embedding_max_attempts),
+        reraise=True,
+    ):
+        with attempt:
+            async with _request_slots:
+                response = await client.embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=batch,
+                    dimensions=dimensions,
+                    encoding_format="base64"
+                )
+    if len(response.data) != len(batch):
+        raise ValueError(f"Expected {len(batch)} embeddings, got {len(response.data)}")
+
+    matrix = np.empty((len(batch), dimensions), dtype=np.float32)
+    # The API returns items with their input index; don't rely on response order
+    for item in response.data:
+        if isinstance(item.embedding, str):
+            matrix[item.index] = np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+        else:
+            matrix[item.index] = item.embedding
+    return matrix
+
+
+class EmbeddingResult:
+    """
+    Outcome of embedding a list of texts.
+
+    Attributes:
+        embeddings: float32 embedding vectors keyed by input index.
+        failures: One entry per failed request batch (or group of unembeddable
+            inputs): {"indices": list[int], "error": str}.
+    """
+
+    def __init__(self):
+        self.embeddings: dict[int, np.ndarray] = {}
+        self.failures: list[dict] = []
+
+    @property
+    def failed_indices(self) -> list[int]:
+        """Input indices that have no embedding, in order."""
+        return sorted(index for failure in self.failures for index in failure["indices"])
+
+    @property
+    def complete(self) -> bool:
+        """Whether every input was embedded."""
+        return not self.failures
+
+    def as_matrix(self, count: int) -> np.ndarray:
+        """
+        Stack the embeddings of inputs 0..count-1 into one float32 matrix.
+
+        Raises:
+            KeyError: If any of those inputs has no embedding.
+        """
+        if count == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([self.embeddings[i] for i in range(count)])
+
+
+async def embed_texts(texts: list[str], dimensions: int = EMBEDDING_DIMENSIONS) -> EmbeddingResult:
+    """
+    Generate embeddings for a list of texts, keyed by input index.
+
+    Cached embeddings are reused; the remaining texts are grouped into
+    token-budgeted batches that are sent concurrently, up to
+    `embedding_concurrency` requests in flight per process. A batch that
+    still fails after retries is reported in `failures` without affecting
+    the other batches, whose results are kept (and cached, so a later retry
+    only sends the failed texts).
 
     Args:
         texts: List of text strings to embed.
+        dimensions: Size of the embedding vectors.
 
     Returns:
-        List of embedding vectors (list of floats).
-        Returns empty list if input is empty or all texts fail.
+        An EmbeddingResult. Empty or whitespace-only texts are reported as
+        failures rather than dropped.
     """
+    result = EmbeddingResult()
     if not texts:
         logger.warning("Empty texts list provided for embedding")
-        return []
-    
-    # Filter out empty texts
-    valid_texts = [text for text in texts if text and text.strip()]
-    if not valid_texts:
+        return result
+
+    empty_indices = [i for i, text in enumerate(texts) if not text or not text.strip()]
+    if empty_indices:
+        result.failures.append({"indices": empty_indices, "error": "Empty text cannot be embedded"})
+    valid_indices = [i for i, text in enumerate(texts) if text and text.strip()]
+    if not valid_indices:
         logger.warning("No valid texts to embed")
-        return []
-    
-    all_embeddings = []
-    
+        return result
+    valid_texts = [texts[i] for i in valid_indices]
+
+    # Serve what we can from the cache and only send the misses to the API
     try:
-        # Process in batches if needed
-        for i in range(0, len(valid_texts), MAX_BATCH_SIZE):
-            batch = valid_texts[i:i + MAX_BATCH_SIZE]
-            
-            response = client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=batch
-            )
-            
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)
-            
-            logger.info(f"Generated embeddings for batch {i // MAX_BATCH_SIZE + 1}: {len(batch)} texts")
-        
-        logger.info(f"Generated {len(all_embeddings)} embeddings total")
-        return all_embeddings
+        cached = await run_sync(embedding_cache.get_many, EMBEDDING_MODEL, dimensions, valid_texts)
     except Exception as e:
-        logger.error(f"Failed to generate embeddings: {e}")
-        return []
+        logger.warning(f"Embedding cache lookup failed: {e}")
+        cached = [None] * len(valid_texts)
+
+    # Identical texts within one call are embedded once
+    pending: dict[str, list[int]] = {}
+    for index, text, embedding in zip(valid_indices, valid_texts, cached):
+        if embedding is not None:
+            result.embeddings[index] = embedding
+        else:
+            pending.setdefault(text, []).append(index)
+    batches = _plan_batches(list(pending))
+
+    async def run_batch(batch_number: int, batch: list[str]) -> None:
+        try:
+            batch_embeddings = await _embed_batch(batch, dimensions)
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for batch {batch_number + 1}/{len(batches)}: {e}")
+            result.failures.append({
+                "indices": [index for text in batch for index in pending[text]],
+                "error": str(e)
+            })
+            return
+
+        for text, embedding in zip(batch, batch_embeddings):
+            for index in pending[text]:
+                result.embeddings[index] = embedding
+        try:
+            await run_sync(
+                embedding_cache.put_many, EMBEDDING_MODEL, dimensions, batch, batch_embeddings
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache embeddings: {e}")
+        logger.info(f"Generated embeddings for batch {batch_number + 1}/{len(batches)}: {len(batch)} texts")
+
+    async with anyio.create_task_group() as task_group:
+        for batch_number, batch in enumerate(batches):
+            task_group.start_soon(run_batch, batch_number, batch)
+
+    logger.info(
+        f"Generated {len(result.embeddings)} of {len(texts)} embeddings "
+        f"({sum(embedding is not None for embedding in cached)} from cache)"
+    )
+    return result
+
+
+async def get_embeddings(texts: list[str], dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Generate embeddings for a list of texts using OpenAI API.
+
+    All or nothing: the result is either one vector per input, in input
+    order, or empty. Use embed_texts to keep partial results.
+
+    Args:
+        texts: List of text strings to embed.
+        dimensions: Size of the embedding vectors.
+
+    Returns:
+        A (len(texts), dimensions) float32 matrix.
+        Returns an empty matrix if input is empty or any text could not be embedded.
+    """
+    result = await embed_texts(texts, dimensions)
+    if not texts or not result.complete:
+        return np.empty((0, dimensions), dtype=np.float32)
+    return result.as_matrix(len(texts))
@@ -0,0 +1,82 @@
+"""
+Entry point of the sandboxed extraction children.
+
+Started by extraction_sandbox as `python -m app.services.extraction_child`
+rather than through multiprocessing's spawn, which would re-import the
+parent's __main__ (the worker or the API, with all their clients) in every
+child. This module only imports what parsing a document needs.
+"""
+
+import resource
+import signal
+import sys
+from multiprocessing.connection import Connection
+
+from app.services.text_extraction import (
+    open_pdf_pages, pdf_page_text, open_pptx_slides, pptx_slide_text
+)
+
+# How each file type is opened and how one page's text is read, in the child
+PAGE_READERS = {
+    "pdf": (open_pdf_pages, pdf_page_text),
+    "pptx": (open_pptx_slides, pptx_slide_text),
+}
+
+
+class PageTimeoutError(Exception):
+    """Raised inside a child when one page exceeds its time budget."""
+
+
+def _on_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+
+def sandbox_main(file_type: str, source_path: str, conn, memory_limit_bytes: int, page_seconds: float) -> None:
+    """
+    Extract pages for the parent over `conn`.
+
+    Protocol: the child sends ("count", n) once the file is open, receives a
+    (start, end) page range, then sends ("page", text, skip_reason) for each
+    page in the range and finally ("done",). Any failure to open the file is
+    sent as ("error", message).
+    """
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    signal.signal(signal.SIGALRM, _on_page_timeout)
+    open_pages, page_text = PAGE_READERS[file_type]
+
+    try:
+        pages = open_pages(source_path)
+        conn.send(("count", len(pages)))
+    except MemoryError:
+        conn.send(("error", "exceeded the extraction memory limit while opening the file"))
+        return
+    except Exception as e:
+        conn.send(("error", f"could not open the file: {e}"))
+        return
+
+    start, end = conn.recv()
+    for index in range(start, end):
+        text, skip_reason = "", None
+        signal.setitimer(signal.ITIMER_REAL, page_seconds)
+        try:
+            text = page_text(pages[index])
+        except PageTimeoutError:
+            skip_reason = f"exceeded the {page_seconds:g}s page time budget"
+        except MemoryError:
+            skip_reason = "exceeded the extraction memory limit"
+        except Exception as e:
+            skip_reason = f"extraction failed: {e}"
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        conn.send(("page", text, skip_reason))
+    conn.send(("done",))
+
+
+if __name__ == "__main__":
+    # argv: connection fd, file type, memory limit (bytes), page budget (s), source path
+    fd, file_type, memory_limit_bytes, page_seconds, source_path = sys.argv[1:]
+    try:
+        sandbox_main(file_type, source_path, Connection(int(fd)), int(memory_limit_bytes), float(page_seconds))
+    except (EOFError, BrokenPipeError):
+        # The parent closed its end (extraction aborted or the parent exited)
+        sys.exit(1)
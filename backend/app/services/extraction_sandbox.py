@@ -0,0 +1,195 @@
+"""
+Sandboxed text extraction.
+
+Parsing untrusted PDF/PPTX files runs in short-lived child processes so a
+pathological file cannot hang or exhaust the process that handles it:
+
+- each child runs under an RLIMIT_AS address-space cap,
+- every page gets a time budget; pages that exceed it (or run out of
+  memory) are skipped and reported instead of failing the document,
+- the whole extraction has a time limit, counted while waiting on the
+  children (not while the caller processes pages), after which all
+  children are killed.
+
+Large PDFs are split into contiguous page ranges extracted by several
+children at once; pages are still yielded in document order.
+"""
+
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Iterator
+
+from app.config import get_settings
+from app.services.extraction_child import PAGE_READERS
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Minimum pages per child before a PDF is split across several children
+PDF_PAGES_PER_SHARD = 16
+
+# Caps extraction children across all documents on this node
+_process_slots = threading.BoundedSemaphore(settings.pdf_extraction_processes)
+
+# The directory holding the `app` package, so children can import it
+_IMPORT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ExtractionError(Exception):
+    """Raised when a document cannot be extracted at all."""
+
+
+class _WaitBudget:
+    """
+    The wall-clock time an extraction may spend waiting on its children.
+
+    Only time blocked on a child counts: while the consumer of the pages is
+    busy (embedding, writing), children keep extracting into their pipes
+    and no budget is used.
+    """
+
+    def __init__(self, seconds: float):
+        self.remaining = seconds
+
+    def poll(self, conn: Connection) -> bool:
+        """Wait for a message on `conn` within the remaining budget."""
+        started = time.monotonic()
+        ready = conn.poll(max(self.remaining, 0))
+        self.remaining -= time.monotonic() - started
+        return ready
+
+
+class _Sandbox:
+    """One extraction child and the parent's end of its connection."""
+
+    def __init__(self, file_type: str, source_path: str):
+        parent_sock, child_sock = socket.socketpair()
+        self.conn = Connection(parent_sock.detach())
+        python_path = os.pathsep.join(filter(None, [_IMPORT_ROOT, os.environ.get("PYTHONPATH")]))
+        try:
+            self.process = subprocess.Popen(
+                [
+                    sys.executable, "-m", "app.services.extraction_child",
+                    str(child_sock.fileno()),
+                    file_type,
+                    str(settings.extraction_memory_limit_mb * 1024 * 1024),
+                    str(settings.extraction_page_seconds),
+                    os.path.abspath(source_path),
+                ],
+                pass_fds=(child_sock.fileno(),),
+                env={**os.environ, "PYTHONPATH": python_path},
+            )
+        except Exception:
+            self.conn.close()
+            raise
+        finally:
+            child_sock.close()
+
+    def recv(self, budget: _WaitBudget):
+        """Receive the child's next message, enforcing the extraction time limit."""
+        if not budget.poll(self.conn):
+            raise ExtractionError(
+                f"Extraction exceeded the {settings.extraction_timeout_seconds}s time limit"
+            )
+        try:
+            message = self.conn.recv()
+        except EOFError:
+            try:
+                self.process.wait(1)
+            except subprocess.TimeoutExpired:
+                pass
+            raise ExtractionError(
+                f"Extraction process exited unexpectedly (exit code {self.process.returncode})"
+            )
+        if message[0] == "error":
+            raise ExtractionError(f"Extraction failed: {message[1]}")
+        return message
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+def _split_pages(page_count: int, parts: int) -> list[tuple[int, int]]:
+    """Split [0, page_count) into `parts` contiguous ranges."""
+    size = math.ceil(page_count / parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def iter_pages_sandboxed(
+    file_type: str,
+    source_path: str,
+    skipped_pages: list[dict] | None = None
+) -> Iterator[str]:
+    """
+    Extract a document's pages (or slides) in sandboxed child processes.
+
+    Args:
+        file_type: "pdf" or "pptx".
+        source_path: Path to the file.
+        skipped_pages: If given, receives {"page": int, "reason": str} for
+            every page that was skipped (1-based page numbers).
+
+    Yields:
+        The sanitized text of each page, in order. Skipped pages yield "" so
+        page numbering is preserved.
+
+    Raises:
+        ExtractionError: If the file cannot be opened, a child dies, or the
+            time spent waiting on the children exceeds the limit.
+    """
+    budget = _WaitBudget(settings.extraction_timeout_seconds)
+    sandboxes: list[_Sandbox] = []
+    slots_held = 0
+
+    try:
+        _process_slots.acquire()
+        slots_held += 1
+        sandboxes.append(_Sandbox(file_type, source_path))
+        page_count = sandboxes[0].recv(budget)[1]
+
+        # Split large PDFs across extra children when this node has free slots
+        wanted = 1
+        if file_type == "pdf":
+            wanted = max(1, min(
+                settings.pdf_extraction_parallelism,
+                os.cpu_count() or 1,
+                page_count // PDF_PAGES_PER_SHARD
+            ))
+        while len(sandboxes) < wanted and _process_slots.acquire(blocking=False):
+            slots_held += 1
+            sandboxes.append(_Sandbox(file_type, source_path))
+
+        ranges = _split_pages(page_count, len(sandboxes)) if page_count else [(0, 0)]
+        for sandbox in sandboxes[len(ranges):]:
+            sandbox.close()
+        for sandbox in sandboxes[1:len(ranges)]:
+            sandbox.recv(budget)
+        for sandbox, page_range in zip(sandboxes, ranges):
+            sandbox.conn.send(page_range)
+
+        for sandbox, (start, end) in zip(sandboxes, ranges):
+            for index in range(start, end):
+                _, text, skip_reason = sandbox.recv(budget)
+                if skip_reason:
+                    logger.warning(f"Skipped page {index + 1} of {source_path}: {skip_reason}")
+                    if skipped_pages is not None:
+                        skipped_pages.append({"page": index + 1, "reason": skip_reason})
+                yield text
+            sandbox.recv(budget)
+            sandbox.close()
+    finally:
+        for sandbox in sandboxes:
+            sandbox.close()
+        for _ in range(slots_held):
+            _process_slots.release()
@@ -1,47 +1,90 @@
 """Document ingestion pipeline service."""
 
 import logging
+import math
+from typing import Callable
 from uuid import UUID
 
-from app.core.supabase import supabase_admin
-from app.core.qdrant import store_vectors
-from app.services.text_extraction import extract_text_from_pdf, extract_text_from_pptx
-from app.services.chunking import chunk_text
-from app.services.embeddings import get_embeddings
+import anyio
+import numpy as np
+from anyio import from_thread
+
+from app.config import get_settings
+
+from app.core.supabase import async_supabase_admin
+from app.core.concurrency import run_sync
+from app.core.qdrant import (
+    store_vectors, wait_for_document_vectors, copy_document_vectors, delete_document_vectors, set_duplicate_pages,
+    get_point_id, get_vector_size, VECTOR_SIZE
+)
+from app.services.extraction_sandbox import iter_pages_sandboxed, PAGE_READERS
+from app.services.chunking import iter_chunks
+from app.services.dedup import strip_recurring_lines, ChunkDeduplicator, duplicate_pages
+from app.services.embeddings import embed_texts
+from app.services.ingestion_checkpoint import IngestionCheckpoint
+from app.services.upload_spool import has_spool, write_spool
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
+# Chunks are embedded, written and checkpointed in batches of this size
+WRITE_BATCH_SIZE = 100
+# Rough upper bound on one batch in flight: chunk text plus its float32 vectors
+BATCH_MEMORY_ESTIMATE_BYTES = WRITE_BATCH_SIZE * (4 * 1024 + VECTOR_SIZE * 4)
+# Chunk rows read from Supabase per request when copying a duplicate
+COPY_PAGE_SIZE = 1000
+
+# Separator placed between the pages of each supported file type
+PAGE_SEPARATORS = {
+    "pdf": "\n",
+    "pptx": "\n\n",
+}
+
+
+class IngestionStageError(Exception):
+    """Raised when a stage of the ingestion pipeline fails."""
+
 
-async def process_document(document_id: str) -> None:
+async def process_document(document_id: str, spool_path: str | None = None) -> bool:
     """
     Process a document through the full ingestion pipeline.
 
+    Extraction, chunking, embedding and storage run as overlapping stages
+    over batches of chunks. Each batch is checkpointed, so calling this again
+    after a failure resumes from the last completed batch.
+
     This function:
     1. Updates document status to 'processing'
-    2. Downloads the file from Supabase Storage
-    3. Extracts text based on file type
-    4. Chunks the text
-    5. Generates embeddings
-    6. Stores vectors in Qdrant
-    7. Saves chunks to database
-    8. Updates document status to 'ready' or 'failed'
+    2. Reuses the chunks and vectors of an identical ready document, if any
+    3. Uses the spooled upload, or downloads the file from Supabase Storage to the spool
+    4. Extracts text page by page and chunks it incrementally
+    5. Generates embeddings for each batch of chunks
+    6. Stores each embedded batch in Qdrant and the chunks table
+    7. Updates document status to 'ready' or 'failed'
 
     Args:
         document_id: The UUID of the document to process.
+        spool_path: Local copy of the upload written by the API. When it is
+            missing (retry on another node, spool cleaned up) the file is
+            downloaded from storage instead.
+
+    Returns:
+        True if the document is ready, False if processing failed.
     """
     try:
         # Update status to 'processing'
         logger.info(f"Starting processing for document {document_id}")
-        supabase_admin.table("documents").update({
+        await async_supabase_admin.table("documents").update({
             "status": "processing"
         }).eq("id", document_id).execute()
 
         # Fetch document record
-        doc_response = supabase_admin.table("documents").select("*").eq("id", document_id).execute()
+        doc_response = await async_supabase_admin.table("documents").select("*").eq("id", document_id).execute()
         
         if not doc_response.data or len(doc_response.data) == 0:
             logger.error(f"Document {document_id} not found")
-            return
+            return False
         
         document = doc_response.data[0]
         file_path = document["file_path"]
@@ -49,118 +92,540 @@ async def process_document(document_id: str) -> None:
         
         logger.info(f"Processing document {document_id} of type {file_type}")
 
-        # Download file from Supabase Storage
-        try:
-            file_response = supabase_admin.storage.from_("documents").download(file_path)
-            file_bytes = file_response
-            logger.info(f"Downloaded file {file_path}, size: {len(file_bytes)} bytes")
-        except Exception as e:
-            logger.error(f"Failed to download file {file_path}: {e}")
-            _mark_document_failed(document_id, f"Failed to download file: {str(e)}")
-            return
+        # Reuse the output of an identical upload instead of extracting and embedding again
+        content_hash = document.get("content_hash")
+        if content_hash:
+            source_document = await _find_processed_duplicate(content_hash, document_id)
+            if source_document:
+                try:
+                    await _copy_processed_document(source_document, document_id, document["user_id"])
+                    return True
+                except Exception as e:
+                    logger.warning(f"Failed to reuse document {source_document['id']}, processing from scratch: {e}")
+                    await _discard_document_output(document_id)
 
-        # Extract text based on file type
-        try:
-            if file_type == "pdf":
-                full_text, page_count = extract_text_from_pdf(file_bytes)
-            elif file_type == "pptx":
-                full_text, page_count = extract_text_from_pptx(file_bytes)
-            else:
-                logger.error(f"Unsupported file type: {file_type}")
-                _mark_document_failed(document_id, f"Unsupported file type: {file_type}")
-                return
-        except Exception as e:
-            logger.error(f"Failed to extract text from document {document_id}: {e}")
-            _mark_document_failed(document_id, f"Text extraction failed: {str(e)}")
-            return
+        checkpoint = IngestionCheckpoint(document_id)
+        chunking_state = await run_sync(checkpoint.load_chunking_state)
 
-        # Check if extraction was successful
-        if not full_text or not full_text.strip():
-            logger.error(f"No text extracted from document {document_id}")
-            _mark_document_failed(document_id, "No text could be extracted from the document")
-            return
+        if chunking_state is not None:
+            logger.info(f"Resuming document {document_id} from checkpointed chunks")
+        else:
+            if file_type not in PAGE_READERS:
+                logger.error(f"Unsupported file type: {file_type}")
+                await _mark_document_failed(document_id, f"Unsupported file type: {file_type}")
+                return False
 
-        logger.info(f"Extracted {len(full_text)} characters, {page_count} pages/slides")
+            # Use the spooled upload if it is on this node, otherwise download it from Supabase Storage
+            if await run_sync(has_spool, spool_path):
+                logger.info(f"Using spooled file {spool_path}")
+            else:
+                try:
+                    file_response = await async_supabase_admin.storage.from_("documents").download(file_path)
+                    spool_path = await run_sync(write_spool, document_id, file_response)
+                    logger.info(f"Downloaded file {file_path}, size: {len(file_response)} bytes")
+                    del file_response
+                except Exception as e:
+                    logger.error(f"Failed to download file {file_path}: {e}")
+                    await _mark_document_failed(document_id, f"Failed to download file: {str(e)}")
+                    return False
 
-        # Chunk the text
+        # Extract, chunk, embed and store as overlapping pipeline stages
         try:
-            chunks = chunk_text(full_text)
-            if not chunks:
-                logger.error(f"No chunks created from document {document_id}")
-                _mark_document_failed(document_id, "Failed to create text chunks")
-                return
-            logger.info(f"Created {len(chunks)} chunks")
-        except Exception as e:
-            logger.error(f"Failed to chunk text for document {document_id}: {e}")
-            _mark_document_failed(document_id, f"Text chunking failed: {str(e)}")
-            return
+            page_count, chunk_count, skipped_pages, duplicate_chunks = await _run_pipeline(
+                document_id, document["user_id"], file_type, spool_path, checkpoint, chunking_state
+            )
+            await _record_duplicate_pages(document_id, duplicate_chunks)
+        except IngestionStageError as e:
+            logger.error(f"Ingestion failed for document {document_id}: {e}")
+            await _mark_document_failed(document_id, str(e))
+            return False
 
-        # Generate embeddings
-        try:
-            texts = [chunk["content"] for chunk in chunks]
-            embeddings = get_embeddings(texts)
-            if not embeddings:
-                logger.error(f"No embeddings generated for document {document_id}")
-                _mark_document_failed(document_id, "Failed to generate embeddings")
-                return
-            logger.info(f"Generated {len(embeddings)} embeddings")
-        except Exception as e:
-            logger.error(f"Failed to generate embeddings for document {document_id}: {e}")
-            _mark_document_failed(document_id, f"Embedding generation failed: {str(e)}")
-            return
+        if chunk_count == 0:
+            logger.error(f"No text extracted from document {document_id}")
+            await _mark_document_failed(document_id, "No text could be extracted from the document")
+            return False
 
-        # Store vectors in Qdrant
+        # An earlier attempt that produced more chunks may have stored some past the end
         try:
-            point_ids = store_vectors(document_id, chunks, embeddings)
-            logger.info(f"Stored {len(point_ids)} vectors in Qdrant")
+            await delete_document_vectors(document_id, from_chunk_index=chunk_count)
+            await async_supabase_admin.table("chunks").delete().eq(
+                "document_id", document_id
+            ).gte("chunk_index", chunk_count).execute()
         except Exception as e:
-            logger.error(f"Failed to store vectors for document {document_id}: {e}")
-            _mark_document_failed(document_id, f"Vector storage failed: {str(e)}")
-            return
+            logger.error(f"Failed to remove stale chunks of document {document_id}: {e}")
+            await _mark_document_failed(document_id, f"Failed to remove stale chunks: {str(e)}")
+            return False
 
-        # Save chunks to database
-        try:
-            chunk_records = []
-            for i, chunk in enumerate(chunks):
-                chunk_record = {
-                    "document_id": document_id,
-                    "content": chunk["content"],
-                    "chunk_index": chunk["chunk_index"],
-                    "embedding_id": point_ids[i] if i < len(point_ids) else None,
-                    "metadata": chunk.get("metadata", {})
-                }
-                chunk_records.append(chunk_record)
-            
-            # Insert chunks in batches to avoid request size limits
-            batch_size = 100
-            for i in range(0, len(chunk_records), batch_size):
-                batch = chunk_records[i:i + batch_size]
-                supabase_admin.table("chunks").insert(batch).execute()
-            
-            logger.info(f"Saved {len(chunk_records)} chunks to database")
-        except Exception as e:
-            logger.error(f"Failed to save chunks for document {document_id}: {e}")
-            _mark_document_failed(document_id, f"Failed to save chunks: {str(e)}")
-            return
+        # Vectors were written without waiting; make sure they are all searchable
+        stored_count = await wait_for_document_vectors(document_id, document["user_id"], chunk_count)
+        if stored_count < chunk_count:
+            # Start over on retry rather than trusting the checkpoint; embeddings come from the cache
+            await run_sync(checkpoint.clear)
+            await _mark_document_failed(
+                document_id, f"Only {stored_count} of {chunk_count} vectors were stored in Qdrant"
+            )
+            return False
+
+        logger.info(f"Stored {chunk_count} chunks from {page_count} pages/slides")
 
-        # Update document status to 'ready'
+        # Update document status to 'ready', reporting pages that had to be skipped
         try:
-            supabase_admin.table("documents").update({
+            await async_supabase_admin.table("documents").update({
                 "status": "ready",
-                "chunk_count": len(chunks),
-                "page_count": page_count
+                "chunk_count": chunk_count,
+                "page_count": page_count,
+                "error_message": _describe_skipped_pages(skipped_pages)
             }).eq("id", document_id).execute()
             logger.info(f"Document {document_id} processed successfully")
         except Exception as e:
             logger.error(f"Failed to update document status for {document_id}: {e}")
             # Don't mark as failed here since processing was successful
 
+        await run_sync(checkpoint.clear)
+        return True
+
     except Exception as e:
         logger.error(f"Unexpected error processing document {document_id}: {e}")
-        _mark_document_failed(document_id, f"Unexpected error: {str(e)}")
+        await _mark_document_failed(document_id, f"Unexpected error: {str(e)}")
+        return False
+
+
+def _produce_chunk_batches(
+    file_type: str,
+    source_path: str | None,
+    checkpoint: IngestionCheckpoint,
+    chunking_state: dict | None,
+    start_batch: int,
+    send_batch: Callable[[tuple[int, list[dict]]], None]
+) -> dict:
+    """
+    Extract pages and chunk them into batches (runs in a worker thread).
+
+    Batches before `start_batch` are already stored and are not sent again.
+    Without a chunking summary, extraction starts over and may cut different
+    batches than the attempt that stored them (pages skipped on a time or
+    memory limit depend on load), so each batch is compared with its
+    checkpoint: from the first one that differs, batches are stored again
+    and their checkpointed embeddings are dropped.
+
+    Recurring header/footer lines are stripped before chunking, and exact or
+    near-duplicate chunks are dropped before they are batched for embedding.
+
+    Returns:
+        Chunking summary: {"page_count", "chunk_count", "batch_count",
+        "skipped_pages", "duplicate_chunks"}.
+    """
+    if chunking_state is not None:
+        for batch_number in range(start_batch, chunking_state["batch_count"]):
+            send_batch((batch_number, checkpoint.load_chunk_batch(batch_number)))
+        return chunking_state
+
+    page_count = 0
+    skipped_pages = []
+
+    def pages():
+        nonlocal page_count
+        for page_text in iter_pages_sandboxed(file_type, source_path, skipped_pages):
+            page_count += 1
+            yield page_text
+
+    chunk_count = 0
+    batch_number = 0
+    batch = []
+
+    send_from = start_batch
+
+    def flush():
+        nonlocal batch_number, batch, send_from
+        checkpointed = checkpoint.load_chunk_batch(batch_number)
+        if checkpointed != batch:
+            if checkpointed is not None:
+                checkpoint.discard_embeddings(batch_number)
+                if batch_number < send_from:
+                    logger.info(f"Batch {batch_number} was chunked differently, storing again from there")
+            checkpoint.save_chunk_batch(batch_number, batch)
+            send_from = min(send_from, batch_number)
+        if batch_number >= send_from:
+            send_batch((batch_number, batch))
+        batch_number += 1
+        batch = []
+
+    deduplicator = ChunkDeduplicator()
+    chunks = iter_chunks(strip_recurring_lines(pages()), separator=PAGE_SEPARATORS[file_type])
+    for chunk in deduplicator.filter(chunks):
+        batch.append(chunk)
+        chunk_count += 1
+        if len(batch) == WRITE_BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+    state = {
+        "page_count": page_count,
+        "chunk_count": chunk_count,
+        "batch_count": batch_number,
+        "skipped_pages": skipped_pages,
+        "duplicate_chunks": deduplicator.dropped
+    }
+    if deduplicator.dropped:
+        logger.info(
+            f"Dropped {len(deduplicator.dropped)} duplicate chunks, "
+            f"saving {len(deduplicator.dropped)} embeddings"
+        )
+    checkpoint.save_chunking_state(state)
+    return state
+
+
+def _pipeline_buffer_batches() -> int:
+    """
+    Number of batches each inter-stage stream may buffer.
+
+    Sized so that the batches buffered in both streams, plus the batches
+    being worked on (one for chunking, up to `embedding_concurrency` plus
+    one read ahead for embedding, and enough for one upsert request for
+    writing), fit in the per-document memory budget.
+    """
+    budget_batches = settings.ingestion_memory_budget_mb * 1024 * 1024 // BATCH_MEMORY_ESTIMATE_BYTES
+    writing_batches = math.ceil(settings.qdrant_upsert_batch_size / WRITE_BATCH_SIZE)
+    return max(1, (budget_batches - 2 - settings.embedding_concurrency - writing_batches) // 2)
+
+
+async def _run_pipeline(
+    document_id: str,
+    user_id: str,
+    file_type: str,
+    source_path: str | None,
+    checkpoint: IngestionCheckpoint,
+    chunking_state: dict | None
+) -> tuple[int, int, list[dict], list[dict]]:
+    """
+    Run extraction/chunking, embedding and storage as concurrent stages.
+
+    Stages are connected by bounded streams: chunk batches are embedded as
+    soon as they are produced, up to `embedding_concurrency` at a time, and
+    embedded batches are written to Qdrant and Supabase, in order, while the
+    next batches are embedding. Total time approaches that of the slowest
+    stage rather than the sum of all stages.
+
+    Returns:
+        A tuple of (page_count, chunk_count, skipped_pages, duplicate_chunks).
+
+    Raises:
+        IngestionStageError: If any stage fails.
+    """
+    progress = await run_sync(checkpoint.load_progress)
+    dimensions = await get_vector_size()
+    if progress.get("vector_size", dimensions) != dimensions:
+        # A reindex switched the collection to a new vector size since the last attempt
+        logger.info(f"Vector size changed to {dimensions}, storing document {document_id} from the start")
+        progress = {"batches_written": 0}
+    progress["vector_size"] = dimensions
+    start_batch = progress["batches_written"]
+    buffer_batches = _pipeline_buffer_batches()
+    chunk_send, chunk_receive = anyio.create_memory_object_stream(buffer_batches)
+    embedded_send, embedded_receive = anyio.create_memory_object_stream(buffer_batches)
+    summary = {}
+    errors = []
+
+    async def produce():
+        def send_batch(item):
+            from_thread.run(chunk_send.send, item)
+
+        try:
+            summary.update(await run_sync(
+                _produce_chunk_batches,
+                file_type, source_path, checkpoint, chunking_state, start_batch, send_batch
+            ))
+        except anyio.BrokenResourceError:
+            # A downstream stage failed and stopped consuming
+            pass
+        except Exception as e:
+            errors.append(f"Text extraction failed: {str(e)}")
+        finally:
+            await chunk_send.aclose()
+
+    async def embed():
+        failed_batch = None
+        embedding_slots = anyio.CapacityLimiter(settings.embedding_concurrency)
+        started_send, started_receive = anyio.create_memory_object_stream(settings.embedding_concurrency - 1)
+
+        async def embed_batch(batch_number: int, batch: list[dict], outcome: dict, done: anyio.Event) -> None:
+            try:
+                async with embedding_slots:
+                    embeddings = await run_sync(checkpoint.load_embeddings, batch_number)
+                    if embeddings is not None and embeddings.shape[1] != dimensions:
+                        embeddings = None
+                    failed, reason = 0, None
+                    if embeddings is None:
+                        try:
+                            result = await embed_texts([chunk["content"] for chunk in batch], dimensions)
+                            failed = len(result.failed_indices)
+                            reason = result.failures[0]["error"] if result.failures else None
+                        except Exception as e:
+                            failed, reason = len(batch), str(e)
+                        if not failed:
+                            embeddings = result.as_matrix(len(batch))
+                            await run_sync(checkpoint.save_embeddings, batch_number, embeddings)
+                    outcome.update(embeddings=embeddings, failed=failed, reason=reason)
+            finally:
+                done.set()
+
+        async def start_batches(task_group) -> None:
+            # Batches are embedded concurrently but handed on in order
+            async with started_send:
+                async for batch_number, batch in chunk_receive:
+                    outcome, done = {}, anyio.Event()
+                    task_group.start_soon(embed_batch, batch_number, batch, outcome, done)
+                    await started_send.send((batch_number, batch, outcome, done))
+
+        async with chunk_receive, embedded_send, anyio.create_task_group() as task_group:
+            task_group.start_soon(start_batches, task_group)
+            async with started_receive:
+                async for batch_number, batch, outcome, done in started_receive:
+                    await done.wait()
+                    if outcome["failed"]:
+                        if failed_batch is not None:
+                            task_group.cancel_scope.cancel()
+                            return
+                        errors.append(
+                            f"Embedding generation failed for {outcome['failed']} of {len(batch)} chunks "
+                            f"in batch {batch_number}: {outcome['reason']}"
+                        )
+                        # Let the writer finish the batches before this one, but keep
+                        # embedding later batches into the checkpoint so a retry only
+                        # has to redo the failed ones. Stop at the next failure.
+                        failed_batch = batch_number
+                        await embedded_send.aclose()
+                        continue
+                    if failed_batch is not None:
+                        continue
+                    try:
+                        await embedded_send.send((batch_number, batch, outcome["embeddings"]))
+                    except anyio.BrokenResourceError:
+                        # The write stage failed and stopped consuming
+                        task_group.cancel_scope.cancel()
+                        return
+
+    async def write():
+        replaying = True
+        async with embedded_receive:
+            async for item in embedded_receive:
+                # Take the batches already waiting, up to one full upsert request, so that
+                # store_vectors can send several requests at once when the writer is behind
+                group = [item]
+                while sum(len(batch) for _, batch, _ in group) < settings.qdrant_upsert_batch_size:
+                    try:
+                        group.append(embedded_receive.receive_nowait())
+                    except (anyio.WouldBlock, anyio.EndOfStream):
+                        break
+                chunks = [chunk for _, batch, _ in group for chunk in batch]
+
+                # Point IDs are deterministic, so replaying a partially stored batch is safe.
+                # Qdrant applies the batches in the background; they are checked before the document is ready
+                try:
+                    await store_vectors(
+                        document_id, user_id, chunks, np.vstack([embeddings for _, _, embeddings in group]),
+                        wait=False
+                    )
+                except Exception as e:
+                    errors.append(f"Vector storage failed: {str(e)}")
+                    return
+
+                for batch_number, batch, _ in group:
+                    try:
+                        if replaying:
+                            # A batch may have been written before its watermark was, so drop it before replaying
+                            await async_supabase_admin.table("chunks").delete().eq(
+                                "document_id", document_id
+                            ).gte("chunk_index", batch[0]["chunk_index"]).execute()
+                            replaying = False
+
+                        chunk_records = [
+                            {
+                                "document_id": document_id,
+                                "content": chunk["content"],
+                                "chunk_index": chunk["chunk_index"],
+                                "embedding_id": get_point_id(document_id, chunk["chunk_index"]),
+                                "metadata": chunk.get("metadata", {})
+                            }
+                            for chunk in batch
+                        ]
+                        await async_supabase_admin.table("chunks").insert(chunk_records).execute()
+                    except Exception as e:
+                        errors.append(f"Failed to save chunks: {str(e)}")
+                        return
+
+                    progress["batches_written"] = batch_number + 1
+                    await run_sync(checkpoint.save_progress, progress)
+                    logger.info(f"Stored batch {batch_number} ({len(batch)} chunks) for document {document_id}")
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(produce)
+        task_group.start_soon(embed)
+        task_group.start_soon(write)
+
+    if errors:
+        raise IngestionStageError(errors[0])
+
+    return (
+        summary["page_count"],
+        summary["chunk_count"],
+        summary.get("skipped_pages", []),
+        summary.get("duplicate_chunks", [])
+    )
+
+
+async def _record_duplicate_pages(document_id: str, duplicate_chunks: list[dict]) -> None:
+    """
+    Record the pages of dropped duplicate chunks on the chunks they duplicate.
+
+    Each kept chunk gets metadata.duplicate_pages, in Qdrant and in its chunks
+    row, so a search scoped to a page whose chunk was dropped still finds the
+    content. Runs once all batches are stored; setting the same pages again
+    on a retry is harmless.
+
+    Args:
+        document_id: The document that was ingested.
+        duplicate_chunks: Dropped chunks as recorded in the chunking summary.
+
+    Raises:
+        IngestionStageError: If the pages cannot be recorded.
+    """
+    pages_by_chunk = duplicate_pages(duplicate_chunks)
+    if not pages_by_chunk:
+        return
+
+    try:
+        await set_duplicate_pages(document_id, pages_by_chunk)
+
+        chunk_indices = sorted(pages_by_chunk)
+        for i in range(0, len(chunk_indices), WRITE_BATCH_SIZE):
+            rows_response = (
+                await async_supabase_admin.table("chunks")
+                .select("chunk_index, metadata")
+                .eq("document_id", document_id)
+                .in_("chunk_index", chunk_indices[i:i + WRITE_BATCH_SIZE])
+                .execute()
+            )
+            for row in rows_response.data or []:
+                metadata = {**(row.get("metadata") or {}), "duplicate_pages": pages_by_chunk[row["chunk_index"]]}
+                await async_supabase_admin.table("chunks").update({"metadata": metadata}).eq(
+                    "document_id", document_id
+                ).eq("chunk_index", row["chunk_index"]).execute()
+    except Exception as e:
+        raise IngestionStageError(f"Failed to record the pages of duplicate chunks: {str(e)}")
+
+    logger.info(f"Recorded the pages of duplicate chunks on {len(pages_by_chunk)} chunks of document {document_id}")
+
+
+def _describe_skipped_pages(skipped_pages: list[dict]) -> str | None:
+    """Summarize pages skipped during extraction for the document's error_message."""
+    if not skipped_pages:
+        return None
+    details = "; ".join(f"page {page['page']}: {page['reason']}" for page in skipped_pages[:10])
+    more = f" (and {len(skipped_pages) - 10} more)" if len(skipped_pages) > 10 else ""
+    return f"Skipped {len(skipped_pages)} page(s) during extraction: {details}{more}"
+
+
+async def _find_processed_duplicate(content_hash: str, document_id: str) -> dict | None:
+    """
+    Find a ready document with the same content hash.
+
+    Args:
+        content_hash: SHA-256 of the uploaded file.
+        document_id: The document being processed (excluded from the search).
+
+    Returns:
+        The matching document record, or None.
+    """
+    try:
+        response = (
+            await async_supabase_admin.table("documents")
+            .select("*")
+            .eq("content_hash", content_hash)
+            .eq("status", "ready")
+            .neq("id", document_id)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+    except Exception as e:
+        logger.warning(f"Duplicate lookup failed for document {document_id}: {e}")
+        return None
+
+
+async def _copy_processed_document(source_document: dict, document_id: str, user_id: str) -> None:
+    """
+    Copy the chunks and vectors of a processed document and mark the copy ready.
+
+    Args:
+        source_document: The ready document with identical content.
+        document_id: The document to populate.
+        user_id: The owner of the document to populate.
+    """
+    source_id = source_document["id"]
+    logger.info(f"Document {document_id} matches ready document {source_id}, reusing its chunks")
+
+    # An earlier attempt may have left rows, vectors or a checkpoint behind; start clean
+    await run_sync(IngestionCheckpoint(document_id).clear)
+    await delete_document_vectors(document_id)
+    await async_supabase_admin.table("chunks").delete().eq("document_id", document_id).execute()
+
+    id_map = await copy_document_vectors(source_id, document_id, user_id)
+
+    copied = 0
+    start = 0
+    while True:
+        chunks_response = (
+            await async_supabase_admin.table("chunks")
+            .select("content, chunk_index, embedding_id, metadata")
+            .eq("document_id", source_id)
+            .order("chunk_index")
+            .range(start, start + COPY_PAGE_SIZE - 1)
+            .execute()
+        )
+        chunks = chunks_response.data or []
+        chunk_records = [
+            {
+                "document_id": document_id,
+                "content": chunk["content"],
+                "chunk_index": chunk["chunk_index"],
+                "embedding_id": id_map.get(chunk["embedding_id"]),
+                "metadata": chunk.get("metadata") or {}
+            }
+            for chunk in chunks
+        ]
+        for i in range(0, len(chunk_records), WRITE_BATCH_SIZE):
+            batch = chunk_records[i:i + WRITE_BATCH_SIZE]
+            await async_supabase_admin.table("chunks").insert(batch).execute()
+        copied += len(chunk_records)
+        if len(chunks) < COPY_PAGE_SIZE:
+            break
+        start += COPY_PAGE_SIZE
+
+    await async_supabase_admin.table("documents").update({
+        "status": "ready",
+        "chunk_count": source_document.get("chunk_count", copied),
+        "page_count": source_document.get("page_count")
+    }).eq("id", document_id).execute()
+    logger.info(f"Document {document_id} ready with {copied} reused chunks")
+
+
+async def _discard_document_output(document_id: str) -> None:
+    """
+    Remove any chunks and vectors already written for a document.
+
+    Args:
+        document_id: The document to clean up.
+    """
+    try:
+        await delete_document_vectors(document_id)
+        await async_supabase_admin.table("chunks").delete().eq("document_id", document_id).execute()
+    except Exception as e:
+        logger.error(f"Failed to discard output for document {document_id}: {e}")
 
 
-def _mark_document_failed(document_id: str, error_message: str) -> None:
+async def _mark_document_failed(document_id: str, error_message: str) -> None:
     """
     Mark a document as failed with an error message.
 
@@ -169,7 +634,7 @@ def _mark_document_failed(document_id: str, error_message: str) -> None:
         error_message: The error message to store.
     """
     try:
-        supabase_admin.table("documents").update({
+        await async_supabase_admin.table("documents").update({
             "status": "failed",
             "error_message": error_message
         }).eq("id", document_id).execute()
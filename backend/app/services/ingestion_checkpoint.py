@@ -0,0 +1,110 @@
+"""Per-document checkpoints so failed ingestion can resume from the last completed stage."""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class IngestionCheckpoint:
+    """
+    Stage outputs of one document's ingestion, stored on local disk.
+
+    Chunks flow through ingestion in fixed-size batches, and every stage
+    checkpoints per batch. Layout under the checkpoint directory:
+        chunks-N.json       chunks of batch N
+        chunking.json       written once extraction and chunking finished
+        embeddings-N.npy    float32 embedding matrix of batch N
+        progress.json       write watermark: batches whose vectors and
+                            chunk rows are fully stored
+
+    Every file is written to a temporary name and renamed into place, so a
+    crash never leaves a half-written checkpoint behind.
+    """
+
+    def __init__(self, document_id: str):
+        base_dir = settings.ingestion_checkpoint_dir or os.path.join(
+            tempfile.gettempdir(), "autocoach-checkpoints"
+        )
+        self.path = os.path.join(base_dir, document_id)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _write_json(self, name: str, data) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self._file(f"{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._file(name))
+
+    def _read_json(self, name: str):
+        try:
+            with open(self._file(name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self._file(name)}: {e}")
+            return None
+
+    def save_chunk_batch(self, batch_number: int, chunks: list[dict]) -> None:
+        """Checkpoint one batch of chunks."""
+        self._write_json(f"chunks-{batch_number}.json", chunks)
+
+    def load_chunk_batch(self, batch_number: int) -> list[dict] | None:
+        """Return one batch of chunks, or None if it was not checkpointed."""
+        return self._read_json(f"chunks-{batch_number}.json")
+
+    def save_chunking_state(self, state: dict) -> None:
+        """Record that extraction and chunking finished (page, chunk and batch counts)."""
+        self._write_json("chunking.json", state)
+
+    def load_chunking_state(self) -> dict | None:
+        """Return the chunking summary, or None if chunking has not completed."""
+        return self._read_json("chunking.json")
+
+    def save_embeddings(self, batch_number: int, embeddings: np.ndarray) -> None:
+        """Checkpoint one batch of embeddings as a float32 matrix."""
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self._file(f"embeddings-{batch_number}.tmp.npy")
+        np.save(tmp_path, embeddings)
+        os.replace(tmp_path, self._file(f"embeddings-{batch_number}.npy"))
+
+    def load_embeddings(self, batch_number: int) -> np.ndarray | None:
+        """Return one batch of embeddings, or None if it was not checkpointed."""
+        try:
+            return np.load(self._file(f"embeddings-{batch_number}.npy"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embeddings checkpoint in {self.path}: {e}")
+            return None
+
+    def discard_embeddings(self, batch_number: int) -> None:
+        """Drop one batch's embeddings, e.g. after the batch was chunked differently."""
+        try:
+            os.remove(self._file(f"embeddings-{batch_number}.npy"))
+        except FileNotFoundError:
+            pass
+
+    def save_progress(self, progress: dict) -> None:
+        """Checkpoint the write watermark."""
+        self._write_json("progress.json", progress)
+
+    def load_progress(self) -> dict:
+        """Return the write watermark, starting from zero."""
+        return self._read_json("progress.json") or {"batches_written": 0}
+
+    def clear(self) -> None:
+        """Delete the checkpoint once the document is ready."""
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,285 @@
+"""Persistent job queue backed by a local SQLite file."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Job statuses
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Job kinds
+PROCESS_DOCUMENT = "process_document"
+
+# Error recorded on a job whose worker stopped renewing its lease on the final attempt
+LEASE_EXPIRED_ERROR = "Lease expired on final attempt"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_expires_at REAL,
+    worker_id TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim_idx ON jobs (status, available_at);
+"""
+
+
+class JobQueue:
+    """
+    Durable work queue with leases, retries and crash recovery.
+
+    A claimed job is leased to one worker until `lease_expires_at`. Workers
+    renew the lease while the job runs; if a worker dies, the lease expires
+    and the job becomes claimable again. Failed jobs are retried with
+    exponential backoff until `max_attempts` is reached.
+    """
+
+    def __init__(self, path: str, lease_seconds: int, max_attempts: int, retry_backoff_seconds: int):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode, creating the schema on first use."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    def enqueue(self, kind: str, payload: dict) -> int:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind: The job kind, e.g. PROCESS_DOCUMENT.
+            payload: JSON-serializable job arguments.
+
+        Returns:
+            The new job's ID.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), JOB_PENDING, now, now, now)
+            )
+            logger.info(f"Enqueued {kind} job {cursor.lastrowid}")
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def enqueue_unique(self, kind: str, payload: dict, key: str) -> int:
+        """
+        Add a job unless one with the same payload[key] is still active.
+
+        An existing pending job (e.g. waiting out its retry backoff) is made
+        available immediately instead; a running job is left to finish, unless
+        it is on its final attempt and so can't be retried if it fails.
+
+        Args:
+            kind: The job kind, e.g. PROCESS_DOCUMENT.
+            payload: JSON-serializable job arguments.
+            key: Payload field identifying the job's subject, e.g. "document_id".
+
+        Returns:
+            The ID of the existing or new job.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE so two requests can't both find no job and insert one
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, status FROM jobs "
+                "WHERE kind = ? AND json_extract(payload, ?) = ? "
+                "AND (status = ? OR (status = ? AND attempts < ?)) "
+                "ORDER BY id LIMIT 1",
+                (kind, f"$.{key}", payload[key], JOB_PENDING, JOB_RUNNING, self.max_attempts)
+            ).fetchone()
+            if row is not None:
+                if row["status"] == JOB_PENDING:
+                    conn.execute(
+                        "UPDATE jobs SET available_at = ?, updated_at = ? WHERE id = ?",
+                        (now, now, row["id"])
+                    )
+                conn.execute("COMMIT")
+                logger.info(f"{kind} job {row['id']} for {key}={payload[key]} is already {row['status']}")
+                return row["id"]
+
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, status, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), JOB_PENDING, now, now, now)
+            )
+            conn.execute("COMMIT")
+            logger.info(f"Enqueued {kind} job {cursor.lastrowid}")
+            return cursor.lastrowid
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str) -> dict | None:
+        """
+        Lease the oldest available job to a worker.
+
+        Pending jobs whose backoff has elapsed and running jobs whose lease
+        expired (the worker crashed) are both claimable. An expired job that
+        already used all its attempts is marked failed instead, and returned
+        with `exhausted` set so the caller can record the failure on the job's
+        subject (nobody else will); it is not leased.
+
+        Args:
+            worker_id: Identifier of the claiming worker.
+
+        Returns:
+            Dictionary with id, kind, payload, attempts and exhausted, or None
+            if no job is available.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE takes the write lock so two workers can't claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?) "
+                "ORDER BY id LIMIT 1",
+                (JOB_PENDING, now, JOB_RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            job = {
+                "id": row["id"],
+                "kind": row["kind"],
+                "payload": json.loads(row["payload"]),
+                "attempts": row["attempts"],
+                "exhausted": row["attempts"] >= self.max_attempts,
+            }
+            if job["exhausted"]:
+                logger.warning(f"Job {row['id']} lease expired after {row['attempts']} attempts, giving up")
+                conn.execute(
+                    "UPDATE jobs SET status = ?, last_error = ?, lease_expires_at = NULL, updated_at = ? "
+                    "WHERE id = ?",
+                    (JOB_FAILED, LEASE_EXPIRED_ERROR, now, row["id"])
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires_at = ?, "
+                    "worker_id = ?, updated_at = ? WHERE id = ?",
+                    (JOB_RUNNING, now + self.lease_seconds, worker_id, now, row["id"])
+                )
+                job["attempts"] += 1
+            conn.execute("COMMIT")
+            return job
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extend a job's lease.
+
+        Returns:
+            False if the worker no longer holds the lease.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (now + self.lease_seconds, now, job_id, worker_id, JOB_RUNNING)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(self, job_id: int, worker_id: str) -> None:
+        """Mark a leased job as done."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ?",
+                (JOB_DONE, time.time(), job_id, worker_id)
+            )
+        finally:
+            conn.close()
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """
+        Record a failed attempt, scheduling a retry if attempts remain.
+
+        Returns:
+            True if the job will be retried, False if it is permanently failed.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+
+            if row["attempts"] < self.max_attempts:
+                delay = self.retry_backoff_seconds * (2 ** (row["attempts"] - 1))
+                conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, lease_expires_at = NULL, "
+                    "last_error = ?, updated_at = ? WHERE id = ? AND worker_id = ?",
+                    (JOB_PENDING, now + delay, error, now, job_id, worker_id)
+                )
+                logger.info(f"Job {job_id} failed, retrying in {delay}s: {error}")
+                return True
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires_at = NULL, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND worker_id = ?",
+                (JOB_FAILED, error, now, job_id, worker_id)
+            )
+            logger.error(f"Job {job_id} failed permanently after {row['attempts']} attempts: {error}")
+            return False
+        finally:
+            conn.close()
+
+
+job_queue = JobQueue(
+    path=settings.job_queue_path,
+    lease_seconds=settings.job_lease_seconds,
+    max_attempts=settings.job_max_attempts,
+    retry_backoff_seconds=settings.job_retry_backoff_seconds,
+)
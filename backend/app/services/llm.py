@@ -2,9 +2,10 @@
 
 import logging
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.core.resources import resources
 
 logger = logging.getLogger(__name__)
 
@@ -14,8 +15,20 @@ settings = get_settings()
 KIMI_BASE_URL = "https://api.moonshot.ai/v1"
 KIMI_MODEL = "kimi-k2.5"
 
+# Shared async clients so connections are pooled across calls, created on first use
+kimi_client: AsyncOpenAI = resources.register(
+    "kimi",
+    lambda: AsyncOpenAI(api_key=settings.kimi_api_key, base_url=KIMI_BASE_URL),
+    close=lambda client: client.close()
+)
+openai_client: AsyncOpenAI = resources.register(
+    "openai_chat",
+    lambda: AsyncOpenAI(api_key=settings.openai_api_key),
+    close=lambda client: client.close()
+)
 
-def call_kimi(system_prompt: str, user_prompt: str) -> str:
+
+async def call_kimi(system_prompt: str, user_prompt: str) -> str:
     """
     Call the Kimi API to generate a response using Instant Mode.
 
@@ -29,13 +42,8 @@ def call_kimi(system_prompt: str, user_prompt: str) -> str:
         The generated response text, or empty string on failure.
     """
     try:
-        client = OpenAI(
-            api_key=settings.kimi_api_key,
-            base_url=KIMI_BASE_URL
-        )
-
         # Use Instant Mode: disable thinking for faster responses (official API format)
-        response = client.chat.completions.create(
+        response = await kimi_client.chat.completions.create(
             model=KIMI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -53,7 +61,7 @@ def call_kimi(system_prompt: str, user_prompt: str) -> str:
         return ""
 
 
-def call_openai(
+async def call_openai(
     system_prompt: str,
     user_prompt: str,
     model: str = "gpt-4o-mini",
@@ -72,9 +80,7 @@ def call_openai(
         The generated response text, or empty string on failure.
     """
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
-
-        response = client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
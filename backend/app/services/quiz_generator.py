@@ -43,11 +43,14 @@ Output format (JSON array):
 """
 
 
-def generate_quiz_questions(
+async def generate_quiz_questions(
     document_id: str,
     num_questions: int = 5,
     difficulty: str = "medium",
-    question_types: list[str] = None
+    question_types: list[str] = None,
+    page_start: int | None = None,
+    page_end: int | None = None,
+    user_id: str | None = None
 ) -> list[dict]:
     """
     Generate quiz questions from document content using LLM.
@@ -57,6 +60,9 @@ def generate_quiz_questions(
         num_questions: Number of questions to generate (default 5).
         difficulty: Difficulty level - "easy", "medium", or "hard".
         question_types: List of question types to include (mcq, true_false, free_text).
+        page_start: Optional first page/slide to draw questions from.
+        page_end: Optional last page/slide to draw questions from.
+        user_id: The owner of the document, used to search only their vectors.
 
     Returns:
         List of question dictionaries, or empty list on failure.
@@ -67,10 +73,13 @@ def generate_quiz_questions(
     try:
         # Retrieve more chunks than needed for variety
         top_k = num_questions * 3
-        chunks = retrieve_relevant_chunks(
+        chunks = await retrieve_relevant_chunks(
             query="Generate quiz questions covering key concepts",
             document_id=document_id,
-            top_k=top_k
+            top_k=top_k,
+            page_start=page_start,
+            page_end=page_end,
+            user_id=user_id
         )
 
         if not chunks:
@@ -104,11 +113,11 @@ Return ONLY a valid JSON array with no markdown formatting."""
 
         # Call Kimi API
         logger.info(f"Calling Kimi API to generate {num_questions} questions")
-        response = call_kimi(QUIZ_SYSTEM_PROMPT, user_prompt)
+        response = await call_kimi(QUIZ_SYSTEM_PROMPT, user_prompt)
 
         if not response:
             logger.warning("Kimi API returned empty response, trying OpenAI fallback")
-            response = call_openai(QUIZ_SYSTEM_PROMPT, user_prompt, temperature=0.7)
+            response = await call_openai(QUIZ_SYSTEM_PROMPT, user_prompt, temperature=0.7)
 
         if not response:
             logger.error("Both LLM APIs returned empty responses")
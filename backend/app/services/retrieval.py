@@ -3,12 +3,19 @@
 import logging
 
 from app.services.embeddings import get_embeddings
-from app.core.qdrant import search_vectors
+from app.core.qdrant import search_vectors, get_vector_size
 
 logger = logging.getLogger(__name__)
 
 
-def retrieve_relevant_chunks(query: str, document_id: str, top_k: int = 5) -> list[dict]:
+async def retrieve_relevant_chunks(
+    query: str,
+    document_id: str,
+    top_k: int = 5,
+    page_start: int | None = None,
+    page_end: int | None = None,
+    user_id: str | None = None
+) -> list[dict]:
     """
     Retrieve relevant chunks from a document based on a query.
 
@@ -16,26 +23,40 @@ def retrieve_relevant_chunks(query: str, document_id: str, top_k: int = 5) -> li
         query: The search query text.
         document_id: The ID of the document to search within.
         top_k: Number of top results to return.
+        page_start: Optional first page/slide of the range to search.
+        page_end: Optional last page/slide of the range to search.
+        user_id: The owner of the document, used to search only their vectors.
 
     Returns:
         List of dictionaries containing chunk information:
-        [{"content": str, "chunk_index": int, "score": float}]
+        [{"content": str, "chunk_index": int, "score": float,
+          "page_start": int | None, "page_end": int | None}]
     """
     try:
-        # Get embedding for the query
-        embeddings = get_embeddings([query])
-        if not embeddings:
+        # Get embedding for the query, at the size of the collection it is searched in
+        dimensions = await get_vector_size()
+        embeddings = await get_embeddings([query], dimensions)
+        if len(embeddings) == 0:
             logger.error("Failed to generate embedding for query")
             return []
         
         query_embedding = embeddings[0]
         
         # Search vectors in Qdrant
-        results = search_vectors(
-            query_embedding=query_embedding,
-            document_id=document_id,
-            top_k=top_k
-        )
+        try:
+            results = await search_vectors(
+                query_embedding=query_embedding,
+                document_id=document_id,
+                top_k=top_k,
+                page_start=page_start,
+                page_end=page_end,
+                user_id=user_id
+            )
+        except Exception:
+            # A reindex may have just switched the collection to a new vector size
+            if await get_vector_size(refresh=True) == dimensions:
+                raise
+            return await retrieve_relevant_chunks(query, document_id, top_k, page_start, page_end, user_id)
         
         logger.info(f"Retrieved {len(results)} relevant chunks for document {document_id}")
         return results
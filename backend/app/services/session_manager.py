@@ -4,19 +4,21 @@ import logging
 from datetime import datetime, timezone
 from uuid import uuid4
 
-from app.core.supabase import supabase_admin
+from app.core.supabase import async_supabase_admin
 from app.services.quiz_generator import generate_quiz_questions
 from app.services.answer_evaluator import evaluate_answer
 
 logger = logging.getLogger(__name__)
 
 
-def create_session(
+async def create_session(
     user_id: str,
     document_id: str,
     num_questions: int,
     difficulty: str,
-    question_types: list[str]
+    question_types: list[str],
+    page_start: int | None = None,
+    page_end: int | None = None
 ) -> dict:
     """
     Create a new quiz session.
@@ -27,17 +29,22 @@ def create_session(
         num_questions: Number of questions to generate.
         difficulty: Difficulty level.
         question_types: Types of questions to include.
+        page_start: Optional first page/slide to draw questions from.
+        page_end: Optional last page/slide to draw questions from.
 
     Returns:
         Dictionary with session data and first question.
     """
     try:
         # Generate quiz questions
-        questions = generate_quiz_questions(
+        questions = await generate_quiz_questions(
             document_id=document_id,
             num_questions=num_questions,
             difficulty=difficulty,
-            question_types=question_types
+            question_types=question_types,
+            page_start=page_start,
+            page_end=page_end,
+            user_id=user_id
         )
 
         if not questions:
@@ -61,7 +68,7 @@ def create_session(
             "completed_at": None
         }
 
-        supabase_admin.table("quiz_sessions").insert(session_data).execute()
+        await async_supabase_admin.table("quiz_sessions").insert(session_data).execute()
 
         # Create question records
         question_records = []
@@ -85,7 +92,7 @@ def create_session(
         # Insert questions in batches
         for i in range(0, len(question_records), 100):
             batch = question_records[i:i + 100]
-            supabase_admin.table("questions").insert(batch).execute()
+            await async_supabase_admin.table("questions").insert(batch).execute()
 
         # Get first question
         first_question = question_records[0] if question_records else None
@@ -113,7 +120,7 @@ def create_session(
         raise
 
 
-def get_session(session_id: str, user_id: str) -> dict | None:
+async def get_session(session_id: str, user_id: str) -> dict | None:
     """
     Get session status and all questions.
 
@@ -127,7 +134,7 @@ def get_session(session_id: str, user_id: str) -> dict | None:
     try:
         # Fetch session
         session_response = (
-            supabase_admin.table("quiz_sessions")
+            await async_supabase_admin.table("quiz_sessions")
             .select("*")
             .eq("id", session_id)
             .eq("user_id", user_id)
@@ -142,7 +149,7 @@ def get_session(session_id: str, user_id: str) -> dict | None:
 
         # Fetch all questions
         questions_response = (
-            supabase_admin.table("questions")
+            await async_supabase_admin.table("questions")
             .select("*")
             .eq("session_id", session_id)
             .order("question_number")
@@ -192,7 +199,7 @@ def get_session(session_id: str, user_id: str) -> dict | None:
         return None
 
 
-def get_current_question(session_id: str, user_id: str) -> dict | None:
+async def get_current_question(session_id: str, user_id: str) -> dict | None:
     """
     Get the next unanswered question in a session.
 
@@ -206,7 +213,7 @@ def get_current_question(session_id: str, user_id: str) -> dict | None:
     try:
         # Verify session exists and belongs to user
         session_response = (
-            supabase_admin.table("quiz_sessions")
+            await async_supabase_admin.table("quiz_sessions")
             .select("*")
             .eq("id", session_id)
             .eq("user_id", user_id)
@@ -225,7 +232,7 @@ def get_current_question(session_id: str, user_id: str) -> dict | None:
 
         # Get first unanswered question
         question_response = (
-            supabase_admin.table("questions")
+            await async_supabase_admin.table("questions")
             .select("*")
             .eq("session_id", session_id)
             .is_("user_answer", None)
@@ -254,7 +261,7 @@ def get_current_question(session_id: str, user_id: str) -> dict | None:
         return None
 
 
-def submit_answer(
+async def submit_answer(
     session_id: str,
     user_id: str,
     question_id: str,
@@ -277,7 +284,7 @@ def submit_answer(
     try:
         # Verify session exists and belongs to user
         session_response = (
-            supabase_admin.table("quiz_sessions")
+            await async_supabase_admin.table("quiz_sessions")
             .select("*")
             .eq("id", session_id)
             .eq("user_id", user_id)
@@ -294,7 +301,7 @@ def submit_answer(
 
         # Fetch the question
         question_response = (
-            supabase_admin.table("questions")
+            await async_supabase_admin.table("questions")
             .select("*")
             .eq("id", question_id)
             .eq("session_id", session_id)
@@ -311,7 +318,7 @@ def submit_answer(
             raise ValueError("Question already answered")
 
         # Evaluate the answer
-        eval_result = evaluate_answer(
+        eval_result = await evaluate_answer(
             question_type=question["question_type"],
             user_answer=answer,
             correct_answer=question["correct_answer"],
@@ -323,7 +330,7 @@ def submit_answer(
 
         # Update question record
         now = datetime.now(timezone.utc).isoformat()
-        supabase_admin.table("questions").update({
+        await async_supabase_admin.table("questions").update({
             "user_answer": answer,
             "is_correct": is_correct,
             "input_method": input_method,
@@ -345,7 +352,7 @@ def submit_answer(
             session_update["status"] = "completed"
             session_update["completed_at"] = now
 
-        supabase_admin.table("quiz_sessions").update(session_update).eq(
+        await async_supabase_admin.table("quiz_sessions").update(session_update).eq(
             "id", session_id
         ).execute()
 
@@ -353,7 +360,7 @@ def submit_answer(
         next_question = None
         if not is_complete:
             next_q_response = (
-                supabase_admin.table("questions")
+                await async_supabase_admin.table("questions")
                 .select("*")
                 .eq("session_id", session_id)
                 .is_("user_answer", None)
@@ -1,17 +1,43 @@
 """Text extraction services for PDF and PPTX files."""
 
 import logging
+import re
 from io import BytesIO
+from typing import Iterator, Sequence
 
+import numpy as np
 from pypdf import PdfReader
 from pptx import Presentation
 
 logger = logging.getLogger(__name__)
 
+# The characters removed: C0 controls except \t \n \r, DEL and C1 controls
+_CONTROL_CODES = [c for c in range(0xa0) if c < 0x20 and c not in (0x09, 0x0a, 0x0d) or c >= 0x7f]
+
+# ...as Latin-1 bytes, for text whose characters all fit in one byte
+_CONTROL_BYTES = bytes(_CONTROL_CODES)
+
+# ...as a lookup table over UTF-16 code units, for wider text. Surrogate
+# pairs (characters outside the BMP) are never marked.
+_CONTROL_UNITS = np.zeros(0x10000, dtype=bool)
+_CONTROL_UNITS[_CONTROL_CODES] = True
+
+# Fallback for text with lone surrogates, which can't be encoded (nor written
+# as UTF-8 to JSON/Postgres) and are removed too
+_CONTROL_CHARS_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ud800-\udfff]")
+
 
 def sanitize_text(text: str) -> str:
     """
-    Sanitize text by removing null characters and problematic unicode.
+    Sanitize text by removing null characters and other control characters.
+
+    Tabs, newlines and carriage returns are kept, as is all printable Unicode
+    (accented letters, math symbols, non-Latin scripts).
+
+    Text is filtered as a whole rather than character by character: Latin-1
+    text with `bytes.translate`, wider text with a vectorized table lookup
+    over its UTF-16 code units. Text without control characters is returned
+    as is.
 
     Args:
         text: The raw text to sanitize.
@@ -22,21 +48,89 @@ def sanitize_text(text: str) -> str:
     if not text:
         return text
 
-    # Remove null characters
-    text = text.replace('\x00', '')
-    text = text.replace('\u0000', '')
+    try:
+        data = text.encode("latin-1")
+    except UnicodeEncodeError:
+        return _sanitize_wide_text(text)
+
+    cleaned = data.translate(None, _CONTROL_BYTES)
+    if len(cleaned) == len(data):
+        return text
+    return cleaned.decode("latin-1")
+
+
+def _sanitize_wide_text(text: str) -> str:
+    """sanitize_text for text with characters beyond Latin-1."""
+    try:
+        units = np.frombuffer(text.encode("utf-16-le"), dtype=np.uint16)
+    except UnicodeEncodeError:
+        return _CONTROL_CHARS_RE.sub("", text)
+
+    controls = _CONTROL_UNITS.take(units)
+    if not controls.any():
+        return text
+    return units[~controls].tobytes().decode("utf-16-le")
+
+
+def _open_source(source: str | bytes):
+    """Return something the PDF/PPTX readers can open: a path or an in-memory file."""
+    return source if isinstance(source, str) else BytesIO(source)
+
+
+def open_pdf_pages(source: str | bytes) -> Sequence:
+    """Open a PDF and return its pages without extracting any text."""
+    return PdfReader(_open_source(source)).pages
+
 
-    # Remove other control characters except newlines (\n), tabs (\t), and carriage returns (\r)
-    # Control characters are in range 0x00-0x1F and 0x7F
-    cleaned_chars = []
-    for char in text:
-        code = ord(char)
-        # Allow printable characters (32-126), newlines (10), tabs (9), carriage returns (13)
-        if (32 <= code <= 126) or code in (9, 10, 13):
-            cleaned_chars.append(char)
-        # Skip other control characters (including null 0x00)
+def pdf_page_text(page) -> str:
+    """Return the sanitized text of one PDF page ("" if it has none)."""
+    return sanitize_text(page.extract_text() or "")
 
-    return ''.join(cleaned_chars)
+
+def open_pptx_slides(source: str | bytes) -> Sequence:
+    """Open a PowerPoint file and return its slides without extracting any text."""
+    return Presentation(_open_source(source)).slides
+
+
+def pptx_slide_text(slide) -> str:
+    """Return the sanitized text of one slide ("" if it has none)."""
+    slide_texts = []
+    for shape in slide.shapes:
+        if hasattr(shape, "text_frame"):
+            text_frame = shape.text_frame
+            for paragraph in text_frame.paragraphs:
+                paragraph_text = paragraph.text.strip()
+                if paragraph_text:
+                    slide_texts.append(paragraph_text)
+    return sanitize_text("\n".join(slide_texts))
+
+
+def iter_pdf_pages(source: str | bytes) -> Iterator[str]:
+    """
+    Extract text from a PDF file one page at a time, in this process.
+
+    Args:
+        source: Path to the PDF file, or its raw bytes.
+
+    Yields:
+        The sanitized text of each page, in order ("" for pages without text).
+    """
+    for page in open_pdf_pages(source):
+        yield pdf_page_text(page)
+
+
+def iter_pptx_slides(source: str | bytes) -> Iterator[str]:
+    """
+    Extract text from a PowerPoint file one slide at a time, in this process.
+
+    Args:
+        source: Path to the PPTX file, or its raw bytes.
+
+    Yields:
+        The sanitized text of each slide, in order ("" for slides without text).
+    """
+    for slide in open_pptx_slides(source):
+        yield pptx_slide_text(slide)
 
 
 def extract_text_from_pdf(file_bytes: bytes) -> tuple[str, int]:
@@ -50,18 +144,9 @@ def extract_text_from_pdf(file_bytes: bytes) -> tuple[str, int]:
         A tuple of (full_text, page_count). Returns empty string and 0 if extraction fails.
     """
     try:
-        pdf_file = BytesIO(file_bytes)
-        reader = PdfReader(pdf_file)
-
-        pages_text = []
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                pages_text.append(text)
-
-        full_text = "\n".join(pages_text)
-        full_text = sanitize_text(full_text)
-        page_count = len(reader.pages)
+        pages_text = list(iter_pdf_pages(file_bytes))
+        full_text = "\n".join(text for text in pages_text if text)
+        page_count = len(pages_text)
 
         logger.info(f"Extracted {page_count} pages from PDF, {len(full_text)} characters")
         return full_text, page_count
@@ -81,25 +166,9 @@ def extract_text_from_pptx(file_bytes: bytes) -> tuple[str, int]:
         A tuple of (full_text, slide_count). Returns empty string and 0 if extraction fails.
     """
     try:
-        pptx_file = BytesIO(file_bytes)
-        presentation = Presentation(pptx_file)
-
-        slides_text = []
-        for slide_num, slide in enumerate(presentation.slides, 1):
-            slide_texts = []
-            for shape in slide.shapes:
-                if hasattr(shape, "text_frame"):
-                    text_frame = shape.text_frame
-                    for paragraph in text_frame.paragraphs:
-                        paragraph_text = paragraph.text.strip()
-                        if paragraph_text:
-                            slide_texts.append(paragraph_text)
-            if slide_texts:
-                slides_text.append(f"\n".join(slide_texts))
-
-        full_text = "\n\n".join(slides_text)
-        full_text = sanitize_text(full_text)
-        slide_count = len(presentation.slides)
+        slides_text = list(iter_pptx_slides(file_bytes))
+        full_text = "\n\n".join(text for text in slides_text if text)
+        slide_count = len(slides_text)
 
         logger.info(f"Extracted {slide_count} slides from PPTX, {len(full_text)} characters")
         return full_text, slide_count
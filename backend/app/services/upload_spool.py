@@ -0,0 +1,265 @@
+"""Local spool of uploaded files awaiting ingestion."""
+
+import hashlib
+import logging
+import os
+import tempfile
+from typing import AsyncIterator, Callable
+
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+
+from app.config import get_settings
+from app.core.concurrency import run_sync
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Room for multipart boundaries, part headers and small form fields on top of
+# the file itself when checking a request's Content-Length
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the allowed size."""
+
+
+class InvalidUploadError(Exception):
+    """Raised when a request body is not a multipart form with the expected file."""
+
+
+class SpooledUpload:
+    """A file received from a multipart upload and written to the spool."""
+
+    def __init__(self, spool_path: str, size: int, sha256: str, filename: str, content_type: str | None):
+        self.spool_path = spool_path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.content_type = content_type
+
+
+class _MultipartFileReader:
+    """
+    Incremental multipart parser that picks out one file field.
+
+    Data of the file part is collected per `write` call so the caller can
+    size-check, hash and store it before feeding the next chunk; everything
+    else in the form is discarded.
+    """
+
+    def __init__(self, boundary: bytes, field_name: str):
+        self.field_name = field_name
+        self.filename: str | None = None
+        self.content_type: str | None = None
+        self.file_started = False
+        self.file_finished = False
+        self.finished = False
+        self._pieces: list[bytes] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name != self.field_name or self.file_started:
+            return
+        self._in_file = True
+        self.file_started = True
+        self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        content_type = self._headers.get(b"content-type")
+        self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pieces.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self.file_finished = True
+
+    def _on_end(self) -> None:
+        self.finished = True
+
+    def write(self, chunk: bytes) -> list[bytes]:
+        """Parse a chunk of the body and return the file data it contained."""
+        self._parser.write(chunk)
+        pieces, self._pieces = self._pieces, []
+        return pieces
+
+
+def check_content_length(content_length: str | None, max_bytes: int) -> None:
+    """
+    Reject a multipart upload from its Content-Length, before reading the body.
+
+    Args:
+        content_length: The request's Content-Length header, if any.
+        max_bytes: Maximum allowed size of the uploaded file.
+
+    Raises:
+        InvalidUploadError: If the header is not a number.
+        UploadTooLargeError: If the body can't fit a file within max_bytes.
+    """
+    if content_length is None:
+        return
+    try:
+        length = int(content_length)
+    except ValueError:
+        raise InvalidUploadError("Invalid Content-Length header")
+    if length > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+
+
+def get_spool_dir() -> str:
+    """Return the spool directory, creating it if needed."""
+    spool_dir = settings.upload_spool_dir or os.path.join(tempfile.gettempdir(), "autocoach-uploads")
+    os.makedirs(spool_dir, exist_ok=True)
+    return spool_dir
+
+
+def get_spool_path(document_id: str) -> str:
+    """Return the spool file path for a document."""
+    return os.path.join(get_spool_dir(), f"{document_id}.upload")
+
+
+async def spool_upload(
+    document_id: str,
+    content_type: str | None,
+    body: AsyncIterator[bytes],
+    max_bytes: int,
+    field_name: str = "file",
+    validate_filename: Callable[[str], None] | None = None
+) -> SpooledUpload:
+    """
+    Stream the file field of a multipart request body to the spool.
+
+    The body is parsed as it arrives, so the upload is never held in memory
+    or buffered to a temporary file first: each chunk of file data is
+    size-checked, hashed and written before the next chunk is read. The file
+    is written under a temporary name and renamed into place so a reader
+    never sees a partial spool.
+
+    Args:
+        document_id: The document the upload belongs to.
+        content_type: The request's Content-Type header.
+        body: The request body, e.g. `request.stream()`.
+        max_bytes: Maximum allowed size of the uploaded file.
+        field_name: Name of the form field holding the file.
+        validate_filename: Called with the filename as soon as the file's
+            part headers arrive; raises to reject the upload before its
+            content is read.
+
+    Returns:
+        The spooled upload.
+
+    Raises:
+        InvalidUploadError: If the body is not multipart or has no such file.
+        UploadTooLargeError: As soon as the file exceeds max_bytes.
+    """
+    media_type, options = parse_options_header(content_type or "")
+    boundary = options.get(b"boundary")
+    if media_type != b"multipart/form-data" or not boundary:
+        raise InvalidUploadError("Expected a multipart/form-data body")
+
+    reader = _MultipartFileReader(boundary, field_name)
+    spool_path = get_spool_path(document_id)
+    tmp_path = f"{spool_path}.part"
+    digest = hashlib.sha256()
+    size = 0
+    validated = False
+
+    try:
+        with open(tmp_path, "wb") as f:
+            async for chunk in body:
+                try:
+                    pieces = reader.write(chunk)
+                except Exception as e:
+                    raise InvalidUploadError(f"Malformed multipart body: {e}")
+                if reader.file_started and not validated:
+                    validated = True
+                    if validate_filename is not None:
+                        validate_filename(reader.filename or "")
+                if not pieces:
+                    continue
+                data = b"".join(pieces)
+                size += len(data)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                digest.update(data)
+                await run_sync(f.write, data)
+        if not reader.file_started:
+            raise InvalidUploadError(f"Missing form field '{field_name}'")
+        if not reader.file_finished or not reader.finished:
+            raise InvalidUploadError("Incomplete multipart body")
+        os.replace(tmp_path, spool_path)
+    except BaseException:
+        remove_spool(tmp_path)
+        raise
+
+    return SpooledUpload(spool_path, size, digest.hexdigest(), reader.filename or "", reader.content_type)
+
+
+def has_spool(spool_path: str | None) -> bool:
+    """Return whether a spooled upload is available on this node."""
+    return bool(spool_path) and os.path.isfile(spool_path)
+
+
+def write_spool(document_id: str, file_bytes: bytes) -> str:
+    """
+    Write a file that was downloaded from storage to the spool.
+
+    Args:
+        document_id: The document the file belongs to.
+        file_bytes: The file content.
+
+    Returns:
+        The spool file path.
+    """
+    spool_path = get_spool_path(document_id)
+    tmp_path = f"{spool_path}.part"
+    with open(tmp_path, "wb") as f:
+        f.write(file_bytes)
+    os.replace(tmp_path, spool_path)
+    return spool_path
+
+
+def remove_spool(spool_path: str | None) -> None:
+    """Delete a spooled upload if it exists."""
+    if not spool_path:
+        return
+    try:
+        os.remove(spool_path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to remove spool {spool_path}: {e}")
@@ -0,0 +1,206 @@
+"""
+Ingestion worker process.
+
+Runs queued jobs outside the API process so document parsing, embedding and
+vector upserts never compete with request handling.
+
+Usage:
+    python -m app.worker [--concurrency N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+import time
+
+from app.config import get_settings
+from app.core.concurrency import run_sync
+from app.core.resources import resources
+from app.services.ingestion import process_document, _mark_document_failed
+from app.services.job_queue import job_queue, PROCESS_DOCUMENT, LEASE_EXPIRED_ERROR
+from app.services.upload_spool import get_spool_path, remove_spool
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+async def _renew_lease(job_id: int, worker_id: str) -> None:
+    """
+    Keep renewing a job's lease while it runs; return once the lease is lost.
+
+    A renewal that fails (e.g. the queue database is busy) is retried until
+    the lease would have expired, since another worker may claim it then.
+    """
+    interval = max(job_queue.lease_seconds / 3, 1)
+    renewed_at = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await run_sync(job_queue.renew, job_id, worker_id):
+                logger.warning(f"Lost lease on job {job_id}")
+                return
+            renewed_at = time.monotonic()
+        except Exception as e:
+            if time.monotonic() - renewed_at + interval >= job_queue.lease_seconds:
+                logger.error(f"Failed to renew lease on job {job_id}, giving it up: {e}")
+                return
+            logger.warning(f"Failed to renew lease on job {job_id}, retrying: {e}")
+
+
+async def _execute_job(job: dict) -> tuple[bool, str | None]:
+    """Run a claimed job, returning whether it succeeded and the error if not."""
+    try:
+        if job["kind"] == PROCESS_DOCUMENT:
+            document_id = job["payload"]["document_id"]
+            logger.info(f"Job {job['id']} (attempt {job['attempts']}): processing document {document_id}")
+            succeeded = await process_document(document_id, job["payload"].get("spool_path"))
+            return succeeded, None if succeeded else f"Processing failed for document {document_id}"
+        return False, f"Unknown job kind: {job['kind']}"
+    except Exception as e:
+        return False, f"Unexpected error: {str(e)}"
+
+
+async def _remove_job_spools(job: dict) -> None:
+    """Delete the spooled upload (or download) of a document job that won't run again."""
+    if job["kind"] == PROCESS_DOCUMENT:
+        await run_sync(remove_spool, job["payload"].get("spool_path"))
+        await run_sync(remove_spool, get_spool_path(job["payload"]["document_id"]))
+
+
+async def _fail_exhausted_job(job: dict) -> None:
+    """
+    Record the failure of a job whose final attempt was lost with its worker.
+
+    The queue has already marked the job failed; the document is marked
+    failed too, so it doesn't stay 'processing' and can be reprocessed.
+    """
+    logger.error(f"Job {job['id']} was interrupted on its final attempt ({job['attempts']})")
+    if job["kind"] == PROCESS_DOCUMENT:
+        await _mark_document_failed(
+            job["payload"]["document_id"], f"Processing was interrupted: {LEASE_EXPIRED_ERROR.lower()}"
+        )
+    await _remove_job_spools(job)
+
+
+async def run_job(job: dict, worker_id: str) -> None:
+    """
+    Execute a claimed job and record its outcome.
+
+    The job is cancelled if its lease is lost, so it never runs on two
+    workers at once; whoever claims it next resumes from its checkpoint.
+
+    Args:
+        job: The claimed job from JobQueue.claim.
+        worker_id: Identifier of the worker holding the lease.
+    """
+    execution = asyncio.create_task(_execute_job(job))
+    heartbeat = asyncio.create_task(_renew_lease(job["id"], worker_id))
+    await asyncio.wait({execution, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    heartbeat.cancel()
+    if not execution.done():
+        execution.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await execution
+        logger.warning(f"Cancelled job {job['id']} after losing its lease")
+        return
+    succeeded, error = execution.result()
+
+    try:
+        if succeeded:
+            await run_sync(job_queue.complete, job["id"], worker_id)
+            will_retry = False
+        else:
+            will_retry = await run_sync(job_queue.fail, job["id"], worker_id, error)
+    except Exception as e:
+        # The lease expires and the job is claimed again
+        logger.error(f"Failed to record the outcome of job {job['id']}: {e}")
+        return
+
+    # The spool (uploaded or downloaded) is only needed while the job can still run
+    if not will_retry:
+        await _remove_job_spools(job)
+
+
+async def _worker_loop(slot: int, worker_id: str, stop: asyncio.Event) -> None:
+    """Claim and run jobs one at a time until asked to stop."""
+    slot_id = f"{worker_id}-{slot}"
+    while not stop.is_set():
+        try:
+            job = await run_sync(job_queue.claim, slot_id)
+        except Exception as e:
+            logger.error(f"Failed to claim job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.worker_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        if job["exhausted"]:
+            await _fail_exhausted_job(job)
+        else:
+            await run_job(job, slot_id)
+
+
+async def run_worker(concurrency: int) -> None:
+    """
+    Run `concurrency` job loops until SIGINT/SIGTERM.
+
+    In-flight jobs finish before the worker exits; jobs of a killed worker are
+    picked up again once their lease expires.
+
+    Args:
+        concurrency: Number of jobs to process at the same time.
+    """
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    stop = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Build the shared clients off the event loop (those used by coroutines
+    # first, so the startup checks don't wait on their creation) and wait for
+    # dependencies (e.g. the Qdrant collection) before claiming jobs, unless
+    # asked to stop
+    await resources.create_all(include_blocking=False)
+    startup = asyncio.gather(resources.create_all(), resources.run_startup_checks())
+    stopping = asyncio.create_task(stop.wait())
+    await asyncio.wait({startup, stopping}, return_when=asyncio.FIRST_COMPLETED)
+    for task in (startup, stopping):
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    try:
+        if resources.ready:
+            logger.info(f"Worker {worker_id} started with concurrency {concurrency}")
+            await asyncio.gather(*(_worker_loop(slot, worker_id, stop) for slot in range(concurrency)))
+    finally:
+        await resources.aclose()
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AutoCoach ingestion worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.worker_concurrency,
+        help="Number of jobs to process at the same time"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
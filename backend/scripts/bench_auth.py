@@ -0,0 +1,125 @@
+"""
+Benchmark local token verification against the remote Supabase check.
+
+Runs without a Supabase project: the remote path talks to a stub auth
+server on localhost that answers /auth/v1/user after --rtt-ms, standing in
+for the network round trip to the auth server.
+
+Usage (from backend/):
+    python scripts/bench_auth.py [--requests 2000] [--rtt-ms 30]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USER_ID = str(uuid4())
+
+
+class _StubAuthHandler(BaseHTTPRequestHandler):
+    rtt_seconds = 0.0
+
+    def do_GET(self):
+        time.sleep(self.rtt_seconds)
+        body = json.dumps({
+            "id": USER_ID, "aud": "authenticated", "role": "authenticated",
+            "app_metadata": {}, "user_metadata": {}, "created_at": "2024-01-01T00:00:00Z",
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub_server(rtt_ms: float) -> str:
+    _StubAuthHandler.rtt_seconds = rtt_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAuthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:28s} mean {statistics.mean(latencies) * 1e6:9.1f} us   p99 {p99 * 1e6:9.1f} us")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=30.0, help="Simulated auth server round trip")
+    args = parser.parse_args()
+
+    stub_url = _start_stub_server(args.rtt_ms)
+    os.environ.update({
+        "SUPABASE_URL": stub_url, "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "SUPABASE_JWT_SECRET": "bench-secret-bench-secret-bench-secret",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x",
+    })
+
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from jwt import PyJWK
+    from app.api.routes import documents
+    from app.core import auth
+
+    now = int(time.time())
+    claims = {"sub": USER_ID, "aud": "authenticated", "exp": now + 3600, "iat": now}
+
+    # Asymmetric tokens are checked against a pre-loaded JWKS key
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public_jwk = json.loads(jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key()))
+    public_jwk.update(kid="bench", use="sig", alg="ES256")
+    auth.signing_key_cache._keys = {"bench": PyJWK(public_jwk)}
+    auth.signing_key_cache._fetched_at = time.monotonic()
+
+    def tokens(algorithm: str):
+        for i in range(args.requests):
+            # A distinct jti per token keeps the token cache out of the measurement
+            payload = {**claims, "jti": str(i)}
+            if algorithm == "HS256":
+                yield jwt.encode(payload, os.environ["SUPABASE_JWT_SECRET"], algorithm="HS256")
+            else:
+                yield jwt.encode(payload, private_key, algorithm="ES256", headers={"kid": "bench"})
+
+    async def measure(token_list: list[str]) -> list[float]:
+        latencies = []
+        for token in token_list:
+            start = time.perf_counter()
+            user_id = await documents.get_user_id_from_token(f"Bearer {token}")
+            latencies.append(time.perf_counter() - start)
+            assert str(user_id) == USER_ID
+        return latencies
+
+    _report("local HS256", await measure(list(tokens("HS256"))))
+    _report("local ES256 (JWKS)", await measure(list(tokens("ES256"))))
+
+    auth.token_cache.clear()
+    hit_token = next(tokens("HS256"))
+    await documents.get_user_id_from_token(f"Bearer {hit_token}")
+    _report("token cache hit", await measure([hit_token] * args.requests))
+
+    # Tokens that can't be verified locally (no secret configured) go to the auth server
+    auth.settings.supabase_jwt_secret = ""
+    remote_tokens = [
+        jwt.encode({**claims, "jti": f"remote-{i}"}, "other-secret", algorithm="HS256")
+        for i in range(min(args.requests, 200))
+    ]
+    _report(f"remote check (rtt {args.rtt_ms:g} ms)", await measure(remote_tokens))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+"""
+Compare the native chunker with LangChain's RecursiveCharacterTextSplitter.
+
+Checks that chunk_text produces the same chunks as the LangChain splitter
+it replaced (split_text, then strip and drop empty chunks) on randomized
+inputs, and that every chunk's char_start/char_end point back at its
+content. Then times both on several MB of synthetic pages, with and
+without newlines, plus iter_chunks streaming the pages. LangChain is only
+used if langchain-text-splitters is installed (it is no longer a
+dependency); otherwise only the native chunker is checked and timed.
+Exits non-zero on any mismatch.
+
+Usage (from backend/):
+    python scripts/bench_chunking.py [--mb 5] [--cases 300]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.chunking import chunk_text, iter_chunks
+
+try:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+except ImportError:
+    RecursiveCharacterTextSplitter = None
+
+WORDS = "the derivative of a function measures how its output changes as the input changes".split()
+
+
+def _random_text(rng: random.Random) -> str:
+    """Words with a mix of spaces, newlines and paragraph breaks, and the odd unbreakable run."""
+    pieces = []
+    for _ in range(rng.randint(0, 400)):
+        roll = rng.random()
+        if roll < 0.02:
+            pieces.append("x" * rng.randint(50, 3000))
+        elif roll < 0.05:
+            pieces.append("\n\n")
+        elif roll < 0.12:
+            pieces.append("\n")
+        elif roll < 0.14:
+            pieces.append("   ")
+        else:
+            pieces.append(rng.choice(WORDS) + " ")
+    return "".join(pieces)
+
+
+def _pages(megabytes: float, newlines: bool) -> list[str]:
+    rng = random.Random(0)
+    pages = []
+    size = 0
+    while size < megabytes * 1e6:
+        lines = [" ".join(rng.choices(WORDS, k=rng.randint(5, 14))) for _ in range(40)]
+        page = "\n".join(lines) if newlines else " ".join(lines)
+        pages.append(page)
+        size += len(page)
+    return pages
+
+
+def _langchain_chunks(text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+    """What chunk_text returned when it was built on the LangChain splitter."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, is_separator_regex=False
+    )
+    return [chunk.strip() for chunk in splitter.split_text(text) if chunk.strip()]
+
+
+def _check_equivalence(cases: int) -> int:
+    rng = random.Random(1)
+    mismatches = 0
+    for case in range(cases):
+        text = _random_text(rng)
+        chunk_size = rng.choice([50, 100, 300, 1000])
+        chunk_overlap = rng.randint(0, chunk_size // 2)
+        chunks = chunk_text(text, chunk_size, chunk_overlap)
+        for chunk in chunks:
+            metadata = chunk["metadata"]
+            if text[metadata["char_start"]:metadata["char_end"]] != chunk["content"]:
+                print(f"case {case}: offsets of chunk {chunk['chunk_index']} don't match its content")
+                mismatches += 1
+                break
+        if RecursiveCharacterTextSplitter is not None:
+            if [chunk["content"] for chunk in chunks] != _langchain_chunks(text, chunk_size, chunk_overlap):
+                print(f"case {case}: chunks differ from LangChain (chunk_size {chunk_size}, overlap {chunk_overlap})")
+                mismatches += 1
+    return mismatches
+
+
+def _time(func) -> tuple[float, int]:
+    start = time.perf_counter()
+    count = len(func())
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, default=5, help="Size of each synthetic corpus")
+    parser.add_argument("--cases", type=int, default=300, help="Randomized inputs to compare")
+    args = parser.parse_args()
+
+    if RecursiveCharacterTextSplitter is None:
+        print("langchain-text-splitters is not installed; checking offsets and timing the native chunker only")
+
+    mismatches = _check_equivalence(args.cases)
+    compared = "offsets" if RecursiveCharacterTextSplitter is None else "output and offsets"
+    print(f"{args.cases} randomized inputs: {compared} {'OK' if not mismatches else f'{mismatches} MISMATCHES'}")
+
+    for newlines in (True, False):
+        pages = _pages(args.mb, newlines)
+        text = "\n".join(pages)
+        name = f"{len(text) / 1e6:.1f} MB, {'with' if newlines else 'no'} newlines"
+
+        native_seconds, native_count = _time(lambda: chunk_text(text))
+        stream_seconds, stream_count = _time(lambda: list(iter_chunks(pages)))
+        line = (f"{name:28s} chunk_text {native_seconds:6.2f} s ({native_count} chunks)   "
+                f"iter_chunks {stream_seconds:6.2f} s ({stream_count} chunks)")
+        if RecursiveCharacterTextSplitter is not None:
+            langchain_seconds, langchain_count = _time(lambda: _langchain_chunks(text, 1000, 200))
+            line += f"   LangChain {langchain_seconds:6.2f} s ({langchain_count} chunks)"
+            if langchain_count != native_count:
+                mismatches += 1
+        print(line)
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Measure /health and /documents/ latency while quiz generations are in flight.
+
+The app runs in this process on one event loop, as under uvicorn. Supabase
+(PostgREST), OpenAI embeddings and the Kimi chat API are served by a stub
+HTTP server in a separate process (so it doesn't compete for this
+process's GIL), with chat completions taking --llm-seconds, and Qdrant
+runs in memory. A request handler that blocked the loop on any of
+these calls would show up directly in the p99 of the cheap endpoints.
+The stub's own round trip is reported too, since /documents/ includes one.
+
+Usage (from backend/):
+    python scripts/bench_concurrency.py [--generations 20] [--probes 300] [--llm-seconds 2]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USER_ID = UUID(int=1)
+DOCUMENT_ID = str(uuid4())
+DIMENSIONS = 1536
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    llm_seconds = 0.0
+
+    def _send(self, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # PostgREST select on documents
+        self._send([{
+            "id": DOCUMENT_ID, "user_id": str(USER_ID), "filename": "book.pdf", "file_type": "pdf",
+            "file_size": 1024, "status": "ready", "created_at": "2024-01-01T00:00:00+00:00",
+        }])
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        if self.path.endswith("/embeddings"):
+            vector = base64.b64encode(bytes(4 * DIMENSIONS)).decode()
+            self._send({
+                "object": "list", "model": request["model"],
+                "data": [{"object": "embedding", "index": i, "embedding": vector} for i in range(len(request["input"]))],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            })
+        else:
+            time.sleep(self.llm_seconds)
+            questions = [{
+                "question_type": "true_false", "question_text": "Is this a benchmark?",
+                "correct_answer": "true", "explanation": "It is.",
+            }]
+            self._send({
+                "id": "bench", "object": "chat.completion", "created": 0, "model": request["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(questions)}}],
+            })
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_stub(llm_seconds: float, port_queue) -> None:
+    _StubHandler.llm_seconds = llm_seconds
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _percentiles(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return f"p50 {p50 * 1e3:7.2f} ms   p99 {p99 * 1e3:7.2f} ms"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--generations", type=int, default=20, help="Quiz generations kept in flight")
+    parser.add_argument("--probes", type=int, default=300, help="Requests per probed endpoint")
+    parser.add_argument("--llm-seconds", type=float, default=2.0, help="Simulated LLM latency")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    stub = context.Process(target=_serve_stub, args=(args.llm_seconds, port_queue), daemon=True)
+    stub.start()
+    stub_url = f"http://127.0.0.1:{port_queue.get()}"
+    os.environ.update({
+        "SUPABASE_URL": stub_url, "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+        "EMBEDDING_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3"),
+    })
+
+    import httpx
+    import numpy as np
+    from openai import AsyncOpenAI
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+    from app.api.routes.documents import get_user_id_from_token
+    from app.core.resources import resources
+    from app.main import app
+
+    app.dependency_overrides[get_user_id_from_token] = lambda: USER_ID
+    resources._factories["openai_embeddings"] = lambda: AsyncOpenAI(api_key="x", base_url=stub_url, max_retries=0)
+    resources._factories["kimi"] = lambda: AsyncOpenAI(api_key="x", base_url=stub_url)
+    qdrant = AsyncQdrantClient(":memory:")
+    resources._factories["async_qdrant"] = lambda: qdrant
+    await qdrant.create_collection("documents", vectors_config=VectorParams(size=DIMENSIONS, distance=Distance.COSINE))
+    await qdrant.upsert("documents", [
+        PointStruct(
+            id=i, vector=np.random.rand(DIMENSIONS).tolist(),
+            payload={"user_id": str(USER_ID), "document_id": DOCUMENT_ID, "content": f"chunk {i}",
+                     "chunk_index": i, "metadata": {}},
+        )
+        for i in range(50)
+    ])
+
+    targets = {"/health": "/health", "/documents/": "/documents/", "stub round trip": f"{stub_url}/rest/v1/documents"}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://app") as client, \
+            httpx.AsyncClient() as direct:
+        async def probe(name: str) -> list[float]:
+            url = targets[name]
+            http = direct if url.startswith("http") else client
+            latencies = []
+            for _ in range(args.probes):
+                start = time.perf_counter()
+                response = await http.get(url)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+                await asyncio.sleep(0.005)
+            return latencies
+
+        async def generate_quizzes(stop: asyncio.Event, completed: list[int]) -> None:
+            while not stop.is_set():
+                response = await client.post("/quiz/generate", json={"document_id": DOCUMENT_ID, "num_questions": 1})
+                assert response.status_code == 200, response.text
+                completed[0] += 1
+
+        # Warm up clients and connection pools
+        await client.get("/documents/")
+        await client.post("/quiz/generate", json={"document_id": DOCUMENT_ID, "num_questions": 1})
+
+        idle = {name: await probe(name) for name in targets}
+
+        stop = asyncio.Event()
+        completed = [0]
+        generators = [asyncio.create_task(generate_quizzes(stop, completed)) for _ in range(args.generations)]
+        await asyncio.sleep(0.5)
+        loaded = {name: await probe(name) for name in targets}
+        stop.set()
+        await asyncio.gather(*generators)
+
+    print(f"{args.generations} quiz generations in flight, LLM latency {args.llm_seconds:g}s "
+          f"({completed[0]} completed during the run)")
+    for name in targets:
+        print(f"{name:16s} idle   {_percentiles(idle[name])}")
+        print(f"{name:16s} loaded {_percentiles(loaded[name])}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""
+Measure embedding throughput: serial fixed-size batches vs concurrent token-budgeted batches.
+
+The OpenAI embeddings API is played by a stub HTTP server in a separate
+process, answering each request after --latency-ms and returning a 429
+with retry-after on every --rate-limit-every'th request. Each mode embeds
+its own texts with an empty cache, so every text goes to the stub, and the
+output is checked to be in input order.
+
+Usage (from backend/):
+    python scripts/bench_embeddings.py [--chunks 2000] [--latency-ms 200] [--rate-limit-every 7] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+DIMENSIONS = 1536
+# Batch size of the serial baseline (the old fixed 100-text batches)
+SERIAL_BATCH_SIZE = 100
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency_seconds = 0.0
+    rate_limit_every = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def _send(self, status: int, payload, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.lock:
+            type(self).requests += 1
+            rate_limited = self.rate_limit_every and self.requests % self.rate_limit_every == 0
+        time.sleep(self.latency_seconds)
+        if rate_limited:
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}}, {"retry-after": "0.2"})
+            return
+        # Each vector's first component is the input's number, so order can be checked
+        data = []
+        for i, text in enumerate(request["input"]):
+            vector = np.zeros(request["dimensions"], dtype=np.float32)
+            vector[0] = float(text.split()[1])
+            data.append({"object": "embedding", "index": i, "embedding": base64.b64encode(vector.tobytes()).decode()})
+        # Answer in reverse order, as the API is free to
+        self._send(200, {
+            "object": "list", "model": request["model"], "data": data[::-1],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        })
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_stub(latency_seconds: float, rate_limit_every: int, port_queue) -> None:
+    _StubHandler.latency_seconds = latency_seconds
+    _StubHandler.rate_limit_every = rate_limit_every
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _texts(mode: str, count: int) -> list[str]:
+    """About 1000 characters per text, like a chunk; the mode keeps the two runs' cache keys apart."""
+    return [f"{mode} {i} " + "lorem ipsum dolor sit amet " * 37 for i in range(count)]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=2000, help="Texts to embed per mode")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Simulated API latency per request")
+    parser.add_argument("--rate-limit-every", type=int, default=7, help="Answer every Nth request with a 429 (0: never)")
+    parser.add_argument("--concurrency", type=int, default=4, help="EMBEDDING_CONCURRENCY")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    stub = context.Process(
+        target=_serve_stub, args=(args.latency_ms / 1000, args.rate_limit_every, port_queue), daemon=True
+    )
+    stub.start()
+    stub_url = f"http://127.0.0.1:{port_queue.get()}"
+    os.environ.update({
+        "SUPABASE_URL": stub_url, "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+        "EMBEDDING_CACHE_PATH": os.path.join(tempfile.mkdtemp(), "embeddings.sqlite3"),
+        "EMBEDDING_CONCURRENCY": str(args.concurrency), "EMBEDDING_DIMENSIONS": str(DIMENSIONS),
+    })
+
+    from openai import AsyncOpenAI
+    from app.core.resources import resources
+    from app.services.embeddings import _embed_batch, _plan_batches, embed_texts
+
+    resources._factories["openai_embeddings"] = lambda: AsyncOpenAI(api_key="x", base_url=stub_url, max_retries=0)
+
+    def check_order(matrix: np.ndarray) -> None:
+        assert matrix.shape == (args.chunks, DIMENSIONS), matrix.shape
+        assert np.array_equal(matrix[:, 0], np.arange(args.chunks, dtype=np.float32)), "embeddings out of order"
+
+    texts = _texts("serial", args.chunks)
+    start = time.perf_counter()
+    matrix = np.vstack([
+        await _embed_batch(texts[i:i + SERIAL_BATCH_SIZE], DIMENSIONS)
+        for i in range(0, len(texts), SERIAL_BATCH_SIZE)
+    ])
+    serial_seconds = time.perf_counter() - start
+    check_order(matrix)
+
+    texts = _texts("concurrent", args.chunks)
+    start = time.perf_counter()
+    result = await embed_texts(texts, DIMENSIONS)
+    concurrent_seconds = time.perf_counter() - start
+    assert result.complete, result.failures
+    check_order(result.as_matrix(len(texts)))
+
+    rate_limits = f"429 on every {args.rate_limit_every}th request" if args.rate_limit_every else "no 429s"
+    print(f"{args.chunks} chunks, API latency {args.latency_ms:g} ms, {rate_limits}")
+    serial_batches = -(-args.chunks // SERIAL_BATCH_SIZE)
+    print(f"serial      {serial_batches:4d} batches of {SERIAL_BATCH_SIZE}       "
+          f"{serial_seconds:6.2f} s   {args.chunks / serial_seconds:7.0f} chunks/s")
+    print(f"concurrent  {len(_plan_batches(texts)):4d} budgeted batches, concurrency {args.concurrency}   "
+          f"{concurrent_seconds:6.2f} s   {args.chunks / concurrent_seconds:7.0f} chunks/s")
+    print("output order preserved in both modes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Benchmark sandboxed PDF extraction throughput (pages/sec) against worker count.
+
+Each run extracts the whole document through iter_pages_sandboxed with the
+per-document parallelism and the node's process cap both set to the worker
+count, so the figures include child start-up and page-range sharding.
+Without --pdf a text-dense PDF of --pages pages is generated.
+
+Usage (from backend/):
+    python scripts/bench_pdf_extraction.py [--pdf book.pdf] [--pages 300] [--workers 1,2,4,8] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+WORDS = (
+    "the derivative of a function measures how its output changes as the input changes "
+    "integration accumulates quantities over an interval and undoes differentiation "
+    "a vector space is closed under addition and scalar multiplication"
+).split()
+
+
+def write_sample_pdf(path: str, pages: int, lines_per_page: int = 50, image_mb: float = 0) -> None:
+    """
+    Write a PDF whose pages each hold `lines_per_page` lines of Helvetica text.
+
+    With `image_mb`, the first page also carries an (undrawn) image of that
+    size, standing in for the figures that make up most of a real textbook.
+    """
+    from pypdf import PdfWriter
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for page_number in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        lines = []
+        for line in range(lines_per_page):
+            words = [WORDS[(page_number * 7 + line * 3 + i) % len(WORDS)] for i in range(14)]
+            lines.append(f"({page_number + 1}.{line + 1} {' '.join(words)}) Tj T*")
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 9 Tf 11 TL 40 760 Td {' '.join(lines)} ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+    if image_mb:
+        side = int((image_mb * 1024 * 1024 / 3) ** 0.5)
+        image = DecodedStreamObject()
+        image.set_data(os.urandom(side * side * 3))
+        image.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Image"),
+            NameObject("/Width"): NumberObject(side),
+            NameObject("/Height"): NumberObject(side),
+            NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+            NameObject("/BitsPerComponent"): NumberObject(8),
+        })
+        writer.pages[0][NameObject("/Resources")][NameObject("/XObject")] = DictionaryObject({
+            NameObject("/Im1"): writer._add_object(image)
+        })
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf", help="PDF to extract (default: generate one)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages of the generated PDF")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count; the best is reported")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x",
+    })
+    import threading
+    from app.services import extraction_sandbox
+
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "sample.pdf")
+        write_sample_pdf(path, args.pages)
+    print(f"{path}: {os.path.getsize(path) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        extraction_sandbox.settings.pdf_extraction_parallelism = workers
+        extraction_sandbox._process_slots = threading.BoundedSemaphore(workers)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pages = list(extraction_sandbox.iter_pages_sandboxed("pdf", path))
+            best = min(best, time.perf_counter() - start)
+        assert all(pages), "some pages extracted no text"
+        rate = len(pages) / best
+        baseline = baseline or rate
+        # iter_pages_sandboxed never starts more children than CPUs or shards
+        children = max(1, min(workers, os.cpu_count() or 1, len(pages) // extraction_sandbox.PDF_PAGES_PER_SHARD))
+        print(f"workers {workers:2d} ({children} children)   {len(pages)} pages in {best:6.2f}s   "
+              f"{rate:7.1f} pages/sec   speedup {rate / baseline:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Measure recall and latency of quantized search, with and without rescoring and oversampling.
+
+Stores clustered random vectors for one user and document in a scratch
+collection created with --quantization (the way ensure_collection_exists
+creates it for QDRANT_QUANTIZATION), waits until Qdrant has indexed them,
+then searches through search_vectors with each rescore/oversampling
+setting. Recall@k is measured against an exact cosine search in numpy.
+The collection is deleted afterwards. Qdrant only quantizes indexed
+segments, so use enough --points to pass its indexing threshold.
+
+The vector RAM reported is the vector data Qdrant keeps in memory,
+computed from the point count: the quantized vectors (always_ram, with
+the originals on disk), next to the float32 originals without quantization.
+
+Usage (from backend/):
+    python scripts/bench_qdrant_quantization.py --qdrant-url http://localhost:6333 [--qdrant-api-key KEY]
+        [--quantization scalar] [--points 20000] [--dimensions 1536] [--queries 200] [--top-k 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USER_ID = str(uuid4())
+DOCUMENT_ID = str(uuid4())
+# Vectors are spread around this many topics, like the chunks of a document
+CLUSTERS = 50
+# (rescore, oversampling) settings compared
+SEARCH_SETTINGS = [(False, 1.0), (True, 1.0), (True, 2.0), (True, 4.0)]
+# Seconds to wait for Qdrant to index and quantize the points
+INDEXING_TIMEOUT_SECONDS = 600
+
+
+def _percentiles(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return f"p50 {p50 * 1e3:7.2f} ms   p99 {p99 * 1e3:7.2f} ms"
+
+
+def _vectors(rng: np.random.Generator, count: int, dimensions: int, centers: np.ndarray) -> np.ndarray:
+    """Unit vectors scattered around random cluster centers."""
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal(
+        (count, dimensions), dtype=np.float32
+    ) / np.sqrt(dimensions)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _ram_bytes(quantization: str, count: int, dimensions: int) -> int:
+    if quantization == "scalar":
+        return count * dimensions
+    if quantization == "binary":
+        return count * dimensions // 8
+    return count * dimensions * 4
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--qdrant-url", required=True, help="Qdrant to measure against")
+    parser.add_argument("--qdrant-api-key", default="", help="API key of that Qdrant")
+    parser.add_argument("--quantization", choices=["scalar", "binary"], default="scalar",
+                        help="QDRANT_QUANTIZATION of the scratch collection")
+    parser.add_argument("--points", type=int, default=20000, help="Vectors to store")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Vector size")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per setting")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": args.qdrant_url, "QDRANT_API_KEY": args.qdrant_api_key,
+        "QDRANT_QUANTIZATION": args.quantization, "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+    })
+    from qdrant_client.models import CollectionStatus
+    from app.core.qdrant import ensure_collection_exists, qdrant_client, search_vectors, store_vectors
+    from app.core.resources import resources
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((CLUSTERS, args.dimensions), dtype=np.float32) / np.sqrt(args.dimensions)
+    embeddings = _vectors(rng, args.points, args.dimensions, centers)
+    queries = _vectors(rng, args.queries, args.dimensions, centers)
+    chunks = [{"content": f"chunk {i}", "chunk_index": i, "metadata": {}} for i in range(args.points)]
+
+    # Exact top-k by cosine similarity (the vectors are unit length)
+    expected = np.argsort(-(queries @ embeddings.T), axis=1)[:, :args.top_k]
+
+    collection_name = f"bench-quantization-{uuid4().hex[:8]}"
+    ensure_collection_exists(collection_name, args.dimensions)
+    try:
+        start = time.perf_counter()
+        for i in range(0, args.points, 1000):
+            await store_vectors(
+                DOCUMENT_ID, USER_ID, chunks[i:i + 1000], embeddings[i:i + 1000], collection_name=collection_name
+            )
+        print(f"Stored {args.points} x {args.dimensions} vectors in {time.perf_counter() - start:.1f}s; "
+              f"waiting for indexing")
+
+        deadline = time.monotonic() + INDEXING_TIMEOUT_SECONDS
+        while True:
+            info = qdrant_client.get_collection(collection_name)
+            if info.status == CollectionStatus.GREEN and info.indexed_vectors_count:
+                break
+            if time.monotonic() > deadline:
+                print(f"Collection still {info.status} with {info.indexed_vectors_count} indexed vectors; "
+                      f"searching anyway")
+                break
+            await asyncio.sleep(1)
+        print(f"Indexed {info.indexed_vectors_count} of {info.points_count} points")
+
+        print(f"{args.quantization} quantization, {args.queries} queries, top {args.top_k}; vector RAM "
+              f"{_ram_bytes(args.quantization, args.points, args.dimensions) / 1e6:.1f} MB "
+              f"(unquantized {_ram_bytes('', args.points, args.dimensions) / 1e6:.1f} MB)")
+        # Warm up the connection
+        await search_vectors(queries[0], DOCUMENT_ID, args.top_k, user_id=USER_ID, collection_name=collection_name)
+        for rescore, oversampling in SEARCH_SETTINGS:
+            latencies = []
+            hits = 0
+            for query, expected_indices in zip(queries, expected):
+                query_start = time.perf_counter()
+                results = await search_vectors(
+                    query, DOCUMENT_ID, args.top_k, user_id=USER_ID, collection_name=collection_name,
+                    rescore=rescore, oversampling=oversampling
+                )
+                latencies.append(time.perf_counter() - query_start)
+                hits += len({result["chunk_index"] for result in results} & set(expected_indices.tolist()))
+            recall = hits / (args.queries * args.top_k)
+            print(f"  rescore {str(rescore):5s} oversampling {oversampling:3.1f}   "
+                  f"recall@{args.top_k} {recall:6.3f}   {_percentiles(latencies)}")
+    finally:
+        qdrant_client.delete_collection(collection_name)
+        await resources.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
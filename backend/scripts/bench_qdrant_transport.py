@@ -0,0 +1,216 @@
+"""
+Compare Qdrant over REST/JSON and gRPC: request encoding, upsert throughput and query latency.
+
+Without --qdrant-url only the client side is measured: upsert and query
+requests are encoded with qdrant-client's own REST (jsonable_encoder, JSON
+text) and gRPC (conversion, protobuf) paths, and their sizes reported.
+Upserts are built both as store_vectors sends them (one Batch per request)
+and as it used to (a PointStruct per point, each row converted alone).
+
+With --qdrant-url the same points are also written through store_vectors
+(batches of QDRANT_UPSERT_BATCH_SIZE, QDRANT_UPSERT_PARALLELISM in flight)
+and searched through search_vectors, once per transport, in a scratch
+collection that is deleted afterwards.
+
+Usage (from backend/):
+    python scripts/bench_qdrant_transport.py [--points 2048] [--dimensions 1536] [--queries 200]
+        [--qdrant-url http://localhost:6333] [--qdrant-api-key KEY] [--grpc-port 6334]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from uuid import uuid4
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USER_ID = str(uuid4())
+DOCUMENT_ID = str(uuid4())
+TOP_K = 5
+
+
+def _percentiles(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    return f"p50 {p50 * 1e3:7.2f} ms   p99 {p99 * 1e3:7.2f} ms"
+
+
+def _chunks(count: int) -> list[dict]:
+    return [
+        {
+            "content": f"chunk {i} " + "lorem ipsum dolor sit amet " * 37,
+            "chunk_index": i,
+            "metadata": {
+                "page_start": i // 3 + 1, "page_end": i // 3 + 1, "char_start": i * 1000, "char_end": i * 1000 + 999
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def _measure_encoding(chunks: list[dict], embeddings: np.ndarray, batch_size: int) -> None:
+    """Build and encode the upserts and one filtered query the way each transport does."""
+    from qdrant_client import grpc
+    from qdrant_client.conversions.conversion import RestToGrpc
+    from qdrant_client.http.api.points_api import jsonable_encoder
+    from qdrant_client.models import (
+        Batch, PointsBatch, PointsList, PointStruct, QueryRequest, QuantizationSearchParams, SearchParams
+    )
+    from app.core.qdrant import _document_filter, get_point_id
+
+    def payload(chunk: dict) -> dict:
+        return {"user_id": USER_ID, "document_id": DOCUMENT_ID, "content": chunk["content"],
+                "chunk_index": chunk["chunk_index"], "metadata": chunk["metadata"]}
+
+    # What store_vectors used to send: a PointStruct per point, each row converted on its own
+    def points(start: int) -> list[PointStruct]:
+        return [
+            PointStruct(id=get_point_id(DOCUMENT_ID, chunk["chunk_index"]), vector=embedding.tolist(),
+                        payload=payload(chunk))
+            for chunk, embedding in zip(chunks[start:start + batch_size], embeddings[start:start + batch_size])
+        ]
+
+    # What it sends now: one Batch per request, its rows converted in one call
+    def batch(start: int) -> Batch:
+        request_chunks = chunks[start:start + batch_size]
+        return Batch(
+            ids=[get_point_id(DOCUMENT_ID, chunk["chunk_index"]) for chunk in request_chunks],
+            vectors=embeddings[start:start + batch_size].tolist(),
+            payloads=[payload(chunk) for chunk in request_chunks]
+        )
+
+    def encode_rest(request: list[PointStruct] | Batch) -> int:
+        body = PointsBatch(batch=request) if isinstance(request, Batch) else PointsList(points=request)
+        return len(jsonable_encoder(body).encode())
+
+    def encode_grpc(request: list[PointStruct] | Batch) -> int:
+        # The conversions AsyncQdrantClient.upsert makes for each form
+        if isinstance(request, Batch):
+            vectors = RestToGrpc.convert_batch_vector_struct(request.vectors, len(request.ids))
+            grpc_points = [
+                grpc.PointStruct(
+                    id=RestToGrpc.convert_extended_point_id(point_id), vectors=vector,
+                    payload=RestToGrpc.convert_payload(point_payload)
+                )
+                for point_id, vector, point_payload in zip(request.ids, vectors, request.payloads)
+            ]
+        else:
+            grpc_points = [RestToGrpc.convert_point_struct(point) for point in request]
+        return len(grpc.UpsertPoints(collection_name="bench", points=grpc_points).SerializeToString())
+
+    query_filter = _document_filter(DOCUMENT_ID, 3, 7, USER_ID)
+    search_params = SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=2.0))
+
+    def encode_rest_query() -> int:
+        request = QueryRequest(query=embeddings[0].tolist(), filter=query_filter, limit=TOP_K, params=search_params)
+        return len(jsonable_encoder(request).encode())
+
+    def encode_grpc_query() -> int:
+        request = grpc.QueryPoints(
+            collection_name="bench",
+            query=RestToGrpc.convert_query_interface(embeddings[0].tolist()),
+            filter=RestToGrpc.convert_filter(query_filter),
+            limit=TOP_K,
+            params=RestToGrpc.convert_search_params(search_params)
+        )
+        return len(request.SerializeToString())
+
+    print(f"Client-side building and encoding of {len(chunks)} points x {embeddings.shape[1]} dims with payload, "
+          f"in batches of {batch_size}:")
+    for name, encode, encode_query in (
+        ("REST/JSON", encode_rest, encode_rest_query),
+        ("gRPC", encode_grpc, encode_grpc_query),
+    ):
+        for form, build in (("PointStructs", points), ("Batch", batch)):
+            build_seconds = encode_seconds = size = 0
+            for i in range(0, len(chunks), batch_size):
+                start = time.perf_counter()
+                request = build(i)
+                built = time.perf_counter()
+                size += encode(request)
+                build_seconds += built - start
+                encode_seconds += time.perf_counter() - built
+            seconds = build_seconds + encode_seconds
+            print(f"  {name:10s} {form:12s} upserts {seconds:6.2f} s ({len(chunks) / seconds / 1000:5.1f}k points/s; "
+                  f"build {build_seconds:5.2f} s, encode {encode_seconds:5.2f} s), {size / 1e6:6.1f} MB")
+
+        query_latencies = []
+        for _ in range(200):
+            query_start = time.perf_counter()
+            query_size = encode_query()
+            query_latencies.append(time.perf_counter() - query_start)
+        print(f"  {name:10s} filtered top-{TOP_K} query {statistics.median(query_latencies) * 1e3:5.2f} ms, "
+              f"{query_size / 1024:5.1f} KB")
+
+
+async def _measure_server(chunks: list[dict], embeddings: np.ndarray, queries: int) -> None:
+    """Write and search the points through the app's code path, once per transport."""
+    from qdrant_client import AsyncQdrantClient
+    from app.config import get_settings
+    from app.core.qdrant import ensure_collection_exists, qdrant_client, search_vectors, store_vectors
+    from app.core.resources import resources
+
+    settings = get_settings()
+    print(f"Against {settings.qdrant_url} (upsert batches of {settings.qdrant_upsert_batch_size}, "
+          f"{settings.qdrant_upsert_parallelism} in flight):")
+    for name, prefer_grpc in (("REST/JSON", False), ("gRPC", True)):
+        collection_name = f"bench-transport-{uuid4().hex[:8]}"
+        ensure_collection_exists(collection_name, embeddings.shape[1])
+        resources._factories["async_qdrant"] = lambda prefer_grpc=prefer_grpc: AsyncQdrantClient(
+            url=settings.qdrant_url, api_key=settings.qdrant_api_key or None, prefer_grpc=prefer_grpc,
+            grpc_port=settings.qdrant_grpc_port, check_compatibility=False
+        )
+        try:
+            start = time.perf_counter()
+            await store_vectors(DOCUMENT_ID, USER_ID, chunks, embeddings, collection_name=collection_name)
+            upsert_seconds = time.perf_counter() - start
+
+            # Warm up the connection, then query random stored vectors
+            await search_vectors(embeddings[0], DOCUMENT_ID, TOP_K, user_id=USER_ID, collection_name=collection_name)
+            latencies = []
+            for i in np.random.default_rng(0).integers(0, len(embeddings), queries):
+                query_start = time.perf_counter()
+                await search_vectors(
+                    embeddings[i], DOCUMENT_ID, TOP_K, user_id=USER_ID, collection_name=collection_name
+                )
+                latencies.append(time.perf_counter() - query_start)
+        finally:
+            await resources.aclose()
+            qdrant_client.delete_collection(collection_name)
+
+        print(f"  {name:10s} upsert {upsert_seconds:6.2f} s ({len(chunks) / upsert_seconds / 1000:5.1f}k points/s)   "
+              f"filtered top-{TOP_K} query {_percentiles(latencies)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=2048, help="Points to encode and upsert")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Vector size")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per transport against the server")
+    parser.add_argument("--qdrant-url", help="Qdrant to measure against; only encoding is measured without it")
+    parser.add_argument("--qdrant-api-key", default="", help="API key of that Qdrant")
+    parser.add_argument("--grpc-port", type=int, default=6334, help="gRPC port of that Qdrant")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": args.qdrant_url or "http://127.0.0.1:9", "QDRANT_API_KEY": args.qdrant_api_key,
+        "QDRANT_GRPC_PORT": str(args.grpc_port), "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+    })
+    from app.config import get_settings
+
+    chunks = _chunks(args.points)
+    embeddings = np.random.default_rng(0).standard_normal((args.points, args.dimensions), dtype=np.float32)
+    _measure_encoding(chunks, embeddings, get_settings().qdrant_upsert_batch_size)
+    if args.qdrant_url:
+        await _measure_server(chunks, embeddings, args.queries)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark sanitize_text against the per-character loop it replaced.
+
+Runs on several MB of generated text in different scripts, with a control
+character after ~--control-rate of the words (PDF extraction leaves NULs,
+form feeds and other controls behind). With --chunk-chars the text is
+sanitized in pieces of that size, as extraction does page by page. Exits
+non-zero if any corpus is less than --min-speedup times faster than the loop.
+
+Usage (from backend/):
+    python scripts/bench_sanitize.py [--mb 4] [--control-rate 0.01] [--chunk-chars 3000] [--min-speedup 10]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ENGLISH = "the derivative of a function measures how its output changes as the input changes".split()
+CORPORA = {
+    "ascii": ENGLISH,
+    "english + typography": ENGLISH * 10 + "“quoted” • ﬁnd – ’s".split(),
+    "latin-1": ENGLISH * 3 + "café naïve résumé élève über straße ½ ° ±".split(),
+    "greek / math": "αβγ Δx → ∞ ∫ f(x)dx ≤ ∑ ∂ ∇ θ λ 𝑥 𝑓(𝑥)".split() + ENGLISH,
+    "cjk": "数学 函数 导数 积分 的 是 一个 在 我们 定理".split(),
+}
+CONTROLS = ["\x00", "\x02", "\x0c", "\x1f", "\x7f", "\x85"]
+
+_REGEX = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ud800-\udfff]")
+
+
+def loop_sanitize(text: str) -> str:
+    """The original implementation: a Python loop over every character (ASCII only)."""
+    text = text.replace("\x00", "")
+    cleaned_chars = []
+    for char in text:
+        code = ord(char)
+        if (32 <= code <= 126) or code in (9, 10, 13):
+            cleaned_chars.append(char)
+    return "".join(cleaned_chars)
+
+
+def regex_sanitize(text: str) -> str:
+    """A single compiled character-class regex."""
+    return _REGEX.sub("", text)
+
+
+def _make_text(words: list[str], size: int, control_rate: float, rng: random.Random) -> str:
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(words)
+        if rng.random() < control_rate:
+            word += rng.choice(CONTROLS)
+        parts.append(word)
+        length += len(word) + 1
+        if len(parts) % 12 == 0:
+            parts.append("\n")
+    return " ".join(parts)
+
+
+def _best_time(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=float, default=4, help="Characters per corpus, in millions")
+    parser.add_argument("--control-rate", type=float, default=0.01, help="Share of words followed by a control")
+    parser.add_argument("--chunk-chars", type=int, default=0, help="Sanitize in pieces of this size (0: whole text)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-speedup", type=float, default=10)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x",
+    })
+    from app.services.text_extraction import sanitize_text
+
+    def chunked(func):
+        if not args.chunk_chars:
+            return func
+        return lambda chunks: [func(chunk) for chunk in chunks]
+
+    rng = random.Random(0)
+    ok = True
+    print(f"{'corpus':22s} {'loop':>9s} {'regex':>9s} {'sanitize_text':>14s} {'vs loop':>8s}")
+    for name, words in CORPORA.items():
+        text = _make_text(words, int(args.mb * 1e6), args.control_rate, rng)
+        assert sanitize_text(text) == regex_sanitize(text)
+        if args.chunk_chars:
+            text = [text[i:i + args.chunk_chars] for i in range(0, len(text), args.chunk_chars)]
+        loop = _best_time(chunked(loop_sanitize), text, 1)
+        regex = _best_time(chunked(regex_sanitize), text, args.repeat)
+        current = _best_time(chunked(sanitize_text), text, args.repeat)
+        speedup = loop / current
+        ok &= speedup >= args.min_speedup
+        print(f"{name:22s} {loop * 1e3:7.1f}ms {regex * 1e3:7.1f}ms {current * 1e3:12.1f}ms {speedup:7.1f}x")
+
+    print("PASS" if ok else f"FAIL: below {args.min_speedup:g}x")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Measure API startup: importing app.main and serving the first request.
+
+Each run starts a fresh interpreter that imports app.main, enters the
+lifespan through TestClient and sends GET /health, then GET /ready. Qdrant
+is either refusing connections or accepting them and never replying (a
+listener on localhost that reads nothing), the cases in which startup used
+to stall; Supabase and OpenAI are never contacted.
+
+Usage (from backend/):
+    python scripts/bench_startup.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+# Runs in the fresh interpreter; prints its timings as JSON
+_CHILD = """
+import json, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    started = time.perf_counter()
+    health = client.get("/health")
+    first_request = time.perf_counter()
+    ready = client.get("/ready")
+    print(json.dumps({
+        "import": imported - start, "lifespan": started - imported, "health": first_request - started,
+        "health_status": health.status_code, "ready_status": ready.status_code,
+    }))
+"""
+
+
+def _start_hanging_server() -> int:
+    """Accept connections and never answer them."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(64)
+    accepted = []
+
+    def accept() -> None:
+        while True:
+            accepted.append(listener.accept()[0])
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+def _refused_port() -> int:
+    """Return a port nothing listens on."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _run(qdrant_url: str) -> dict:
+    env = {
+        **os.environ,
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": qdrant_url, "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+    }
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    # Includes interpreter start-up and the lifespan shutdown
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per case; the best is reported")
+    args = parser.parse_args()
+
+    cases = {
+        "qdrant refused": f"http://127.0.0.1:{_refused_port()}",
+        "qdrant hanging": f"http://127.0.0.1:{_start_hanging_server()}",
+    }
+    for name, qdrant_url in cases.items():
+        runs = [_run(qdrant_url) for _ in range(args.runs)]
+        best = min(runs, key=lambda timings: timings["import"] + timings["lifespan"] + timings["health"])
+        print(f"{name:16s} import {best['import']:6.2f} s   lifespan {best['lifespan'] * 1e3:7.1f} ms   "
+              f"first /health {best['health'] * 1e3:6.1f} ms ({best['health_status']})   "
+              f"/ready {best['ready_status']}   process {best['total']:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
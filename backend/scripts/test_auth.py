@@ -0,0 +1,64 @@
+"""
+Check that tokens without a usable user ID are rejected with a 401.
+
+A token signed with the project's JWT secret passes local verification
+even when its `sub` claim is missing or is not a UUID; get_user_id_from_token
+must answer those with a 401 rather than fail with a 500. A valid token is
+checked to still resolve to its user.
+
+Usage (from backend/):
+    python scripts/test_auth.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+JWT_SECRET = "test-secret-test-secret-test-secret"
+
+
+async def main() -> int:
+    os.environ.update({
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+    })
+    import jwt
+    from fastapi import HTTPException
+    from app.api.routes.documents import get_user_id_from_token
+
+    now = int(time.time())
+    user_id = str(uuid4())
+    claims = {"aud": "authenticated", "exp": now + 3600, "iat": now}
+
+    async def outcome(payload: dict) -> str:
+        token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
+        try:
+            return str(await get_user_id_from_token(f"Bearer {token}"))
+        except HTTPException as e:
+            return str(e.status_code)
+        except Exception as e:
+            return f"{type(e).__name__} (500)"
+
+    cases = [
+        ("valid sub", {**claims, "sub": user_id}, user_id),
+        ("missing sub", claims, "401"),
+        ("non-UUID sub", {**claims, "sub": "not-a-uuid"}, "401"),
+        ("empty sub", {**claims, "sub": ""}, "401"),
+    ]
+    ok = True
+    for name, payload, expected in cases:
+        result = await outcome(payload)
+        ok = ok and result == expected
+        print(f"{name:14s} {result:40s} {'OK' if result == expected else f'FAIL (expected {expected})'}")
+
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,265 @@
+"""
+Check that concurrent ingestions of large documents stay within a memory target.
+
+Runs --documents copies of process_document at once, as a worker with that
+many slots would, on a generated PDF of --pages text pages plus a large
+image that brings the file to about --file-mb. Supabase (PostgREST), the
+embeddings API and Qdrant are served by a stub HTTP server in another
+process that discards what it receives, so serializing requests is part of
+the measurement. The documents go through the real pipeline: sandboxed
+extraction, chunking, embedding, and upserts to Qdrant and the chunks table.
+
+This process's peak RSS (VmHWM) during the run must grow by at most
+--max-mb-per-document for each concurrent document, and every extraction
+child must stay under EXTRACTION_MEMORY_LIMIT_MB.
+
+Usage (from backend/):
+    python scripts/test_ingestion_memory.py [--documents 3] [--pages 400] [--file-mb 50] [--max-mb-per-document 32]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import UUID, uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USER_ID = str(UUID(int=1))
+DIMENSIONS = 1536
+
+# GET /collections/{name}: a collection partitioned by user, as ensure_collection_exists creates it
+COLLECTION_INFO = {
+    "status": "green", "optimizer_status": "ok", "points_count": 0, "indexed_vectors_count": 0, "segments_count": 1,
+    "config": {
+        "params": {"vectors": {"size": DIMENSIONS, "distance": "Cosine"}},
+        "hnsw_config": {"m": 0, "ef_construct": 100, "full_scan_threshold": 10000, "payload_m": 16},
+        "optimizer_config": {
+            "deleted_threshold": 0.2, "vacuum_min_vector_number": 1000, "default_segment_number": 0,
+            "flush_interval_sec": 5,
+        },
+        "wal_config": {"wal_capacity_mb": 32, "wal_segments_ahead": 0},
+    },
+    "payload_schema": {},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    documents: dict[str, str] = {}
+    # chunk_index of the points stored for each document
+    stored: dict[str, set[int]] = defaultdict(set)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _send(self, payload, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _document_row(self) -> list[dict]:
+        match = re.search(r"id=eq\.([0-9a-f-]+)", self.path)
+        if not match or match.group(1) not in self.documents:
+            return []
+        document_id = match.group(1)
+        return [{
+            "id": document_id, "user_id": USER_ID, "filename": "book.pdf", "file_path": f"{USER_ID}/{document_id}",
+            "file_type": "pdf", "file_size": 0, "content_hash": None, "status": "processing",
+            "created_at": "2024-01-01T00:00:00+00:00",
+        }]
+
+    def _unexpected(self) -> None:
+        # Fail loudly, so a new call in the pipeline shows up here rather than as a failed ingestion
+        print(f"Stub: unexpected {self.command} {self.path}", file=sys.stderr)
+        self._send({"status": {"error": f"Unexpected {self.command} {self.path}"}}, status=404)
+
+    def do_GET(self):
+        self._body()
+        path = self.path.split("?")[0]
+        if path.startswith("/rest/v1/documents"):
+            self._send(self._document_row())
+        elif path.startswith("/rest/v1/"):
+            # Other PostgREST selects, e.g. chunk rows to record duplicate pages on
+            self._send([])
+        elif re.fullmatch(r"/collections/[^/]+", path):
+            self._send({"result": COLLECTION_INFO, "status": "ok", "time": 0})
+        else:
+            self._unexpected()
+
+    def do_PATCH(self):
+        self._body()
+        self._send(self._document_row())
+
+    def do_DELETE(self):
+        self._body()
+        self._send([])
+
+    def do_PUT(self):
+        # Qdrant upsert
+        request = json.loads(self._body())
+        # store_vectors sends a columnar batch; copies are sent as a list of points
+        if "batch" in request:
+            payloads = request["batch"]["payloads"]
+        else:
+            payloads = [point["payload"] for point in request["points"]]
+        for payload in payloads:
+            self.stored[payload["document_id"]].add(payload["chunk_index"])
+        self._send({"result": {"operation_id": 0, "status": "acknowledged"}, "status": "ok", "time": 0})
+
+    def do_POST(self):
+        body = self._body()
+        path = self.path.split("?")[0]
+        if path.endswith("/embeddings"):
+            request = json.loads(body)
+            vector = base64.b64encode(bytes(4 * DIMENSIONS)).decode()
+            self._send({
+                "object": "list", "model": request["model"],
+                "data": [{"object": "embedding", "index": i, "embedding": vector} for i in range(len(request["input"]))],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            })
+        elif path.endswith("/points/count"):
+            conditions = json.loads(body)["filter"]["must"]
+            document_id = next(c["match"]["value"] for c in conditions if c.get("key") == "document_id")
+            self._send({"result": {"count": len(self.stored[document_id])}, "status": "ok", "time": 0})
+        elif path.endswith("/points/delete"):
+            # Stale chunks past the end of a document: document_id and chunk_index >= N
+            conditions = json.loads(body)["filter"]["must"]
+            document_id = next(c["match"]["value"] for c in conditions if c.get("key") == "document_id")
+            start = next((c["range"]["gte"] for c in conditions if c.get("key") == "chunk_index"), 0)
+            self.stored[document_id] = {index for index in self.stored[document_id] if index < start}
+            self._send({"result": {"operation_id": 0, "status": "completed"}, "status": "ok", "time": 0})
+        elif path.endswith("/points/batch"):
+            operations = json.loads(body)["operations"]
+            self._send({
+                "result": [{"operation_id": 0, "status": "completed"} for _ in operations], "status": "ok", "time": 0
+            })
+        elif path == "/register":
+            self.documents.update(json.loads(body))
+            self._send({})
+        elif path.startswith("/rest/v1/"):
+            # PostgREST inserts
+            self._send([], status=201)
+        else:
+            self._unexpected()
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_stub(port_queue) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _rss_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not found")
+
+
+def _reset_peak_rss() -> bool:
+    """Reset VmHWM to the current RSS (Linux 4.0+); return whether it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=3, help="Concurrent ingestions")
+    parser.add_argument("--pages", type=int, default=400, help="Text pages per document")
+    parser.add_argument("--file-mb", type=float, default=50, help="Approximate file size")
+    parser.add_argument("--max-mb-per-document", type=float, default=32, help="Allowed peak RSS growth per document")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    stub = context.Process(target=_serve_stub, args=(port_queue,), daemon=True)
+    stub.start()
+    stub_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    work_dir = tempfile.mkdtemp()
+    os.environ.update({
+        "SUPABASE_URL": stub_url, "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": stub_url, "QDRANT_API_KEY": "", "KIMI_API_KEY": "x",
+        "OPENAI_API_KEY": "x", "OPENAI_BASE_URL": stub_url,
+        "EMBEDDING_CACHE_PATH": os.path.join(work_dir, "embeddings.sqlite3"),
+        "INGESTION_CHECKPOINT_DIR": os.path.join(work_dir, "checkpoints"),
+        "UPLOAD_SPOOL_DIR": os.path.join(work_dir, "spool"),
+    })
+
+    import httpx
+    from bench_pdf_extraction import write_sample_pdf
+    from app.config import get_settings
+    from app.services.ingestion import process_document
+    from app.services.upload_spool import get_spool_path
+
+    source_path = os.path.join(work_dir, "book.pdf")
+    write_sample_pdf(source_path, args.pages, image_mb=args.file_mb)
+    file_mb = os.path.getsize(source_path) / 1024 / 1024
+
+    def spool_documents(count: int) -> list[tuple[str, str]]:
+        documents = []
+        for _ in range(count):
+            document_id = str(uuid4())
+            spool_path = get_spool_path(document_id)
+            shutil.copyfile(source_path, spool_path)
+            documents.append((document_id, spool_path))
+        httpx.post(f"{stub_url}/register", json={document_id: USER_ID for document_id, _ in documents})
+        return documents
+
+    async def ingest(documents: list[tuple[str, str]]) -> list[bool]:
+        return await asyncio.gather(*(process_document(document_id, path) for document_id, path in documents))
+
+    # Warm up clients, caches and code paths so the baseline includes them
+    warm_up = spool_documents(1)
+    assert await ingest(warm_up) == [True]
+
+    documents = spool_documents(args.documents)
+    baseline = _rss_mb("VmRSS")
+    if not _reset_peak_rss():
+        baseline = _rss_mb("VmHWM")
+    start = time.perf_counter()
+    results = await ingest(documents)
+    elapsed = time.perf_counter() - start
+    peak = _rss_mb("VmHWM")
+    child_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    assert all(results), f"ingestion failed: {results}"
+
+    growth = peak - baseline
+    limit = args.max_mb_per_document * args.documents
+    child_limit = get_settings().extraction_memory_limit_mb
+    print(f"{args.documents} concurrent ingestions of a {file_mb:.0f} MB, {args.pages}-page PDF in {elapsed:.1f}s")
+    print(f"Worker RSS baseline {baseline:.1f} MB, peak {peak:.1f} MB, growth {growth:.1f} MB "
+          f"({growth / args.documents:.1f} MB per document, limit {args.max_mb_per_document:g} MB)")
+    print(f"Largest extraction child peak RSS {child_peak:.1f} MB (limit {child_limit} MB)")
+
+    stub.terminate()
+    ok = growth <= limit and child_peak <= child_limit
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
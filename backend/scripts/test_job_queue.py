@@ -0,0 +1,94 @@
+"""
+Check that a job whose lease expires on its final attempt fails its document.
+
+A worker that dies (or stops renewing its lease) on a job's last attempt
+leaves the job running with an expired lease. The next claim must mark the
+job failed and hand it back as exhausted instead of dropping it, and the
+worker must then mark the document failed and remove its spool, so the
+document doesn't stay 'processing' and /reprocess can queue it again.
+Also checks that a lease expiring on an earlier attempt is retried.
+
+The queue is a scratch SQLite file; Supabase is replaced by a recorder.
+
+Usage (from backend/):
+    python scripts/test_job_queue.py
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+DOCUMENT_ID = "00000000-0000-0000-0000-000000000001"
+
+
+async def main() -> int:
+    scratch = tempfile.mkdtemp()
+    os.environ.update({
+        "SUPABASE_URL": "http://127.0.0.1:9", "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+        "UPLOAD_SPOOL_DIR": scratch,
+    })
+    from app import worker
+    from app.services.job_queue import JobQueue, JOB_FAILED, JOB_RUNNING, PROCESS_DOCUMENT, LEASE_EXPIRED_ERROR
+
+    failed_documents = []
+
+    async def record_failure(document_id: str, error_message: str) -> None:
+        failed_documents.append((document_id, error_message))
+
+    worker._mark_document_failed = record_failure
+
+    spool_path = os.path.join(scratch, "upload.pdf")
+    with open(spool_path, "wb") as f:
+        f.write(b"%PDF-1.4")
+
+    path = os.path.join(scratch, "jobs.sqlite3")
+    queue = JobQueue(path=path, lease_seconds=1, max_attempts=2, retry_backoff_seconds=0)
+    job_id = queue.enqueue(PROCESS_DOCUMENT, {"document_id": DOCUMENT_ID, "spool_path": spool_path})
+
+    def status() -> str:
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT status, last_error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    # First attempt: the worker dies, so the expired lease is claimed again as the final attempt
+    first = queue.claim("worker-a")
+    time.sleep(1.1)
+    second = queue.claim("worker-b")
+    retried = (
+        first["attempts"] == 1 and not first["exhausted"]
+        and second["id"] == job_id and second["attempts"] == 2 and not second["exhausted"]
+        and status()[0] == JOB_RUNNING
+    )
+    print(f"Lease expired on attempt 1 of 2, claimed again: {'OK' if retried else 'FAIL'}")
+
+    # Final attempt: that worker dies too
+    time.sleep(1.1)
+    exhausted = queue.claim("worker-c")
+    reported = (
+        exhausted is not None and exhausted["id"] == job_id and exhausted["exhausted"]
+        and status() == (JOB_FAILED, LEASE_EXPIRED_ERROR) and queue.claim("worker-c") is None
+    )
+    print(f"Lease expired on the final attempt, job failed and reported: {'OK' if reported else 'FAIL'}")
+
+    await worker._fail_exhausted_job(exhausted)
+    document_failed = (
+        [document_id for document_id, _ in failed_documents] == [DOCUMENT_ID] and not os.path.exists(spool_path)
+    )
+    print(f"Document marked failed, spool removed: {'OK' if document_failed else 'FAIL'} {failed_documents}")
+
+    # /reprocess queues the document again
+    requeued = queue.enqueue_unique(PROCESS_DOCUMENT, {"document_id": DOCUMENT_ID}, "document_id") != job_id
+    print(f"Failed job can be queued again: {'OK' if requeued else 'FAIL'}")
+
+    ok = retried and reported and document_failed and requeued
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,231 @@
+"""
+Check that concurrent uploads don't grow the API's memory with their size.
+
+The API runs under uvicorn in a child process and receives --uploads
+concurrent uploads of --size-mb each, streamed by the client without ever
+building the body in memory. Supabase Storage and PostgREST are served by
+a stub HTTP server in another process that discards what it receives. The
+API's peak RSS (VmHWM) while the uploads are in flight must stay within
+--max-growth-mb of its RSS after a warm-up upload; an implementation that
+buffered each upload would grow by roughly uploads x size.
+
+Also checks that a body whose Content-Length is over the limit is rejected
+before it is sent.
+
+Usage (from backend/):
+    python scripts/test_upload_memory.py [--uploads 8] [--size-mb 45] [--max-growth-mb 64]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from uuid import UUID
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+USER_ID = UUID(int=1)
+BOUNDARY = "----bench-upload-boundary"
+CHUNK_SIZE = 256 * 1024
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _discard_body(self) -> bytes:
+        """Read the request body in chunks, keeping only the first one."""
+        first = b""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while size := int(self.rfile.readline().strip(), 16):
+                data = self.rfile.read(size)
+                first = first or data
+                self.rfile.readline()
+            self.rfile.readline()
+            return first
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining:
+            data = self.rfile.read(min(remaining, CHUNK_SIZE))
+            first = first or data
+            remaining -= len(data)
+        return first
+
+    def _send(self, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self._discard_body()
+        if self.path.startswith("/storage/"):
+            self._send({"Key": self.path.split("/object/", 1)[-1]})
+        else:
+            # PostgREST insert into documents
+            row = json.loads(body)
+            self._send([{**row, "created_at": "2024-01-01T00:00:00+00:00"}])
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve_stub(port_queue) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _serve_api(env: dict, port_queue) -> None:
+    import socket
+    import uvicorn
+
+    os.environ.update(env)
+    from app.api.routes.documents import get_user_id_from_token
+    from app.main import app
+
+    app.dependency_overrides[get_user_id_from_token] = lambda: USER_ID
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port_queue.put(sock.getsockname()[1])
+    uvicorn.Server(uvicorn.Config(app, log_level="warning")).run(sockets=[sock])
+
+
+def _rss_mb(pid: int, field: str) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError(f"{field} not found for pid {pid}")
+
+
+def _reset_peak_rss(pid: int) -> bool:
+    """Reset VmHWM to the current RSS (Linux 4.0+); return whether it worked."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _multipart(size: int, filename: str = "book.pdf") -> tuple[int, callable]:
+    """Return the length of a multipart body with a file of `size` zero bytes, and a generator of it."""
+    head = (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    chunk = bytes(CHUNK_SIZE)
+
+    async def body():
+        yield head
+        remaining = size
+        while remaining:
+            yield chunk[:min(remaining, CHUNK_SIZE)]
+            remaining -= min(remaining, CHUNK_SIZE)
+        yield tail
+
+    return len(head) + size + len(tail), body
+
+
+async def _send_headers_only(api_url: str, file_size: int) -> str:
+    """Announce an upload of file_size without sending its body; return the response status line."""
+    host, port = api_url.removeprefix("http://").split(":")
+    length, _ = _multipart(file_size)
+    reader, writer = await asyncio.open_connection(host, int(port))
+    writer.write((
+        f"POST /documents/upload HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer x\r\n"
+        f"Content-Type: multipart/form-data; boundary={BOUNDARY}\r\nContent-Length: {length}\r\n\r\n"
+    ).encode())
+    await writer.drain()
+    status = await asyncio.wait_for(reader.readline(), timeout=10)
+    writer.close()
+    return status.decode().strip()
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--size-mb", type=int, default=45, help="Size of each upload")
+    parser.add_argument("--max-growth-mb", type=float, default=64, help="Allowed peak RSS growth")
+    args = parser.parse_args()
+
+    import httpx
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    stub = context.Process(target=_serve_stub, args=(port_queue,), daemon=True)
+    stub.start()
+    stub_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    work_dir = tempfile.mkdtemp()
+    env = {
+        "SUPABASE_URL": stub_url, "SUPABASE_PUBLISHABLE_KEY": "x", "SUPABASE_SECRET_KEY": "x",
+        "QDRANT_URL": "http://127.0.0.1:9", "QDRANT_API_KEY": "x", "KIMI_API_KEY": "x", "OPENAI_API_KEY": "x",
+        "JOB_QUEUE_PATH": os.path.join(work_dir, "jobs.sqlite3"),
+        "UPLOAD_SPOOL_DIR": os.path.join(work_dir, "spool"),
+        "EMBEDDING_CACHE_PATH": os.path.join(work_dir, "embeddings.sqlite3"),
+    }
+    api = context.Process(target=_serve_api, args=(env, port_queue), daemon=True)
+    api.start()
+    api_url = f"http://127.0.0.1:{port_queue.get()}"
+
+    size = args.size_mb * 1024 * 1024
+    headers = {"Authorization": "Bearer x", "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+    async with httpx.AsyncClient(base_url=api_url, timeout=300) as client:
+        for _ in range(100):
+            try:
+                await client.get("/health")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        async def upload(file_size: int) -> httpx.Response:
+            length, body = _multipart(file_size)
+            return await client.post(
+                "/documents/upload", content=body(), headers={**headers, "Content-Length": str(length)}
+            )
+
+        # Warm up the clients and code paths so the baseline includes them
+        warm_up = await upload(1024 * 1024)
+        assert warm_up.status_code == 200, warm_up.text
+
+        baseline = _rss_mb(api.pid, "VmRSS")
+        if not _reset_peak_rss(api.pid):
+            baseline = _rss_mb(api.pid, "VmHWM")
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(upload(size) for _ in range(args.uploads)))
+        elapsed = time.perf_counter() - start
+        peak = _rss_mb(api.pid, "VmHWM")
+        for response in responses:
+            assert response.status_code == 200, response.text
+            assert response.json()["file_size"] == size
+
+        too_large = await _send_headers_only(api_url, 60 * 1024 * 1024)
+
+    api.terminate()
+    stub.terminate()
+
+    growth = peak - baseline
+    total_mb = args.uploads * args.size_mb
+    print(f"{args.uploads} concurrent uploads of {args.size_mb} MB ({total_mb} MB) in {elapsed:.1f}s")
+    print(f"API RSS baseline {baseline:.1f} MB, peak {peak:.1f} MB, growth {growth:.1f} MB "
+          f"(limit {args.max_growth_mb:g} MB)")
+    print(f"Oversized Content-Length, body not sent: {too_large}")
+
+    ok = growth <= args.max_growth_mb and too_large.startswith("HTTP/1.1 400")
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))